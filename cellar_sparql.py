@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk EUR-Lex metadata from the Publications Office Cellar SPARQL endpoint.
+
+Instead of polling two OJ feeds plus two dozen overlapping "My RSS" searches,
+one paged query asks Cellar for every act dated within a window (see State):
+
+  CELEX, English title, document date, resource type (REG, DIR, DEC_IMPL, ...)
+  and subject-matter labels
+
+Rows are mapped to the entry shape main.fetch_entries() produces
+(title/summary/link/published_utc/source/text), so ranking, de-dup and
+categorisation treat them like any feed item. The extra keys `celex`,
+`resource_type` and `subjects` are carried along for the digest.
+
+Settings: `sparql:` in config.yaml. While enabled, feeds matching
+`replaces_feeds` are not polled. CELLAR_SPARQL_ENDPOINT overrides the
+endpoint (e.g. a local stub serving canned JSON results).
+
+State: state/cellar_watermark.json
+  {"watermark": "YYYY-MM-DD", "last_run": "<ISO>"}
+The watermark is the newest document date returned so far. That is the date
+of the act, not the day it reached Cellar: acts routinely appear days or weeks
+after it. Each run therefore queries from the watermark minus `overlap_days`
+and returns everything in that window, like a feed still listing its recent
+items; main.py's seen set (links of selected items) does the de-dup, so an act
+that was not selected competes again on the next run.
+"""
+
+import os, json, time, pathlib
+import datetime as dt
+
+import requests
+
+ROOT = pathlib.Path(__file__).resolve().parent
+STATE_PATH = "state/cellar_watermark.json"
+DEFAULTS = {
+    "enabled": False,
+    "endpoint": "https://publications.europa.eu/webapi/rdf/sparql",
+    "language": "ENG",
+    "page_size": 500,
+    "max_pages": 10,
+    "initial_lookback_days": 3,
+    "overlap_days": 30,       # re-query this far behind the watermark for late-published acts
+    "oj_only": True,          # only acts published in the Official Journal
+    "resource_types": [],     # e.g. [REG, DIR, DEC]; empty = all
+    "replaces_feeds": ["https://eur-lex.europa.eu/"],
+    "timeout": 60,
+}
+EURLEX_LINK = "https://eur-lex.europa.eu/legal-content/EN/TXT/?uri=CELEX:{celex}"
+AUTHORITY = "http://publications.europa.eu/resource/authority"
+
+QUERY = """\
+PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+SELECT ?celex ?date ?type ?title
+       (GROUP_CONCAT(DISTINCT ?subject; separator="|") AS ?subjects)
+WHERE {{
+  ?work cdm:resource_legal_id_celex ?celex ;
+        cdm:work_date_document ?date ;
+        cdm:work_has_resource-type ?type .
+  {oj_filter}
+  FILTER(?date >= "{since}"^^xsd:date)
+  {type_filter}
+  ?expr cdm:expression_belongs_to_work ?work ;
+        cdm:expression_uses_language <{authority}/language/{language}> ;
+        cdm:expression_title ?title .
+  OPTIONAL {{
+    ?work cdm:resource_legal_is_about_subject-matter ?sm .
+    ?sm skos:prefLabel ?subject .
+    FILTER(lang(?subject) = "en")
+  }}
+}}
+GROUP BY ?celex ?date ?type ?title
+ORDER BY ?date ?celex
+LIMIT {limit} OFFSET {offset}
+"""
+
+def load_settings(cfg: dict) -> dict:
+    out = {**DEFAULTS, **(cfg.get("sparql") or {})}
+    out["endpoint"] = os.getenv("CELLAR_SPARQL_ENDPOINT") or out["endpoint"]
+    return out
+
+def build_query(settings: dict, since: dt.date, offset: int) -> str:
+    types = [str(t).upper() for t in settings.get("resource_types") or []]
+    type_filter = ""
+    if types:
+        uris = ", ".join(f"<{AUTHORITY}/resource-type/{t}>" for t in types)
+        type_filter = f"FILTER(?type IN ({uris}))"
+    oj_filter = "?work cdm:resource_legal_published_in_official-journal ?oj ." if settings.get("oj_only") else ""
+    return QUERY.format(
+        since=since.isoformat(), oj_filter=oj_filter, type_filter=type_filter,
+        authority=AUTHORITY, language=str(settings["language"]).upper(),
+        limit=int(settings["page_size"]), offset=offset,
+    )
+
+def _value(binding: dict, key: str) -> str:
+    return ((binding.get(key) or {}).get("value") or "").strip()
+
+def _parse_date(s: str) -> "dt.date | None":
+    try:
+        return dt.date.fromisoformat(s[:10])
+    except Exception:
+        return None
+
+def row_to_entry(b: dict, source: str) -> "dict | None":
+    """One SPARQL result binding -> the entry shape of main.fetch_entries()."""
+    celex = _value(b, "celex")
+    day = _parse_date(_value(b, "date"))
+    if not celex or not day:
+        return None
+    title = _value(b, "title")
+    rtype = _value(b, "type").rsplit("/", 1)[-1]
+    subjects = sorted({s.strip() for s in _value(b, "subjects").split("|") if s.strip()})
+    summary = " · ".join(x for x in (rtype, f"CELEX {celex}", ", ".join(subjects)) if x)
+    return {
+        "title": title, "summary": summary, "link": EURLEX_LINK.format(celex=celex),
+        "published_utc": dt.datetime(day.year, day.month, day.day, tzinfo=dt.timezone.utc),
+        "source": source, "text": f"{title} {summary}",
+        "celex": celex, "resource_type": rtype, "subjects": subjects,
+    }
+
+class CellarSource:
+    def __init__(self, settings: dict, path: pathlib.Path):
+        self.settings = settings
+        self.path = path
+        self.state: dict = {}
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/sparql-results+json",
+            "User-Agent": "EUR-Lex-Digest/1.0",
+        })
+        self.stats = {"pages": 0, "rows": 0, "entries": 0, "seconds": 0.0}
+        self._pending = None  # (since, entries) of the last fetch
+
+    @classmethod
+    def load(cls, cfg: dict, rel_path: str = STATE_PATH, root: pathlib.Path = ROOT) -> "CellarSource":
+        src = cls(load_settings(cfg), root / rel_path)
+        try:
+            with open(src.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                src.state = data
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            print(f"[sparql] ignoring unreadable {src.path}: {ex}")
+        return src
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings.get("enabled"))
+
+    def replaces(self, feed_url: str) -> bool:
+        """True for feeds the bulk query makes redundant (only while enabled)."""
+        return self.enabled and any(feed_url.startswith(p) for p in self.settings.get("replaces_feeds") or [])
+
+    def since(self, today: "dt.date | None" = None) -> dt.date:
+        wm = _parse_date(self.state.get("watermark") or "")
+        if wm:
+            return wm - dt.timedelta(days=int(self.settings["overlap_days"]))
+        today = today or dt.datetime.now(dt.timezone.utc).date()
+        return today - dt.timedelta(days=int(self.settings["initial_lookback_days"]))
+
+    def query_page(self, since: dt.date, offset: int) -> list:
+        r = self.session.post(self.settings["endpoint"], data={"query": build_query(self.settings, since, offset)},
+                              timeout=self.settings["timeout"])
+        r.raise_for_status()
+        return ((r.json().get("results") or {}).get("bindings")) or []
+
+    def fetch_entries(self) -> list:
+        """All acts from the watermark minus the overlap, oldest first; raises on endpoint errors (state untouched)."""
+        t0 = time.perf_counter()
+        since = self.since()
+        size = int(self.settings["page_size"])
+        out, seen = [], set()
+        for page in range(int(self.settings["max_pages"])):
+            rows = self.query_page(since, page * size)
+            self.stats["pages"] += 1
+            self.stats["rows"] += len(rows)
+            for b in rows:
+                e = row_to_entry(b, self.settings["endpoint"])
+                if not e or e["celex"] in seen:
+                    continue  # an act with two English titles comes back twice
+                seen.add(e["celex"])
+                out.append(e)
+            if len(rows) < size:
+                break
+        else:
+            print(f"[sparql] stopped after max_pages={self.settings['max_pages']}; the rest follows next run")
+        self.stats["entries"] = len(out)
+        self.stats["seconds"] = round(time.perf_counter() - t0, 2)
+        self._pending = (since, out)
+        return out
+
+    def advance(self) -> None:
+        """Move the watermark to the newest act returned by the last fetch_entries()."""
+        if self._pending is None:
+            return
+        since, entries = self._pending
+        old = _parse_date(self.state.get("watermark") or "")
+        newest = max([e["published_utc"].date() for e in entries] + [old or since])
+        self.state = {
+            "watermark": newest.isoformat(),
+            "last_run": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['entries']} act(s) from {s['rows']} row(s) in {s['pages']} page(s), "
+                f"{s['seconds']}s; watermark {self.state.get('watermark', '-')}")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -40,6 +40,68 @@ async function jget(path){
   if(!r.ok) throw new Error('Fetch '+path);
   return r.json();
 }
+// Paged site data (scripts/site_shards.py): the small index is fetched fresh, the
+// content-hashed pages use normal HTTP caching. Falls back to the single legacy file.
+async function jshards(dir, name){
+  let idx;
+  try { idx = await jget(`${dir}/${name}.index.json`); }
+  catch { const items = await jget(`${dir}/${name}.json`); return { first: items, all: Promise.resolve(items) }; }
+  const pages = idx.pages || [];
+  const page = p => fetch(`${dir}/${p.file}`).then(r => { if(!r.ok) throw new Error('Fetch '+p.file); return r.json(); });
+  const first = pages.length ? await page(pages[0]) : [];
+  const all = Promise.all(pages.slice(1).map(page)).then(rest => first.concat(...rest));
+  return { first, all };
+}
+
+// Prebuilt search index (scripts/search_index.py), fetched on the first search.
+// Items the index doesn't know (live feeds, newer posts) fall back to substring match.
+let SEARCH = null, searchLoading = null, searchMemo = { q: null, hits: null };
+const fold = s => (s||'').toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '');
+// Tokens the index can match: search_index.py drops stopwords and short tokens
+const qTokens = q => (fold(q).match(/[\p{L}\p{N}]+/gu) || [])
+  .filter(t => t.length >= (SEARCH.min_token || 1) && !SEARCH.stopwords.has(t));
+
+function loadSearchIndex(){
+  if(!searchLoading){
+    searchLoading = jget('./data/search-index.json')
+      .then(idx => {
+        SEARCH = { ...idx, known: new Set(idx.ids), stopwords: new Set(idx.stopwords || []), decoded: new Map() };
+        searchMemo = { q: null, hits: null };
+        renderAll();
+      })
+      .catch(e => console.warn('[search] index unavailable, using full scan:', e));
+  }
+  return searchLoading;
+}
+
+function termDocs(i){
+  let docs = SEARCH.decoded.get(i);
+  if(!docs){
+    let n = 0; docs = SEARCH.postings[i].map(d => (n += d));
+    SEARCH.decoded.set(i, docs);
+  }
+  return docs;
+}
+
+// Ids of docs matching every query token as a prefix, or null if the index isn't loaded
+// or the query has no indexable token (the caller then falls back to substring match)
+function searchHits(q){
+  if(!SEARCH) return null;
+  if(searchMemo.q === q) return searchMemo.hits;
+  const { terms, ids } = SEARCH;
+  let hits = null;
+  for(const tok of qTokens(q)){
+    let lo = 0, hi = terms.length;
+    while(lo < hi){ const mid = (lo + hi) >> 1; if(terms[mid] < tok) lo = mid + 1; else hi = mid; }
+    const docs = new Set();
+    for(let i = lo; i < terms.length && terms[i].startsWith(tok); i++) termDocs(i).forEach(d => docs.add(ids[d]));
+    hits = hits ? new Set([...hits].filter(id => docs.has(id))) : docs;
+    if(!hits.size) break;
+  }
+  searchMemo = { q, hits };
+  return hits;
+}
+
 function notice(msg){ els.notice && (els.notice.textContent = msg, els.notice.hidden = !msg); }
 
 // Initialize settings
@@ -66,17 +128,28 @@ async function loadData(){
       // Don't load static reports when using live feeds - they contain old data
       reports = [];
     } else {
-      // Fall back to static JSON files
+      // Fall back to static JSON files (first page renders, the rest follows)
       const [staticPosts, staticReports, staticAudio] = await Promise.all([
-        jget('./data/posts.json'),
-        jget('./data/reports.json'),
+        jshards('./data', 'posts'),
+        jshards('./data', 'reports'),
         jget('./data/audio.json').catch(() => ({ google_drive: "", items: [] })),
       ]);
-      posts = staticPosts || [];
-      reports = staticReports || [];
+      posts = staticPosts.first || [];
+      reports = staticReports.first || [];
       audio = staticAudio || { google_drive: "", items: [] };
+      Promise.all([staticPosts.all, staticReports.all])
+        .then(([allPosts, allReports]) => {
+          if (allPosts.length > posts.length || allReports.length > reports.length) applyData(allPosts, allReports, audio);
+        })
+        .catch(e => console.warn('[data] remaining pages failed:', e));
     }
     
+    applyData(posts, reports, audio);
+  }catch(e){ console.error(e); notice('Could not load data: '+e.message); }
+}
+
+function applyData(posts, reports, audio){
+  try{
     POSTS = posts;
     REPORTS = reports;
     AUDIO = audio;
@@ -161,7 +234,7 @@ async function loadData(){
     els.fltTypePosts && (els.fltTypePosts.onchange = ()=>{ typePosts=els.fltTypePosts.checked; renderAll(); });
     els.fltTypeReports && (els.fltTypeReports.onchange = ()=>{ typeReports=els.fltTypeReports.checked; renderAll(); });
     document.querySelectorAll('input[name="datewin"]').forEach(r=> r.onchange = ()=>{ dateWindowDays = Number(r.value); renderAll(); });
-    els.q && (els.q.oninput = ()=>{ renderAll(); debounceAsk(); });
+    els.q && (els.q.oninput = ()=>{ if(!isLiveFetchEnabled()) loadSearchIndex(); renderAll(); debounceAsk(); });
     els.askAi && (els.askAi.onchange = ()=> maybeAsk());
     els.refreshBtn && (els.refreshBtn.onclick = ()=>{ caches && caches.keys().then(keys=>keys.forEach(k=>caches.delete(k))); loadData(); });
     els.clearBtn && (els.clearBtn.onclick = ()=>{ selectedTags.clear(); selectedSources.clear(); selectedCats.clear(); els.q && (els.q.value=''); const r=document.querySelector('input[name="datewin"][value="0"]'); if(r) r.checked=true; dateWindowDays=0; renderAll(); });
@@ -202,6 +275,8 @@ function passes(item, isReport=false){
   // Text search
   const q = (els.q && els.q.value || '').trim().toLowerCase();
   if(q){
+    const hits = searchHits(q);
+    if(hits && item.id && SEARCH.known.has(item.id)) return hits.has(item.id);
     const hay=(item.title+' '+(item.summary||item.abstract||'')+' '+(item.tags||[]).join(' ')).toLowerCase();
     if(!hay.includes(q)) return false;
   }
@@ -10,6 +10,17 @@ const PAGE_SIZE=30;
 const esc=s=>(s||'').replace(/[&<>"']/g,c=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;','\'':'&#39;'}[c]));
 const fmt=d=>new Date(d).toISOString().slice(0,10);
 async function jget(p){ const r=await fetch(p+'?v='+Date.now(),{cache:'no-store'}); if(!r.ok) throw new Error('Fetch '+p); return r.json(); }
+// Paged site data (scripts/site_shards.py); falls back to the single legacy file
+async function jshards(dir, name){
+  let idx;
+  try { idx = await jget(`${dir}/${name}.index.json`); }
+  catch { const items = await jget(`${dir}/${name}.json`); return { first: items, all: Promise.resolve(items) }; }
+  const pages = idx.pages || [];
+  const page = p => fetch(`${dir}/${p.file}`).then(r => { if(!r.ok) throw new Error('Fetch '+p.file); return r.json(); });
+  const first = pages.length ? await page(pages[0]) : [];
+  const all = Promise.all(pages.slice(1).map(page)).then(rest => first.concat(...rest));
+  return { first, all };
+}
 
 function setFiltersForChat(){ window.FeedFilters={selectedTags,selectedSources,selectedCats,dateWindowDays}; }
 
@@ -91,10 +102,12 @@ function renderPage(){
 async function init(){
   try{
     const [posts,audio] = await Promise.all([
-      jget('./data/posts.json'),
+      jshards('./data','posts'),
       jget('./data/audio.json').catch(()=>({google_drive:"",items:[]}))
     ]);
-    POSTS=posts||[]; AUDIO=audio||{google_drive:"",items:[]};
+    POSTS=posts.first||[]; AUDIO=audio||{google_drive:"",items:[]};
+    posts.all.then(all=>{ if(all.length>POSTS.length){ POSTS=all; buildPills(); resetRender(); } })
+      .catch(e=>console.warn('[data] remaining pages failed:', e));
     $('lastSynced').textContent = new Date().toLocaleString();
     buildPills();
     renderResources();
@@ -1,4 +1,4 @@
-const CACHE_STATIC = 'eurlex-site-v7';
+const CACHE_STATIC = 'eurlex-site-v8';
 const STATIC_ASSETS = [
   './', './index.html', './live.html', './settings.html',
   './assets/ui.css', './assets/theme.js', './assets/app.js', './assets/live.js', 
@@ -29,8 +29,16 @@ self.addEventListener('activate', e => {
 self.addEventListener('fetch', e => {
   const url = new URL(e.request.url);
   
-  // Data files: network first, fallback to cache
-  if (url.pathname.includes('/data/')) {
+  // Content-hashed data pages never change: cache first
+  if (url.pathname.includes('/shards/')) {
+    e.respondWith(
+      caches.match(e.request).then(hit => hit || fetch(e.request).then(r => {
+        if (r.ok) { const clone = r.clone(); caches.open(CACHE_STATIC).then(c => c.put(e.request, clone)); }
+        return r;
+      }))
+    );
+  } else if (url.pathname.includes('/data/')) {
+    // Data files: network first, fallback to cache
     e.respondWith(
       fetch(e.request)
         .then(r => {
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive polling for RSS/Atom feeds.
+
+Each feed's typical gap between entries is learned from the publish times of
+the entries we have seen, and the feed is next polled after half that gap:
+
+  next_due = last_checked + clamp(median_gap / 2, min_interval, max_staleness)
+
+so OJ L/C (several entries a day) stay on every run while ECB procurements or
+Council working-party feeds (a few a month) are only fetched every day or two.
+`max_staleness_hours` is a hard ceiling: no feed goes unchecked longer than that.
+Fetches are conditional (ETag / Last-Modified), so a due-but-unchanged feed
+costs a 304.
+
+State lives in one JSON file per consumer, because "new" is relative to who
+consumed the entries:
+  state/feed_schedule.json        main.py (daily digest)
+  state/feed_schedule_posts.json  scripts/fetch_feeds.py + scripts/build_site_data.py
+                                  (both feed the same rolling posts store)
+
+  url -> {etag, modified, last_checked, last_new, interval_s, next_due,
+          times: [entry publish epochs, newest last], ids: [entry fingerprints],
+          entries: [the consumer's rows from the last full response (remember())]}
+
+A feed that is skipped (not due) or answers 304 yields no entries, so a
+consumer that re-ranks a feed's whole window each run (main.py) keeps the rows
+of the last full response with remember() and reads them back with cached().
+
+Settings: `polling:` in config.yaml. FEED_POLL_ALL=1 ignores the schedule for
+one run (conditional requests still apply).
+"""
+
+import os, json, time, hashlib, pathlib, statistics, calendar
+import datetime as dt
+
+import yaml
+
+ROOT = pathlib.Path(__file__).resolve().parent
+DEFAULTS = {
+    "enabled": True,
+    "min_interval_minutes": 30,
+    "max_staleness_hours": 48,
+    "history": 20,        # publish times kept per feed for the gap estimate
+}
+MAX_IDS = 300             # entry fingerprints kept per feed to tell new from known
+MAX_CACHED = 100          # rows kept per feed by remember()
+
+def load_settings(root: pathlib.Path = ROOT) -> dict:
+    try:
+        with open(root / "config.yaml", "r", encoding="utf-8") as f:
+            cfg = (yaml.safe_load(f) or {}).get("polling") or {}
+    except Exception:
+        cfg = {}
+    return {**DEFAULTS, **cfg}
+
+def _iso(ts: float) -> str:
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _epoch(s: str) -> float:
+    try:
+        return dt.datetime.fromisoformat((s or "").replace("Z", "+00:00")).timestamp()
+    except Exception:
+        return 0.0
+
+def entry_fingerprint(e) -> str:
+    key = e.get("id") or e.get("link") or e.get("title") or ""
+    return hashlib.sha1(key.encode("utf-8", "ignore")).hexdigest()[:12]
+
+def entry_time(e, default: float) -> float:
+    for k in ("published_parsed", "updated_parsed", "created_parsed"):
+        t = e.get(k)
+        if t:
+            try:
+                return float(calendar.timegm(t))
+            except Exception:
+                pass
+    return default
+
+class FeedSchedule:
+    def __init__(self, path: pathlib.Path, settings: dict):
+        self.path = path
+        self.settings = settings
+        self.feeds: dict[str, dict] = {}
+        self.poll_all = os.getenv("FEED_POLL_ALL", "").lower() in ("1", "true", "yes") or not settings["enabled"]
+        self.stats = {"due": 0, "skipped": 0, "not_modified": 0, "new_entries": 0}
+
+    @classmethod
+    def load(cls, rel_path: str = "state/feed_schedule.json", root: pathlib.Path = ROOT) -> "FeedSchedule":
+        sched = cls(root / rel_path, load_settings(root))
+        try:
+            with open(sched.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                sched.feeds = {u: v for u, v in data.items() if isinstance(v, dict)}
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            print(f"[poll] ignoring unreadable {sched.path}: {ex}")
+        return sched
+
+    def due(self, url: str, now: float | None = None) -> bool:
+        if now is None:
+            now = time.time()
+        st = self.feeds.get(url)
+        is_due = self.poll_all or not st or _epoch(st.get("next_due")) <= now
+        self.stats["due" if is_due else "skipped"] += 1
+        return is_due
+
+    def conditional(self, url: str) -> dict:
+        """Keyword arguments for feedparser.parse (etag / modified from the last 200)."""
+        st = self.feeds.get(url) or {}
+        kw = {}
+        if st.get("etag"):
+            kw["etag"] = st["etag"]
+        if st.get("modified"):
+            kw["modified"] = st["modified"]
+        return kw
+
+    def interval(self, times: list) -> float | None:
+        gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+        return statistics.median(gaps) if len(gaps) >= 2 else None
+
+    def observe(self, url: str, parsed, now: float | None = None) -> int:
+        """Record the outcome of a fetch; returns the number of entries not seen before."""
+        if now is None:
+            now = time.time()
+        status = parsed.get("status")
+        if status is None and not parsed.get("entries"):
+            return 0  # network/parse failure: keep the old schedule, retry next run
+        st = self.feeds.setdefault(url, {"times": [], "ids": []})
+        st["last_checked"] = _iso(now)
+        if parsed.get("etag"):
+            st["etag"] = parsed.get("etag")
+        if parsed.get("modified"):
+            st["modified"] = parsed.get("modified")
+
+        new = 0
+        if status == 304:
+            self.stats["not_modified"] += 1
+        else:
+            known = set(st.get("ids") or [])
+            fresh_ids, fresh_times = [], []
+            for e in parsed.get("entries") or []:
+                fp = entry_fingerprint(e)
+                if fp in known:
+                    continue
+                known.add(fp)
+                fresh_ids.append(fp)
+                fresh_times.append(entry_time(e, now))
+            new = len(fresh_ids)
+            if new:
+                st["last_new"] = _iso(now)
+                st["ids"] = (fresh_ids + list(st.get("ids") or []))[:MAX_IDS]
+                times = sorted(set(st.get("times") or []) | set(fresh_times))
+                st["times"] = times[-int(self.settings["history"]):]
+        self.stats["new_entries"] += new
+
+        lo = float(self.settings["min_interval_minutes"]) * 60
+        hi = float(self.settings["max_staleness_hours"]) * 3600
+        gap = self.interval(st.get("times") or [])
+        wait = lo if gap is None else min(hi, max(lo, gap / 2))
+        st["interval_s"] = int(gap) if gap else None
+        st["next_due"] = _iso(now + wait)
+        return new
+
+    def remember(self, url: str, rows: list) -> None:
+        """Keep the (JSON-serialisable) rows a consumer built from the last full response."""
+        if url in self.feeds:
+            self.feeds[url]["entries"] = list(rows)[:MAX_CACHED]
+
+    def cached(self, url: str) -> list:
+        return list((self.feeds.get(url) or {}).get("entries") or [])
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"{s['due']} due, {s['skipped']} skipped (not due), "
+                f"{s['not_modified']} unchanged (304), {s['new_entries']} new entries")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.feeds, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
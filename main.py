@@ -8,6 +8,11 @@ New in this build:
 - ranking.prefer_recent: stable sort favors newer items on ties
 - ranking.recent_hours_bonus: window that adds +1 score for recency
 - dedupe.enabled + dedupe.path: remember seen links across days
+- polling: feeds are only fetched when due (feed_schedule.py), conditionally via ETag/Last-Modified
+- sparql.enabled: EUR-Lex acts come from one paged Cellar SPARQL query since a watermark
+  (cellar_sparql.py) instead of the overlapping EUR-Lex RSS feeds
+- near_dupes.enabled: syndicated copies of the same story are clustered (MinHash + LSH,
+  near_dupes.py) before summarisation; one item is summarised, the others become alternate links
 """
 
 import os, sys, json, yaml, feedparser, datetime as dt, re
@@ -16,6 +21,10 @@ from email.mime.text import MIMEText
 import smtplib
 from io import BytesIO
 
+from feed_schedule import FeedSchedule
+from cellar_sparql import CellarSource
+import near_dupes
+
 # ---------- optional tz ----------
 try:
     import pytz
@@ -111,27 +120,47 @@ def llm_choose_category(text: str, labels: List[str]) -> str:
         print("[openai] category error:", e)
         return "Other"
 
-def fetch_entries(url: str) -> List[Dict[str, Any]]:
-    p = feedparser.parse(url)
-    out = []
+def feed_rows(p) -> List[Dict[str, Any]]:
+    """The fields of a parsed feed main.py uses, JSON-serialisable so FeedSchedule can keep them."""
+    rows = []
     for e in p.entries:
-        title = e.get("title","") or ""
-        summary = e.get("summary","") or e.get("description","") or ""
-        link = e.get("link","") or ""
         published = None
         if getattr(e, "published_parsed", None):
             try:
-                t = e.published_parsed
-                published = dt.datetime(*t[:6], tzinfo=dt.timezone.utc)
+                published = dt.datetime(*e.published_parsed[:6], tzinfo=dt.timezone.utc).isoformat()
             except Exception:
                 pass
+        rows.append({
+            "title": e.get("title","") or "",
+            "summary": e.get("summary","") or e.get("description","") or "",
+            "link": e.get("link","") or "",
+            "published": published,
+        })
+    return rows
+
+def entries_from_rows(rows: List[Dict[str, Any]], url: str) -> List[Dict[str, Any]]:
+    out = []
+    for r in rows:
+        published = dt.datetime.fromisoformat(r["published"]) if r.get("published") else None
         out.append({
-            "title": title, "summary": summary, "link": link,
+            "title": r["title"], "summary": r["summary"], "link": r["link"],
             "published_utc": published, "source": url,
-            "text": f"{title} {summary}"
+            "text": f"{r['title']} {r['summary']}"
         })
     return out
 
+def fetch_entries(url: str, schedule: "FeedSchedule | None" = None) -> List[Dict[str, Any]]:
+    p = feedparser.parse(url, **(schedule.conditional(url) if schedule else {}))
+    if not schedule:
+        return entries_from_rows(feed_rows(p), url)
+    schedule.observe(url, p)
+    if p.get("status") == 304 or (p.get("status") is None and not p.entries):
+        # unchanged (or failed): the last full response's entries still compete
+        return entries_from_rows(schedule.cached(url), url)
+    rows = feed_rows(p)
+    schedule.remember(url, rows)
+    return entries_from_rows(rows, url)
+
 # ---------------- Ranking controls ----------------
 
 def within_max_age(d: dt.datetime|None, max_days: int) -> bool:
@@ -146,8 +175,8 @@ def score_entry(ent: Dict[str,Any], kws: List[str], recent_hours_bonus: int) ->
         delta = dt.datetime.now(dt.timezone.utc) - ent["published_utc"]
         if delta.total_seconds() <= recent_hours_bonus*3600:
             s += 1.0
-    if "uri=OJ:L" in (ent.get("source") or ""):
-        s += 0.2
+    if "uri=OJ:L" in (ent.get("source") or "") or str(ent.get("celex") or "").startswith("3"):
+        s += 0.2  # OJ L series / CELEX sector 3 (legislation)
     return s
 
 # ---------------- De-dup store ----------------
@@ -230,6 +259,9 @@ def md_to_html(title_h1: str, exec_bullets: List[str], exec_paragraph: str,
         for it in items:
             html.append(f"<p><strong>[{it['id']}] <a href='{esc(it['link'])}'>{esc(it['title'])}</a></strong></p>")
             html.append(_bullets_to_html(it.get("summary","")))
+            if it.get("alternates"):
+                alts = ", ".join(f"<a href='{esc(a['link'])}'>{esc(a['source'] or a['title'])}</a>" for a in it["alternates"])
+                html.append(f"<p><em>Also: {alts}</em></p>")
     html.append(f"<p><em>Generated by GitHub Actions with OpenAI (model: {esc(DEFAULT_MODEL)}).</em></p>")
     html.append("</body></html>")
     return "".join(html)
@@ -326,24 +358,40 @@ def main():
     subject = f"EUR-Lex Digest — {date_str}"
     doc_title = f"EUR-Lex Daily Digest — {date_str}"
 
-    if not feeds:
+    cellar = CellarSource.load(cfg)
+    feeds = [u for u in feeds if not cellar.replaces(u)]
+    if not feeds and not cellar.enabled:
         print("[digest] No feeds configured; exiting.")
         sys.exit(0)
 
-    # Fetch → filter by age → score
+    # Fetch (EUR-Lex via SPARQL if enabled, feeds that are due) → filter by age → score
+    schedule = FeedSchedule.load("state/feed_schedule.json")
     raw_count = 0
     pool: List[Dict[str,Any]] = []
+
+    def admit(items: List[Dict[str,Any]]) -> None:
+        nonlocal raw_count
+        raw_count += len(items)
+        for e in items:
+            if not within_max_age(e.get("published_utc"), max_age_days):
+                continue
+            e["score"] = score_entry(e, keywords, recent_hours_bonus)
+            if e["score"] < min_score_required:
+                continue
+            pool.append(e)
+
+    if cellar.enabled:
+        try:
+            admit(cellar.fetch_entries())
+            print(f"[sparql] {cellar.summary()}")
+        except Exception as ex:
+            print("[sparql] error", cellar.settings["endpoint"], ex)
     for u in feeds:
+        if not schedule.due(u):
+            admit(entries_from_rows(schedule.cached(u), u))  # not polled this run
+            continue
         try:
-            items = fetch_entries(u)
-            raw_count += len(items)
-            for e in items:
-                if not within_max_age(e.get("published_utc"), max_age_days):
-                    continue
-                e["score"] = score_entry(e, keywords, recent_hours_bonus)
-                if e["score"] < min_score_required:
-                    continue
-                pool.append(e)
+            admit(fetch_entries(u, schedule))
         except Exception as ex:
             print("[fetch] error", u, ex)
 
@@ -362,6 +410,13 @@ def main():
 
     pool.sort(key=sort_key)
 
+    # Fold near-duplicates into the best-ranked copy so each story is summarised once
+    before = len(pool)
+    pool = near_dupes.collapse(pool, near_dupes.load_settings(cfg))
+    if len(pool) < before:
+        print(f"[dedupe] {before - len(pool)} near-duplicate(s) attached as alternates "
+              f"to {sum(1 for e in pool if e.get('alternates'))} item(s)")
+
     # Summarize shortlisted (limit work)
     shortlist = pool[: max_total*2]
     for it in shortlist:
@@ -409,8 +464,13 @@ def main():
     # Record as seen
     if dedupe_enabled:
         for it in selected:
-            if it.get("link"): seen.add(it["link"])
+            seen.update(near_dupes.alternate_links(it))
         save_seen(seen_path, seen)
+    schedule.save()
+    print(f"[poll] {schedule.summary()}")
+    if cellar.enabled:
+        cellar.advance()
+        cellar.save()
 
     # Group by category
     by_cat: Dict[str,List[Dict[str,Any]]] = {c["name"]:[] for c in cats_cfg}
@@ -456,6 +516,8 @@ def main():
         md += [f"### {name}",""]
         for it in items:
             md += [f"**[{it['id']}] [{it['title']}]({it['link']})**","", it["summary"], ""]
+            if it.get("alternates"):
+                md += ["_Also: " + ", ".join(f"[{a['source'] or a['title']}]({a['link']})" for a in it["alternates"]) + "_", ""]
     md += ["---", f"_Generated by GitHub Actions with OpenAI (model: {DEFAULT_MODEL})._"]
     md_text = "\n".join(md)
     report_path = os.path.join(reports_dir, f"{date_str}.md")
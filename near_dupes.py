@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Near-duplicate clustering of feed entries before summarisation.
+
+The same announcement arrives as an EIB press release, an EIF news item and an
+InvestEU story, and the same act shows up in several EUR-Lex saved searches.
+Exact (title, link) de-dup misses those, so each copy was summarised and shown.
+
+Each entry's title + summary (HTML stripped, lower-cased, whitespace collapsed)
+is cut into character shingles and reduced to a MinHash signature of
+`num_perm` values. The signature is split into `bands` bands; entries sharing a
+band bucket are candidates, confirmed when their estimated Jaccard similarity
+reaches `threshold`, and joined with union-find. One pass over the entries plus
+the (few) candidate pairs, instead of comparing every pair.
+
+collapse() keeps the first entry of each cluster in the caller's order (sort
+before calling, so that is the best-ranked copy) and attaches the others as
+`alternates` [{title, link, source}]; only representatives are summarised.
+
+Settings: `near_dupes:` in config.yaml.
+"""
+
+import re, html, zlib
+from urllib.parse import urlparse
+
+import numpy as np
+
+DEFAULTS = {
+    "enabled": True,
+    "threshold": 0.7,     # estimated Jaccard of the shingle sets; templated-but-different releases sit near 0.6
+    "shingle_chars": 5,
+    "num_perm": 128,
+    "bands": 32,          # 32 bands x 4 rows: pairs at 0.7 Jaccard share a bucket with p > 0.99
+    "max_chars": 2000,    # of title + summary considered per entry
+}
+SEED = 20250901
+
+TAG_RE = re.compile(r"<[^>]+>")
+URL_RE = re.compile(r"https?://\S+")
+SPACE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+def load_settings(cfg: dict) -> dict:
+    return {**DEFAULTS, **(cfg.get("near_dupes") or {})}
+
+def normalise(text: str) -> str:
+    text = URL_RE.sub(" ", TAG_RE.sub(" ", html.unescape(text or "")))
+    return SPACE_RE.sub(" ", text.lower()).strip()
+
+def entry_text(e: dict) -> str:
+    return f"{e.get('title') or ''} {e.get('summary') or ''}"
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_chars: int = 5, seed: int = SEED):
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing: (a*h + b) mod 2^64, top 32 bits; a odd
+        self.a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self.k = shingle_chars
+
+    def shingles(self, text: str) -> np.ndarray:
+        k = self.k
+        grams = {text[i:i + k] for i in range(max(1, len(text) - k + 1))} if text else set()
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        h = self.shingles(text)
+        if not len(h):
+            return np.full(len(self.a), np.iinfo(np.uint32).max, dtype=np.uint32)
+        with np.errstate(over="ignore"):  # wrap-around is the mod 2^64
+            return ((self.a[:, None] * h[None, :] + self.b[:, None]) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+def cluster(texts: list, threshold: float = 0.7, num_perm: int = 128, bands: int = 32,
+            shingle_chars: int = 5) -> list:
+    """Groups of indices into `texts` (each index in exactly one group, groups in first-index order)."""
+    hasher = MinHasher(num_perm, shingle_chars)
+    rows = max(1, num_perm // bands)
+    sigs = [hasher.signature(t) if t else None for t in texts]
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: dict = {}
+    checked = set()
+    for i, sig in enumerate(sigs):
+        if sig is None:
+            continue  # nothing to compare on
+        for band in range(bands):
+            key = (band, sig[band * rows:(band + 1) * rows].tobytes())
+            for j in buckets.setdefault(key, []):
+                if (j, i) in checked or find(i) == find(j):
+                    continue
+                checked.add((j, i))
+                if float(np.mean(sigs[j] == sig)) >= threshold:
+                    parent[find(i)] = find(j)
+            buckets[key].append(i)
+
+    groups: dict = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+def source_label(e: dict) -> str:
+    return urlparse(e.get("link") or "").netloc.replace("www.", "") or (e.get("source") or "")
+
+def collapse(entries: list, settings: "dict | None" = None) -> list:
+    """Representatives of each near-duplicate cluster, in input order, with `alternates` attached."""
+    s = {**DEFAULTS, **(settings or {})}
+    if not s.get("enabled") or len(entries) < 2:
+        return list(entries)
+    texts = [normalise(entry_text(e))[: int(s["max_chars"])] for e in entries]
+    out = []
+    for group in cluster(texts, float(s["threshold"]), int(s["num_perm"]), int(s["bands"]), int(s["shingle_chars"])):
+        rep = entries[group[0]]
+        alts = [entries[i] for i in group[1:]]
+        if alts:
+            known = {rep.get("link")} | {a.get("link") for a in rep.get("alternates") or []}
+            rep["alternates"] = list(rep.get("alternates") or []) + [
+                {"title": a.get("title") or "", "link": a.get("link") or "", "source": source_label(a)}
+                for a in alts if a.get("link") not in known]
+        out.append(rep)
+    return out
+
+def alternate_links(e: dict) -> list:
+    """Links of an entry and its alternates (e.g. to mark all of them as seen)."""
+    return [x for x in [e.get("link")] + [a.get("link") for a in e.get("alternates") or []] if x]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent index of the MP3 readouts we publish (state/audio_manifest.json).
+
+weekly_main.py registers every MP3 it writes; build_site_data.scan_audio only
+reads this file, so the site build never walks the repository tree.
+
+  "reports/weekly/2025-09-01-weekly.mp3" -> {path, title, date, size,
+                                              duration_s, bitrate_kbps,
+                                              drive_link, registered_at}
+
+Maintenance:
+  python scripts/audio_manifest.py verify    # drop missing files, re-probe changed ones
+  python scripts/audio_manifest.py rebuild   # one-off tree walk to (re)discover MP3s
+"""
+
+import re, sys, argparse, pathlib, datetime as dt
+
+from state_io import load_json, write_json_atomic
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+MANIFEST_PATH = "state/audio_manifest.json"
+SKIP_DIRS = (".git", "node_modules", ".venv", "venv", "dist", "build", "tmp_audio")
+
+# --- MP3 header probing (Layer III only; enough for TTS output) ---
+_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],   # MPEG-1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],       # MPEG-2/2.5
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def _id3_size(head: bytes) -> int:
+    if head[:3] != b"ID3" or len(head) < 10:
+        return 0
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    return 10 + size + (10 if head[5] & 0x10 else 0)
+
+def probe_mp3(path: pathlib.Path) -> dict:
+    """Bitrate and duration from the first frame header (Xing/Info frame count when present)."""
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        head = f.read(10)
+        start = _id3_size(head)
+        f.seek(start)
+        buf = f.read(64 * 1024)
+    for i in range(len(buf) - 4):
+        if buf[i] != 0xFF or (buf[i + 1] & 0xE0) != 0xE0:
+            continue
+        version = (buf[i + 1] >> 3) & 0x3          # 3=MPEG1, 2=MPEG2, 0=MPEG2.5
+        layer = (buf[i + 1] >> 1) & 0x3            # 1=Layer III
+        br_idx = (buf[i + 2] >> 4) & 0xF
+        sr_idx = (buf[i + 2] >> 2) & 0x3
+        if version == 1 or layer != 1 or br_idx in (0, 15) or sr_idx == 3:
+            continue
+        bitrate = _BITRATES[1 if version == 3 else 2][br_idx]
+        sample_rate = _SAMPLE_RATES[version][sr_idx]
+        mono = ((buf[i + 3] >> 6) & 0x3) == 3
+        samples = 1152 if version == 3 else 576
+        side = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+        tag = buf[i + 4 + side:i + 4 + side + 12]
+        duration = 0.0
+        if tag[:4] in (b"Xing", b"Info") and int.from_bytes(tag[4:8], "big") & 0x1:
+            frames = int.from_bytes(tag[8:12], "big")
+            duration = frames * samples / sample_rate
+            if duration:
+                bitrate = round((size - start - i) * 8 / duration / 1000)
+        if not duration:
+            duration = (size - start - i) * 8 / (bitrate * 1000)
+        return {"bitrate_kbps": bitrate, "duration_s": round(duration, 1)}
+    return {"bitrate_kbps": 0, "duration_s": 0.0}
+
+# --- Manifest ---
+def date_from_path(rel: str) -> str:
+    m = re.search(r'(\d{4})[-_](\d{2})[-_](\d{2})', rel)
+    return f"{m.group(1)}-{m.group(2)}-{m.group(3)}" if m else ""
+
+def title_from_path(path: pathlib.Path) -> str:
+    return path.stem.replace("_", " ").replace("-", " ").strip()
+
+def load(root: pathlib.Path = ROOT) -> dict:
+    data = load_json(root / MANIFEST_PATH, {})
+    return data if isinstance(data, dict) else {}
+
+def save(entries: dict, root: pathlib.Path = ROOT):
+    write_json_atomic(root / MANIFEST_PATH, entries, indent=2)
+
+def describe(path: pathlib.Path, root: pathlib.Path = ROOT, prev: dict | None = None, **fields) -> dict:
+    rel = path.resolve().relative_to(root.resolve()).as_posix()
+    prev = prev or {}
+    try:
+        probe = probe_mp3(path)
+    except Exception as ex:
+        print(f"[audio] probe failed for {rel}: {ex}")
+        probe = {"bitrate_kbps": 0, "duration_s": 0.0}
+    entry = {
+        "path": rel,
+        "title": fields.get("title") or prev.get("title") or title_from_path(path),
+        "date": fields.get("date") or prev.get("date") or date_from_path(rel),
+        "size": path.stat().st_size,
+        "duration_s": fields.get("duration_s") or probe["duration_s"],
+        "bitrate_kbps": probe["bitrate_kbps"],
+        "drive_link": fields.get("drive_link") or prev.get("drive_link") or "",
+        "registered_at": prev.get("registered_at") or dt.datetime.now(dt.timezone.utc).isoformat(),
+    }
+    return entry
+
+def register(path: pathlib.Path, root: pathlib.Path = ROOT, **fields) -> dict:
+    """Add or update one MP3 (title, date, drive_link, duration_s are optional overrides)."""
+    entries = load(root)
+    rel = path.resolve().relative_to(root.resolve()).as_posix()
+    entries[rel] = describe(path, root, entries.get(rel), **fields)
+    save(entries, root)
+    return entries[rel]
+
+def verify(root: pathlib.Path = ROOT) -> dict:
+    """Drop entries whose file is gone; re-probe entries whose size changed."""
+    entries = load(root)
+    missing, changed = [], []
+    for rel, e in list(entries.items()):
+        p = root / rel
+        if not p.exists():
+            missing.append(rel); del entries[rel]
+        elif p.stat().st_size != e.get("size"):
+            changed.append(rel); entries[rel] = describe(p, root, e)
+    save(entries, root)
+    return {"entries": len(entries), "missing": missing, "changed": changed}
+
+def rebuild(root: pathlib.Path = ROOT) -> dict:
+    """Walk the tree once (maintenance only) and merge what we find with known metadata."""
+    old = load(root)
+    entries = {}
+    for f in root.rglob("*.mp3"):
+        if any(seg in f.parts for seg in SKIP_DIRS):
+            continue
+        rel = f.relative_to(root).as_posix()
+        entries[rel] = describe(f, root, old.get(rel))
+    save(entries, root)
+    return {"entries": len(entries), "added": sorted(set(entries) - set(old)),
+            "dropped": sorted(set(old) - set(entries))}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Maintain state/audio_manifest.json")
+    ap.add_argument("command", choices=["verify", "rebuild"])
+    args = ap.parse_args()
+    res = verify() if args.command == "verify" else rebuild()
+    print(f"[audio] {args.command}: {res}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark listing-page extraction in workers/weekly_discover.py:
+BeautifulSoup (discover_listing_soup) vs. the compiled lxml ExtractionPlan.
+
+  # capture real listing pages once
+  python workers/weekly_discover.py --window 7d --config config_v2.yaml --save-pages bench_pages
+  # compare both extractors on them
+  python scripts/bench_discover.py bench_pages --config config_v2.yaml
+
+Saved pages are named "<source>--<page>.html" and matched back to their source
+by name. Without a directory a synthetic 300-item listing is used.
+"""
+
+import re, sys, time, pathlib, argparse
+from datetime import datetime, timedelta, timezone
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "workers"))
+
+import weekly_discover as wd
+
+def synthetic_page(n: int = 300) -> str:
+    now = datetime.now(timezone.utc)
+    items = "".join(
+        f'<li class="item"><div class="teaser"><a href="/news/story-{i}">Story {i} on the AI Act</a>'
+        f'<p>{"Lorem ipsum dolor sit amet. " * 8}</p>'
+        f'<time datetime="{(now - timedelta(hours=i)).isoformat()}">{i}h ago</time></div></li>'
+        for i in range(n)
+    )
+    noise = "".join(f'<div class="nav"><a href="/tag/t{i}">tag {i}</a><span>x</span></div>' for i in range(n * 3))
+    return (f"<html><head><title>News</title></head><body><header>{noise}</header>"
+            f'<main><ul class="news-list">{items}</ul><a class="next" href="?page=2">next</a></main>'
+            f"<footer>{noise}</footer></body></html>")
+
+def synthetic_source() -> wd.Source:
+    return wd.Source.from_any({
+        "source_id": "synthetic", "type": "html_list", "base_url": "https://example.org/news",
+        "discover": {
+            "list_selectors": ["main article a[href]", "ul.news-list li a[href]"],
+            "date_selectors": ["time[datetime]", "span.date"],
+            "pagination": {"next_selector": "a[rel='next'], a.next", "max_pages": 2},
+            "include_url_patterns": ["news"], "exclude_url_patterns": ["/tag/"],
+        },
+    })
+
+def load_pages(pages_dir: str, sources_path: str, config_path: str):
+    by_name = {re.sub(r"[^\w.-]+", "_", s.name): s for s in wd.pick_sources(sources_path, config_path)}
+    for f in sorted(pathlib.Path(pages_dir).glob("*.html")):
+        name = f.stem.rsplit("--", 1)[0]
+        s = by_name.get(name) or wd.Source(name=name, url=f"https://{name}/")
+        yield s, f.read_text(encoding="utf-8", errors="replace")
+
+def timed(fn, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare listing extractors on saved pages")
+    ap.add_argument("pages", nargs="?", default=None, help="Directory written by weekly_discover --save-pages")
+    ap.add_argument("--sources", default=str(ROOT / "sources_v2.yaml"))
+    ap.add_argument("--config", default=str(ROOT / "config_v2.yaml"))
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if wd.CSSSelector is None:
+        print("lxml/cssselect not installed; nothing to compare")
+        return 1
+
+    pages = list(load_pages(args.pages, args.sources, args.config)) if args.pages else [(synthetic_source(), synthetic_page())]
+    total_soup = total_plan = 0.0
+    print(f"{'page':32} {'bytes':>8} {'items':>6} {'soup ms':>9} {'lxml ms':>9} {'speedup':>8}")
+    for s, text in pages:
+        plan = wd.compile_plan(s)
+        t_soup, (soup_items, _) = timed(lambda: wd.discover_listing_soup(text, s.url, s), args.repeat)
+        t_plan, (plan_items, _) = timed(lambda: plan.extract(text, s.url), args.repeat)
+        total_soup += t_soup
+        total_plan += t_plan
+        flag = "" if len(soup_items) == len(plan_items) else f"  (soup found {len(soup_items)})"
+        print(f"{s.name[:32]:32} {len(text):>8} {len(plan_items):>6} {t_soup*1000:>9.1f} {t_plan*1000:>9.1f} "
+              f"{t_soup / max(t_plan, 1e-9):>7.1f}x{flag}")
+    print(f"{'total':32} {'':>8} {'':>6} {total_soup*1000:>9.1f} {total_plan*1000:>9.1f} "
+          f"{total_soup / max(total_plan, 1e-9):>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the document.v2 detectors in workers/process_document.py: the
+compiled FeatureExtractor vs. the per-field detect_* / extract_amounts
+functions it replaced, kept below as the reference implementation.
+
+  # any directory of saved HTML pages, e.g. listing pages from discovery
+  python workers/weekly_discover.py --window 7d --config config_v2.yaml --save-pages bench_pages
+  python scripts/bench_features.py bench_pages
+
+Pages are parsed once up front; only feature extraction is timed. Without a
+directory a synthetic corpus of policy-style pages is used. Both paths must
+agree on every page; disagreements are listed.
+"""
+
+import re, sys, time, random, pathlib, argparse
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "workers"))
+
+from bs4 import BeautifulSoup
+
+import process_document as pd
+
+PHRASES = [
+    "The European Investment Bank signed a EUR 150 million framework loan", "under InvestEU",
+    "to back quantum and semiconductor start-ups", "The European Defence Fund call for proposals opens",
+    "with a guarantee facility for SMEs", "satellite navigation and GNSS services",
+    "member states agreed the position of the Council", "the report notes capital markets union progress",
+    "venture debt and equity for scale-ups", "cyber resilience and zero trust architectures",
+    "battery and hydrogen storage projects", "a grant of € 2,5 million was awarded",
+    "the single market for services", "supervisors published guidelines on reporting",
+]
+
+# ---- reference detectors: the per-field functions FeatureExtractor replaced ----
+
+def detect_doc_type(text):
+    t = text.lower()
+    if "press release" in t or "press" in t[:200]:
+        return "Press_Release"
+    if "call for proposals" in t:
+        return "Call_for_Proposals"
+    if "award" in t and "grant" in t:
+        return "Award/Grant"
+    if "guidance" in t or "guidelines" in t:
+        return "Guidance/Notice"
+    if "report" in t:
+        return "Report"
+    return "Blog/News"
+
+def detect_programme(text, base_domain):
+    labs = set()
+    t = text.lower()
+    if "investeu" in t or "invest eu" in t or "investeu" in base_domain:
+        labs.add("InvestEU")
+    if "european defence fund" in t or "edf" in t:
+        labs.add("EDF")
+    if "european investment bank" in t or "eib" in t:
+        labs.add("EIB")
+    if "european investment fund" in t or "eif" in t:
+        labs.add("EIF")
+    if "asap" in t and "support act" in t.lower():
+        labs.add("ASAP")
+    return sorted(labs) or ["Other/NA"]
+
+def detect_instrument(text):
+    t = text.lower()
+    labs = []
+    if re.search(r"\bgrant(s)?\b", t):
+        labs.append("Grant")
+    if re.search(r"\bguarantee(s)?|guarantee facility\b", t):
+        labs.append("Guarantee")
+    if re.search(r"\bequity\b|\bventure\b|\bfund of funds\b", t):
+        labs.append("Equity/Venture")
+    if re.search(r"\bloan(s)?\b|\bframework loan\b", t):
+        labs.append("Loan")
+    if re.search(r"\bprocurement\b|\btender\b", t):
+        labs.append("Procurement")
+    if re.search(r"\blisting\b|\bipo\b", t):
+        labs.append("Listing/Market")
+    return labs or (["Procurement"] if "tender" in t else [])
+
+def detect_tech(text):
+    t = text.lower()
+    labels = []
+    for k, rx in pd.TECH_MAP.items():
+        if re.search(rx, t, flags=re.IGNORECASE):
+            labels.append(k)
+    return labels
+
+def extract_amounts(text):
+    amounts = []
+    for m in re.finditer(r"(€|\bEUR\b)\s*([\d\.,\s]+)\s*(billion|bn|million|mn|m)?", text, flags=re.IGNORECASE):
+        raw = m.group(2).replace(" ", "")
+        unit = (m.group(3) or "").lower()
+        try:
+            val = float(raw.replace(".", "").replace(",", "."))
+        except Exception:
+            continue
+        if unit in ("billion", "bn"):
+            val *= 1_000_000_000
+        elif unit in ("million", "mn", "m"):
+            val *= 1_000_000
+        amounts.append({"amount": val, "currency": "EUR", "label": "stated_value"})
+    return amounts[:5]
+
+def synthetic_corpus(n: int = 200, seed: int = 7) -> list[str]:
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n):
+        paras = "".join(f"<p>{'. '.join(rnd.choice(PHRASES) for _ in range(6))}.</p>" for _ in range(rnd.randint(10, 60)))
+        pages.append(f"<html><head><title>Doc {i}</title></head><body><nav>Home · News · Contact</nav>"
+                     f"<main><h1>Doc {i}</h1>{paras}</main><footer>© EU</footer></body></html>")
+    return pages
+
+def load_pages(pages_dir: str) -> list[str]:
+    files = sorted(pathlib.Path(pages_dir).rglob("*.htm*"))
+    return [f.read_text(encoding="utf-8", errors="replace") for f in files]
+
+def baseline(text: str, page_text: str, url: str) -> dict:
+    return {
+        "doc_type": detect_doc_type(text),
+        "programme": detect_programme(text, base_domain=url),
+        "instrument": detect_instrument(text),
+        "tech": detect_tech(text),
+        "amounts": extract_amounts(page_text),
+    }
+
+def timed(fn, docs, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [fn(*d) for d in docs]
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare per-field detectors with FeatureExtractor")
+    ap.add_argument("pages", nargs="?", default=None, help="Directory of saved .html pages")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else synthetic_corpus()
+    if not pages:
+        print("no pages found")
+        return 1
+    docs = []
+    for i, html in enumerate(pages):
+        soup = BeautifulSoup(html, "lxml")
+        docs.append((pd.extract_main(soup), soup.get_text(" ", strip=True), f"https://example.org/doc/{i}"))
+    chars = sum(len(d[0]) for d in docs)
+
+    t_old, old = timed(baseline, docs, args.repeat)
+    t_new, new = timed(pd.EXTRACTOR.extract, docs, args.repeat)
+    print(f"{len(docs)} page(s), {chars / 1e6:.1f}M chars of main text")
+    print(f"{'detectors':22} {'seconds':>9} {'docs/sec':>10}")
+    print(f"{'detect_* (baseline)':22} {t_old:>9.3f} {len(docs) / max(t_old, 1e-9):>10.0f}")
+    print(f"{'FeatureExtractor':22} {t_new:>9.3f} {len(docs) / max(t_new, 1e-9):>10.0f}")
+    print(f"speedup {t_old / max(t_new, 1e-9):.1f}x")
+
+    diff = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+    for i in diff[:10]:
+        print(f"  page {i}: baseline {old[i]} != extractor {new[i]}")
+    print(f"{len(docs) - len(diff)}/{len(docs)} pages identical")
+    return 1 if diff else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
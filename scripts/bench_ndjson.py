@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark document.v2 storage formats: plain NDJSON vs. framed gzip / zstd
+(workers/ndjson_io.py), on a synthetic corpus or on existing partitions.
+
+  python scripts/bench_ndjson.py                 # 100k synthetic documents
+  python scripts/bench_ndjson.py --docs 20000 --repeat 1
+  python scripts/bench_ndjson.py outputs/docs    # the real corpus (files are copied, not touched)
+
+Reports on-disk size, conversion time and full read throughput through
+ndjson_io.iter_records() (decompress + parse), the way the site builders read.
+"""
+
+import os, sys, json, time, random, pathlib, argparse, tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "workers"))
+
+import ndjson_io
+
+WORDS = ("investment bank loan guarantee fund equity venture defence space quantum semiconductor "
+         "council parliament commission regulation directive programme framework million billion "
+         "member states capital markets union start-ups scale-ups cyber resilience hydrogen battery "
+         "satellite navigation supervisors guidelines reporting single market services grant call").split()
+SOURCES = ["eib_press", "eif_news", "investeu_news", "edf_publications", "esma_publications", "nato_news"]
+
+def synthetic_record(i: int, rnd: random.Random) -> dict:
+    day = f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+    return {
+        "schema": "document.v2", "source_id": rnd.choice(SOURCES),
+        "url": f"https://example.org/news/{i}", "canonical_url": f"https://example.org/news/{i}",
+        "title": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 14))).capitalize(),
+        "published_date": f"{day}T09:00:00+00:00", "fetch_time": f"{day}T10:00:00Z",
+        "doc_type": rnd.choice(["press_release", "news", "report", "call"]),
+        "programme": rnd.sample(["EIB", "EIF", "InvestEU", "EDF"], rnd.randint(0, 2)),
+        "finance_instrument": rnd.sample(["loan", "guarantee", "equity", "grant"], rnd.randint(0, 2)),
+        "tech_area": rnd.sample(["ai", "quantum", "space", "cyber", "semiconductors"], rnd.randint(0, 2)),
+        "monetary_values": [{"amount": rnd.randint(1, 900) * 1e6, "currency": "EUR", "label": "stated_value"}],
+        "summary_150w": " ".join(rnd.choice(WORDS) for _ in range(150)) + ".",
+        "dedupe_signature": f"{i:016x}",
+    }
+
+def write_synthetic(directory: str, docs: int, per_file: int = 2000, seed: int = 7) -> None:
+    rnd = random.Random(seed)
+    for start in range(0, docs, per_file):
+        with open(os.path.join(directory, f"2025-{start // per_file:04d}.ndjson"), "w", encoding="utf-8") as f:
+            for i in range(start, min(docs, start + per_file)):
+                f.write(json.dumps(synthetic_record(i, rnd), ensure_ascii=False) + "\n")
+
+def read_all(files, repeat: int) -> tuple:
+    best, count = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        count = sum(1 for _ in ndjson_io.iter_records(files))
+        best = min(best, time.perf_counter() - t0)
+    return best, count
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare plain, gzip and zstd NDJSON storage")
+    ap.add_argument("source", nargs="?", default=None, help="directory of existing *.ndjson[.gz|.zst] files")
+    ap.add_argument("--docs", type=int, default=100_000, help="synthetic corpus size")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_dir = os.path.join(tmp, "plain")
+        os.makedirs(plain_dir)
+        if args.source:
+            for f in ndjson_io.docs_files(args.source):
+                ndjson_io.rewrite(os.path.join(plain_dir, os.path.basename(ndjson_io.plain_path(f))), [f], None)
+        else:
+            write_synthetic(plain_dir, args.docs)
+        plain = ndjson_io.docs_files(plain_dir)
+        raw_bytes = sum(os.path.getsize(f) for f in plain)
+
+        codecs = [None, "gzip"] + (["zstd"] if ndjson_io.zstandard is not None else [])
+        print(f"{len(plain)} file(s), {raw_bytes / 1e6:.1f} MB plain NDJSON")
+        print(f"{'format':8} {'MB':>8} {'ratio':>6} {'write s':>8} {'read s':>7} {'docs/s':>9} {'MB/s':>7}")
+        for codec in codecs:
+            if codec:
+                out_dir = os.path.join(tmp, codec)
+                os.makedirs(out_dir)
+                t0 = time.perf_counter()
+                files = []
+                for f in plain:
+                    files.append(os.path.join(out_dir, os.path.basename(f) + ndjson_io.SUFFIXES[codec]))
+                    ndjson_io.rewrite(files[-1], [f], codec)
+                t_write = time.perf_counter() - t0
+            else:
+                files, t_write = plain, 0.0
+            size = sum(os.path.getsize(f) for f in files)
+            t_read, count = read_all(files, args.repeat)
+            print(f"{codec or 'plain':8} {size / 1e6:>8.1f} {raw_bytes / size:>6.2f} {t_write:>8.2f} {t_read:>7.2f} "
+                  f"{count / t_read:>9.0f} {raw_bytes / 1e6 / t_read:>7.1f}")
+        if ndjson_io.zstandard is None:
+            print("zstd skipped: the zstandard package is not installed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,7 @@
 Builds docs/data/posts.json, docs/data/reports.json and docs/data/audio.json from:
  - RSS feeds in scripts/sources.yaml
  - report files under reports/** (md/txt/html)
- - *.mp3 files anywhere in the repo (for Weekly Digest audio)
+ - state/audio_manifest.json, the MP3 index kept by weekly_main.py (Weekly Digest audio)
 
 Also labels sources by domain, tags by taxonomy keywords, and ranks items.
 """
@@ -12,10 +12,21 @@ Also labels sources by domain, tags by taxonomy keywords, and ranks items.
 import os, re, json, hashlib, datetime as dt, pathlib, html
 from urllib.parse import urlparse
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import httpx, frontmatter, yaml, feedparser
 from dateutil import parser as dateparse, tz
 from bs4 import BeautifulSoup
-from trafilatura import fetch_url, extract as trafi_extract
+from trafilatura import extract as trafi_extract, extract_metadata
+
+import sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # repo-root modules
+from feed_schedule import FeedSchedule
+from link_cache import LinkCache, make_entry, iso as iso_utc, utcnow
+from report_index import ReportIndex
+import audio_manifest
+from posts_store import PostsStore, load_caps
+import site_shards
+import search_index
 
 # --- Paths ---
 ROOT = pathlib.Path(__file__).resolve().parents[1]
@@ -37,6 +48,11 @@ URL_RE = re.compile(r'https?://[^\s\]\)\}\>\"\'`]+', re.IGNORECASE)
 SUMMARY_CHARS = 1000
 MAX_LINKS_PER_REPORT = 300
 
+# Link enrichment: bounded concurrency on the shared httpx client
+FETCH_CONCURRENCY = 16       # max in-flight downloads overall
+PER_HOST_CONCURRENCY = 4     # max in-flight downloads per host
+FETCH_TIMEOUT = 20
+
 def sha16(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
 
@@ -56,9 +72,10 @@ def load_cfg():
     dedupe   = cfg.get("dedupe", {"enabled":True, "path":"state/seen.json"})
     tzname   = cfg.get("timezone") or "Europe/Amsterdam"
     links    = cfg.get("links", {}) or {}             # <--- NEW, fixed (cfg defined above)
-    return domains, defaults, feeds, keywords, taxonomy, caps, ranking, dedupe, tzname, links
+    link_cache = cfg.get("link_cache", {}) or {}
+    return domains, defaults, feeds, keywords, taxonomy, caps, ranking, dedupe, tzname, links, link_cache
 
-DOMAINS, DEFAULTS, FEEDS, KEYWORDS, TAXONOMY, CAPS, RANKING, DEDUPE, TZN, LINKS = load_cfg()
+DOMAINS, DEFAULTS, FEEDS, KEYWORDS, TAXONOMY, CAPS, RANKING, DEDUPE, TZN, LINKS, LINK_CACHE = load_cfg()
 
 def label_for_url(u: str):
     host = urlparse(u).netloc.lower().lstrip("www.")
@@ -87,39 +104,6 @@ def categories_for(text):
         cats.append("Other")
     return cats
 
-def clamp_posts_by_caps(items):
-    buckets = {}
-    for it in items:
-        key = (it.get("categories") or ["Other"])[0]
-        buckets.setdefault(key, []).append(it)
-
-    for k in buckets:
-        buckets[k].sort(key=lambda x: (x.get("score",0), x.get("ts",0)), reverse=True)
-        buckets[k] = buckets[k][:CAPS.get("max_per_category",20)]
-
-    min_per = CAPS.get("min_per_category", 5)
-    selected = []
-    for k, arr in buckets.items():
-        selected.extend(arr[:min_per])
-
-    max_total = CAPS.get("max_total", 50)
-    if len(selected) < max_total:
-        leftovers = []
-        for k, arr in buckets.items():
-            leftovers.extend(arr[min_per:])
-        leftovers.sort(key=lambda x: (x.get("score",0), x.get("ts",0)), reverse=True)
-        need = max_total - len(selected)
-        selected.extend(leftovers[:need])
-
-    seen = set()
-    uniq = []
-    for it in selected:
-        if it["id"] not in seen:
-            uniq.append(it)
-            seen.add(it["id"])
-        if len(uniq) >= max_total: break
-    return uniq
-
 def parse_date(d):
     if not d:
         return None
@@ -128,46 +112,80 @@ def parse_date(d):
     except Exception:
         return None
 
-async def fetch_title_and_summary(client: httpx.AsyncClient, url: str):
-    # Try trafilatura first
+class FetchLimiter:
+    """Global + per-host semaphores so link enrichment overlaps without hammering one site."""
+
+    def __init__(self, total: int = FETCH_CONCURRENCY, per_host: int = PER_HOST_CONCURRENCY):
+        self.total = asyncio.Semaphore(total)
+        self.per_host = per_host
+        self.hosts: dict[str, asyncio.Semaphore] = {}
+
+    def host(self, url: str) -> asyncio.Semaphore:
+        h = urlparse(url).netloc.lower()
+        if h not in self.hosts:
+            self.hosts[h] = asyncio.Semaphore(self.per_host)
+        return self.hosts[h]
+
+    async def get(self, client: httpx.AsyncClient, url: str, headers: dict | None = None) -> httpx.Response:
+        async with self.host(url):
+            async with self.total:
+                return await client.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+
+def _clip_summary(text: str) -> str:
+    summary = re.sub(r"\s+", " ", (text or "").strip())
+    return (summary[:SUMMARY_CHARS] + "…") if len(summary) > SUMMARY_CHARS else summary
+
+def title_and_summary_from_html(html_text: str, url: str):
+    """
+    Runs in the worker pool. Derives title + summary from one downloaded page:
+    trafilatura for the main text and metadata title, BeautifulSoup only as fallback.
+    """
+    extracted, title = "", ""
     try:
-        downloaded = fetch_url(url)
-        if downloaded:
-            extracted = trafi_extract(downloaded, include_comments=False, include_links=False)
-            if extracted:
-                title = ""
-                try:
-                    r = await client.get(url, timeout=20)
-                    if r.status_code == 200:
-                        soup = BeautifulSoup(r.text, "html.parser")
-                        if soup.title and soup.title.text.strip():
-                            title = soup.title.text.strip()
-                except Exception:
-                    pass
-                if not title:
-                    first_line = extracted.strip().splitlines()[0][:140]
-                    title = first_line if len(first_line) > 10 else url
-                summary = re.sub(r"\s+", " ", extracted.strip())
-                if len(summary) > SUMMARY_CHARS:
-                    summary = summary[:SUMMARY_CHARS] + "…"
-                return title, summary
+        extracted = trafi_extract(html_text, include_comments=False, include_links=False) or ""
+        meta = extract_metadata(html_text)
+        title = (meta.get("title") if isinstance(meta, dict) else getattr(meta, "title", None)) or ""
     except Exception:
         pass
 
-    # Fallback: basic fetch + text extraction
+    if extracted:
+        if not title.strip():
+            soup = BeautifulSoup(html_text, "html.parser")
+            if soup.title and soup.title.text.strip():
+                title = soup.title.text.strip()
+        if not title.strip():
+            first_line = extracted.strip().splitlines()[0][:140]
+            title = first_line if len(first_line) > 10 else url
+        return title.strip(), _clip_summary(extracted)
+
+    # Fallback: plain text extraction from the same bytes
+    soup = BeautifulSoup(html_text, "html.parser")
+    if not title.strip():
+        title = soup.title.text.strip() if soup.title else ""
+    return (title.strip() or url), _clip_summary(soup.get_text(" "))
+
+async def fetch_title_and_summary(client: httpx.AsyncClient, url: str,
+                                  limiter: FetchLimiter, pool: ProcessPoolExecutor, cached: dict | None = None):
+    """
+    Returns a link-cache entry. One download per link; all parsing happens off the
+    event loop on those bytes. Cached validators turn unchanged pages into a 304.
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        r = await client.get(url, timeout=20)
-        if r.status_code == 200:
-            soup = BeautifulSoup(r.text, "html.parser")
-            title = soup.title.text.strip() if soup.title else url
-            text = soup.get_text(" ").strip()
-            text = re.sub(r"\s+", " ", text)
-            summary = (text[:SUMMARY_CHARS] + "…") if len(text) > SUMMARY_CHARS else text
-            return title or url, summary
+        r = await limiter.get(client, url, headers=headers)
+        if r.status_code == 304 and cached:
+            return {**cached, "ok": True, "fetched_at": iso_utc(utcnow())}
+        if r.status_code != 200 or not r.text:
+            return make_entry(url, ok=False)
+        loop = asyncio.get_running_loop()
+        title, summary = await loop.run_in_executor(pool, title_and_summary_from_html, r.text, url)
+        return make_entry(url, title, summary, ok=True,
+                          etag=r.headers.get("ETag", ""), last_modified=r.headers.get("Last-Modified", ""))
     except Exception:
-        pass
-
-    return url, ""
+        return make_entry(url, ok=False)
 
 def norm_report_date(path: pathlib.Path):
     m = re.search(r'(\d{4})[-_/](\d{2})[-_/](\d{2})', str(path))
@@ -223,10 +241,20 @@ def guess_title_abstract_keyitems(text: str):
             if len(key_items) >= 3: break
     return title, abstract, key_items
 
-def make_report_entry(path: pathlib.Path, title: str, abstract: str, key_items: list[str], repo: str):
-    date = norm_report_date(path)
-    rid = f"rep-{date}-{sha16(str(path))}"
-    file_rel = path.relative_to(ROOT).as_posix()
+def parse_report(path: pathlib.Path) -> dict:
+    """Everything reports.json needs from one report file (cached in the manifest)."""
+    raw, text, urls = read_report_text_and_urls(path)
+    title, abstract, key_items = guess_title_abstract_keyitems(text)
+    return {
+        "date": norm_report_date(path),
+        "title": title,
+        "abstract": abstract,
+        "key_items": key_items,
+        "urls": urls[:MAX_LINKS_PER_REPORT],
+    }
+
+def make_report_entry(file_rel: str, date: str, title: str, abstract: str, key_items: list[str], repo: str):
+    rid = f"rep-{date}-{sha16(str(ROOT / file_rel))}"
     url_html = f"https://github.com/{repo}/blob/main/{file_rel}"
     tags = []
     lr = file_rel.lower()
@@ -260,20 +288,18 @@ def file_raw_url(repo: str, relpath: str) -> str:
     return f"https://raw.githubusercontent.com/{repo}/main/{relpath}"
 
 def scan_audio(repo: str):
+    # Reads state/audio_manifest.json (maintained by weekly_main.py); no tree walk here
     items = []
-    for f in ROOT.rglob("*.mp3"):
-        # skip irrelevant folders
-        if any(seg in f.parts for seg in (".git","node_modules",".venv","venv","dist","build")):
-            continue
-        rel = f.relative_to(ROOT).as_posix()
-        title = f.stem.replace("_"," ").replace("-"," ").strip()
-        m = re.search(r'(\d{4})[-_](\d{2})[-_](\d{2})', rel)
-        when = f"{m.group(1)}-{m.group(2)}-{m.group(3)}" if m else ""
+    for rel, e in audio_manifest.load(ROOT).items():
         items.append({
-            "title": title,
+            "title": e.get("title") or rel,
             "path": rel,
             "raw_url": file_raw_url(repo, rel),
-            "date": when
+            "date": e.get("date") or "",
+            "drive_url": e.get("drive_link") or "",
+            "duration_s": e.get("duration_s") or 0,
+            "size": e.get("size") or 0,
+            "bitrate_kbps": e.get("bitrate_kbps") or 0,
         })
     items.sort(key=lambda x: x.get("date",""), reverse=True)
     payload = {"google_drive": LINKS.get("google_drive",""), "items": items[:50]}
@@ -285,18 +311,17 @@ async def build():
     max_age_days = RANKING.get("max_age_days", 14)
     min_score = RANKING.get("min_score", 1)
 
-    old_posts = []
-    if POSTS_JSON.exists():
-        try:
-            old_posts = json.loads(POSTS_JSON.read_text(encoding="utf-8"))
-        except Exception:
-            old_posts = []
+    store = PostsStore.load(ROOT, seed=POSTS_JSON)
 
-    # 1) FEEDS
+    # 1) FEEDS (only those due; the posts store still holds everything fetched before)
+    schedule = FeedSchedule.load("state/feed_schedule_posts.json", ROOT)
     feed_items = []
     for url in FEEDS:
+        if not schedule.due(url):
+            continue
         try:
-            fp = feedparser.parse(url)
+            fp = feedparser.parse(url, **schedule.conditional(url))
+            schedule.observe(url, fp)
             for e in fp.entries:
                 link = e.get("link") or e.get("id")
                 if not link or not link.startswith("http"):
@@ -343,33 +368,49 @@ async def build():
         except Exception as ex:
             print(f"[WARN] feed error {url}: {ex}")
 
-    # 2) REPORTS + links inside them
-    reports = []
-    report_links = []
+    # 2) REPORTS + links inside them (only new/changed files are parsed)
+    index = ReportIndex.load(ROOT)
+    files = {}
     for ddir in REPORTS_DIRS:
         if not ddir.exists(): continue
-        for f in sorted(ddir.rglob("*")):
-            if f.suffix.lower() not in (".md",".markdown",".txt",".html",".htm"): continue
-            try:
-                raw, text, urls = read_report_text_and_urls(f)
-                title, abstract, key_items = guess_title_abstract_keyitems(text)
-                reports.append(make_report_entry(f, title, abstract, key_items, repo))
-                report_links.extend(urls[:MAX_LINKS_PER_REPORT])
-            except Exception as ex:
-                print(f"[WARN] report parse {f}: {ex}")
-
-    # 3) Fetch titles/summaries for report links
+        for f in ddir.rglob("*"):
+            if f.suffix.lower() in (".md",".markdown",".txt",".html",".htm"):
+                files[f] = None
+    parsed, removed = index.refresh(sorted(files), parse_report)
+    index.save()
+    print(f"[reports] {len(index.entries)} indexed: {parsed} parsed, {removed} removed")
+
+    reports = []
+    report_links = []
+    for rel, e in index.items():
+        reports.append(make_report_entry(rel, e["date"], e.get("title") or "", e.get("abstract") or "",
+                                         e.get("key_items") or [], repo))
+        report_links.extend((e.get("urls") or [])[:MAX_LINKS_PER_REPORT])
+
+    # 3) Fetch titles/summaries for report links (only new or expired URLs)
     report_items = []
-    async with httpx.AsyncClient(headers={"User-Agent":"eurlex-site-builder/1.0"}) as client:
-        tasks = [fetch_title_and_summary(client, u) for u in report_links]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    report_links = list(dict.fromkeys(report_links))
+    cache = LinkCache.load(ROOT, LINK_CACHE)
+    due = [u for u in report_links if not cache.is_fresh(u, now)]
+    if due:
+        limiter = FetchLimiter()
+        limits = httpx.Limits(max_connections=FETCH_CONCURRENCY, max_keepalive_connections=FETCH_CONCURRENCY)
+        with ProcessPoolExecutor() as pool:
+            async with httpx.AsyncClient(headers={"User-Agent":"eurlex-site-builder/1.0"},
+                                         limits=limits, follow_redirects=True) as client:
+                tasks = [fetch_title_and_summary(client, u, limiter, pool, cache.get(u)) for u in due]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+        for u, res in zip(due, results):
+            cache.put(u, make_entry(u, ok=False) if isinstance(res, Exception) else res)
+    evicted = cache.evict(keep=report_links)
+    cache.save()
+    print(f"[links] {len(report_links)} report links: {len(report_links)-len(due)} cached, "
+          f"{len(due)} fetched, {evicted} evicted")
 
     now_iso = dt.datetime.utcnow().isoformat()+"Z"
-    for u, res in zip(report_links, results):
-        if isinstance(res, Exception):
-            title, summary = u, ""
-        else:
-            title, summary = res
+    for u in report_links:
+        entry = cache.get(u) or {}
+        title, summary = entry.get("title") or u, entry.get("summary") or ""
         src_name, base_tags = label_for_url(u)
         cats = categories_for(f"{title} {summary}")
         pid = sha16(u)
@@ -386,23 +427,26 @@ async def build():
             "categories": cats
         })
 
-    # 4) Merge + rank + cap
-    merged = []
-    seenids = set()
-    for arr in (old_posts, feed_items, report_items):
-        for p in arr:
-            if p["id"] in seenids: continue
-            merged.append(p)
-            seenids.add(p["id"])
-    merged.sort(key=lambda x: (x.get("score",0), x.get("ts",0)), reverse=True)
-    # Respect caps
-    final_posts = clamp_posts_by_caps(merged)
+    # 4) Upsert into the rolling store, age out, project with caps
+    added = sum(store.upsert(p, now) for p in feed_items + report_items)
+    evicted = store.evict(max_age_days, now)
+    store.save()
+    schedule.save()
+    print(f"[poll] {schedule.summary()}")
+    print(f"[posts] store {len(store)} posts: +{added} new, {evicted} aged out")
+    final_posts = store.project(load_caps(ROOT))
 
     # Sort reports newest first
     reports.sort(key=lambda r: r["date"], reverse=True)
 
-    POSTS_JSON.write_text(json.dumps(final_posts, ensure_ascii=False, indent=2), encoding="utf-8")
-    REPORTS_JSON.write_text(json.dumps(reports, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Legacy single files and/or paged shards, per site_data.mode
+    shard_cfg = site_shards.load_settings()
+    site_shards.publish(final_posts, POSTS_JSON, settings=shard_cfg)
+    site_shards.publish(reports, REPORTS_JSON, settings=shard_cfg)
+
+    # Prebuilt search index over exactly what was published
+    st = search_index.write_index(final_posts + reports, DOCS_DATA, shard_cfg["compress"])
+    print(f"[search] {st['docs']} docs, {st['terms']} terms, {st['bytes']/1024:.1f} KiB in {st['seconds']}s")
 
     # 5) Audio/Drive
     scan_audio(repo)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Convert the document.v2 partitions in outputs/docs between plain NDJSON and
+framed gzip/zstd NDJSON (see workers/ndjson_io.py).
+
+  # compress every closed week (the current ISO week keeps being appended to)
+  python scripts/compress_docs.py --codec zstd
+  # back to plain NDJSON, including the current week
+  python scripts/compress_docs.py --codec none --all
+
+A week present in several forms (e.g. 2025-37.ndjson.zst plus late lines in a
+new 2025-37.ndjson) is folded into one file, compressed content first. Files
+are replaced atomically under the writers' lock, and the entries of the
+processed index that pointed into them are re-read from the new file.
+"""
+
+import os, sys, json, pathlib, argparse
+from datetime import datetime, timezone
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "workers"))
+
+from ndjson_io import DOCS_DIR, SUFFIXES, docs_files, locked, offsets_path, plain_path, rewrite
+from sharding import base_path
+from doc_index import INDEX_PATH, DocIndex
+
+def current_week(directory: str) -> str:
+    year, week, _ = datetime.now(timezone.utc).isocalendar()
+    return os.path.join(directory, f"{year}-{week:02d}.ndjson")
+
+def weeks(directory: str) -> dict:
+    """plain path -> its existing files, compressed variants first."""
+    out = {}
+    for p in docs_files(directory):
+        base = plain_path(p)
+        if base_path(base) != base:
+            continue  # shard parts are merged, not stored
+        out.setdefault(base, []).append(p)
+    return {b: sorted(fs, key=lambda f: f == b) for b, fs in out.items()}
+
+def convert(base: str, sources: list, codec, level) -> dict:
+    target = base + SUFFIXES[codec] if codec else base
+    before = sum(os.path.getsize(f) for f in sources)
+    with locked(base):
+        rewrite(target, sources, codec, level)
+        for f in sources:
+            if f != target and os.path.exists(f):
+                os.remove(f)
+        if os.path.exists(offsets_path(base)):
+            os.remove(offsets_path(base))  # rebuilt by the next append to a plain file
+    return {"file": target, "from": sources, "bytes_before": before, "bytes_after": os.path.getsize(target)}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compress or decompress outputs/docs NDJSON partitions")
+    ap.add_argument("--codec", choices=["zstd", "gzip", "none"], default="zstd")
+    ap.add_argument("--level", type=int, default=None, help="compression level (zstd default 3, gzip 6)")
+    ap.add_argument("--dir", default=DOCS_DIR)
+    ap.add_argument("--all", action="store_true", help="include the current ISO week")
+    args = ap.parse_args()
+
+    codec = None if args.codec == "none" else args.codec
+    skip = None if args.all else current_week(args.dir)
+    converted = []
+    for base, sources in sorted(weeks(args.dir).items()):
+        target = base + SUFFIXES[codec] if codec else base
+        if base == skip or sources == [target]:
+            continue
+        try:
+            converted.append(convert(base, sources, codec, args.level))
+        except Exception as e:
+            print(f"[compress] {base}: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+
+    if converted and os.path.exists(INDEX_PATH):
+        index = DocIndex.load(INDEX_PATH)
+        index.reindex({f for c in converted for f in [c["file"], *c["from"]]})
+        index.save()
+
+    before = sum(c["bytes_before"] for c in converted)
+    after = sum(c["bytes_after"] for c in converted)
+    print(json.dumps({"codec": args.codec, "converted": len(converted), "bytes_before": before,
+                      "bytes_after": after, "ratio": round(before / after, 2) if after else None,
+                      "files": [c["file"] for c in converted]}, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
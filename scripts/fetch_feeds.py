@@ -7,7 +7,6 @@ This is a lightweight alternative to main.py that doesn't require email setup.
 import os
 import sys
 import json
-import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -18,6 +17,9 @@ import feedparser
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
+from posts_store import PostsStore, load_caps, post_id
+from feed_schedule import FeedSchedule
+
 def load_config():
     """Load config.yaml"""
     config_path = PROJECT_ROOT / "config.yaml"
@@ -25,8 +27,8 @@ def load_config():
         return yaml.safe_load(f) or {}
 
 def generate_id(url: str) -> str:
-    """Generate a stable ID from URL"""
-    return hashlib.md5(url.encode()).hexdigest()[:16]
+    """Generate a stable ID from URL (same scheme as build_site_data.py)"""
+    return post_id(url)
 
 def keyword_match(text: str, keywords: list) -> tuple[bool, int, list]:
     """Check if text matches any keywords, return (matches, score, matched_keywords)"""
@@ -61,10 +63,12 @@ def categorize(text: str, taxonomy: list) -> list:
     
     return list(set(categories))
 
-def fetch_feed(url: str) -> list:
-    """Fetch and parse an RSS/Atom feed"""
+def fetch_feed(url: str, schedule: FeedSchedule | None = None) -> list:
+    """Fetch and parse an RSS/Atom feed (conditionally, when a schedule is given)"""
     try:
-        feed = feedparser.parse(url)
+        feed = feedparser.parse(url, **(schedule.conditional(url) if schedule else {}))
+        if schedule:
+            schedule.observe(url, feed)
         entries = []
         
         for entry in feed.entries[:50]:  # Limit per feed
@@ -127,14 +131,17 @@ def main():
     
     print(f"[fetch_feeds] Loaded {len(feeds)} feeds, {len(keywords)} keywords")
     
-    # Fetch all feeds
+    # Fetch the feeds that are due (adaptive polling, see feed_schedule.py)
+    schedule = FeedSchedule.load("state/feed_schedule_posts.json")
     all_entries = []
     for i, feed_url in enumerate(feeds):
+        if not schedule.due(feed_url):
+            continue
         print(f"[{i+1}/{len(feeds)}] Fetching {feed_url[:60]}...")
-        entries = fetch_feed(feed_url)
+        entries = fetch_feed(feed_url, schedule)
         all_entries.extend(entries)
     
-    print(f"[fetch_feeds] Fetched {len(all_entries)} total entries")
+    print(f"[fetch_feeds] Fetched {len(all_entries)} total entries; {schedule.summary()}")
     
     # Filter by keywords and build posts
     posts = []
@@ -171,17 +178,21 @@ def main():
         }
         posts.append(post)
     
-    # Sort by date (newest first)
-    posts.sort(key=lambda p: p["ts"], reverse=True)
-    
-    # Limit to most recent 200
-    posts = posts[:200]
-    
     print(f"[fetch_feeds] {len(posts)} posts after filtering")
     
-    # Write to docs/data/posts.json
+    # Merge into the shared rolling store and age out old posts
     output_path = PROJECT_ROOT / "docs" / "data" / "posts.json"
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    store = PostsStore.load(PROJECT_ROOT, seed=output_path)
+    added = sum(store.upsert(p) for p in posts)
+    max_age_days = (config.get("ranking") or {}).get("max_age_days", 14)
+    evicted = store.evict(max_age_days)
+    store.save()
+    schedule.save()
+    print(f"[fetch_feeds] Store: {len(store)} posts (+{added} new, {evicted} aged out)")
+    
+    # Same projection as build_site_data.py (caps of scripts/sources.yaml)
+    posts = store.project(load_caps(PROJECT_ROOT))
     
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(posts, f, ensure_ascii=False, indent=2)
@@ -190,8 +201,8 @@ def main():
     
     # Print summary
     if posts:
-        newest = posts[0]
-        oldest = posts[-1]
+        newest = max(posts, key=lambda p: p.get("ts", 0))
+        oldest = min(posts, key=lambda p: p.get("ts", 0))
         print(f"[fetch_feeds] Date range: {oldest['added'][:10]} to {newest['added'][:10]}")
         print(f"[fetch_feeds] Newest: {newest['title'][:60]}...")
 
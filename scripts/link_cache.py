@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Durable cache for report-link enrichment (state/link_cache.json).
+
+  url -> {title, summary, ok, fetched_at, first_seen, etag, last_modified}
+
+- Successful lookups stay fresh for `ttl_days`; after that they are revalidated
+  (If-None-Match / If-Modified-Since when the server gave us validators).
+- Failed lookups are cached too (ok=false) and retried after `negative_ttl_hours`.
+- The file is capped at `max_entries`; the least recently fetched URLs that no
+  current report links to go first.
+"""
+
+import datetime as dt, pathlib
+
+from state_io import load_json, write_json_atomic
+
+DEFAULTS = {"path": "state/link_cache.json", "ttl_days": 30, "negative_ttl_hours": 24, "max_entries": 20000}
+
+def utcnow() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc)
+
+def iso(d: dt.datetime) -> str:
+    return d.astimezone(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def parse_iso(s: str):
+    try:
+        return dt.datetime.fromisoformat((s or "").replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+def make_entry(url: str, title: str = "", summary: str = "", ok: bool = True,
+               etag: str = "", last_modified: str = "") -> dict:
+    return {
+        "title": title or url,
+        "summary": summary or "",
+        "ok": bool(ok),
+        "fetched_at": iso(utcnow()),
+        "etag": etag or "",
+        "last_modified": last_modified or "",
+    }
+
+class LinkCache:
+    def __init__(self, path: pathlib.Path, ttl_days=30, negative_ttl_hours=24, max_entries=20000):
+        self.path = path
+        self.ttl = dt.timedelta(days=float(ttl_days))
+        self.negative_ttl = dt.timedelta(hours=float(negative_ttl_hours))
+        self.max_entries = int(max_entries)
+        self.entries: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, root: pathlib.Path, cfg: dict | None = None) -> "LinkCache":
+        c = {**DEFAULTS, **(cfg or {})}
+        cache = cls(root / c["path"], c["ttl_days"], c["negative_ttl_hours"], c["max_entries"])
+        data = load_json(cache.path, {})
+        if isinstance(data, dict):
+            cache.entries = {u: e for u, e in data.items() if isinstance(e, dict)}
+        return cache
+
+    def get(self, url: str):
+        return self.entries.get(url)
+
+    def is_fresh(self, url: str, now: dt.datetime | None = None) -> bool:
+        e = self.entries.get(url)
+        if not e:
+            return False
+        fetched = parse_iso(e.get("fetched_at"))
+        if not fetched:
+            return False
+        age = (now or utcnow()) - fetched
+        return age < (self.ttl if e.get("ok") else self.negative_ttl)
+
+    def put(self, url: str, entry: dict):
+        prev = self.entries.get(url) or {}
+        entry["first_seen"] = prev.get("first_seen") or entry.get("fetched_at") or iso(utcnow())
+        # A failed refresh keeps the last good title/summary but is retried on the negative TTL
+        if not entry.get("ok") and prev.get("summary"):
+            entry = {**prev, "fetched_at": entry["fetched_at"], "ok": False,
+                     "first_seen": entry["first_seen"]}
+        self.entries[url] = entry
+
+    def evict(self, keep=()) -> int:
+        """Drop the least recently fetched URLs over max_entries, sparing `keep` where possible."""
+        extra = len(self.entries) - self.max_entries
+        if extra <= 0:
+            return 0
+        keep = set(keep)
+        order = lambda u: (u in keep, self.entries[u].get("fetched_at") or "")
+        oldest = sorted(self.entries, key=order)[:extra]
+        for u in oldest:
+            del self.entries[u]
+        return len(oldest)
+
+    def save(self):
+        write_json_atomic(self.path, self.entries)
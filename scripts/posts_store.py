@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rolling posts store shared by build_site_data.py and fetch_feeds.py
+(state/posts_store.json). docs/data/posts.json is just a projection of it,
+made by project() with the `caps:` of scripts/sources.yaml whichever script
+writes it.
+
+- `by_id`: id -> post (id = sha256(url)[:16], same for both writers)
+- `log`:   min-heap of (last_seen, id) for age eviction; superseded entries
+           are skipped lazily instead of being searched for and removed.
+
+A post keeps its first-seen added/ts, but every upsert refreshes `last_seen`;
+eviction goes by last_seen, so a link that is still being rediscovered (e.g.
+one cited in a report) stays instead of leaving and returning as "new".
+
+upsert is O(log n), evict is O(k log n) for k expired posts, and top-N by
+(score, ts) uses a bounded heap rather than sorting the whole history.
+"""
+
+import heapq, hashlib, pathlib, time, datetime as dt
+
+import yaml
+
+from state_io import load_json, write_json_atomic
+
+STORE_PATH = "state/posts_store.json"
+SITE_CONFIG = "scripts/sources.yaml"
+POST_FIELDS = ("id", "source", "url", "title", "tags", "added", "summary", "score", "ts", "categories")
+DEFAULT_CAPS = {"max_total": 50, "max_per_category": 20, "min_per_category": 5}
+
+def post_id(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+def rank_key(p: dict):
+    return (p.get("score", 0), p.get("ts", 0))
+
+def last_seen(p: dict) -> int:
+    return int(p.get("last_seen") or p.get("ts", 0))
+
+def load_caps(root: pathlib.Path) -> dict:
+    """`caps:` of scripts/sources.yaml, the one projection setting both writers use."""
+    try:
+        with open(root / SITE_CONFIG, "r", encoding="utf-8") as f:
+            cfg = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        cfg = {}
+    return {**DEFAULT_CAPS, **(cfg.get("caps") or {})}
+
+def clamp_by_caps(items, caps: dict) -> list[dict]:
+    """Best (score, ts) per first category up to max_per_category, min_per_category each, max_total overall."""
+    buckets = {}
+    for it in items:
+        key = (it.get("categories") or ["Other"])[0]
+        buckets.setdefault(key, []).append(it)
+
+    for k in buckets:
+        buckets[k] = heapq.nlargest(caps.get("max_per_category",20), buckets[k], key=rank_key)
+
+    min_per = caps.get("min_per_category", 5)
+    selected = []
+    for k, arr in buckets.items():
+        selected.extend(arr[:min_per])
+
+    max_total = caps.get("max_total", 50)
+    if len(selected) < max_total:
+        leftovers = []
+        for k, arr in buckets.items():
+            leftovers.extend(arr[min_per:])
+        need = max_total - len(selected)
+        selected.extend(heapq.nlargest(need, leftovers, key=rank_key))
+
+    seen = set()
+    uniq = []
+    for it in selected:
+        if it["id"] not in seen:
+            uniq.append(it)
+            seen.add(it["id"])
+        if len(uniq) >= max_total: break
+    return uniq
+
+class PostsStore:
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.by_id: dict[str, dict] = {}
+        self.log: list[tuple[int, str]] = []
+
+    @classmethod
+    def load(cls, root: pathlib.Path, seed: pathlib.Path | None = None) -> "PostsStore":
+        """Open the store; the first time, seed it from an existing posts.json."""
+        store = cls(root / STORE_PATH)
+        posts = load_json(store.path, None)
+        if posts is None and seed is not None:
+            posts = load_json(seed, [])
+        for p in posts or []:
+            if isinstance(p, dict) and p.get("id"):
+                store.by_id[p["id"]] = p
+        store.log = [(last_seen(p), pid) for pid, p in store.by_id.items()]
+        heapq.heapify(store.log)
+        return store
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, pid: str):
+        return pid in self.by_id
+
+    def get(self, pid: str):
+        return self.by_id.get(pid)
+
+    def upsert(self, post: dict, now: dt.datetime | None = None) -> bool:
+        """
+        Insert or refresh a post; returns True if it was new. A known post keeps
+        its first-seen added/ts so re-discovered links don't jump to the top,
+        and gets a fresh last_seen so it isn't aged out while still current.
+        """
+        pid = post["id"]
+        prev = self.by_id.get(pid)
+        rec = {k: post[k] for k in POST_FIELDS if k in post}
+        seen = int(now.timestamp()) if now is not None else int(time.time())
+        if prev:
+            rec["added"], rec["ts"] = prev.get("added", rec.get("added")), prev.get("ts", rec.get("ts", 0))
+        else:
+            rec["ts"] = int(rec.get("ts", 0))
+        rec["last_seen"] = max(seen, rec["ts"])
+        self.by_id[pid] = {**prev, **rec} if prev else rec
+        if not prev or last_seen(prev) != rec["last_seen"]:
+            heapq.heappush(self.log, (rec["last_seen"], pid))
+        return not prev
+
+    def evict(self, max_age_days: float, now: dt.datetime | None = None) -> int:
+        """Drop posts not seen in the last max_age_days."""
+        now = now or dt.datetime.now(dt.timezone.utc)
+        cutoff = int(now.timestamp() - float(max_age_days) * 86400)
+        dropped = 0
+        while self.log and self.log[0][0] < cutoff:
+            seen, pid = heapq.heappop(self.log)
+            p = self.by_id.get(pid)
+            if p is not None and last_seen(p) == seen:
+                del self.by_id[pid]
+                dropped += 1
+        return dropped
+
+    def top(self, n: int, key=rank_key, where=None) -> list[dict]:
+        posts = self.by_id.values() if where is None else (p for p in self.by_id.values() if where(p))
+        return heapq.nlargest(n, posts, key=key)
+
+    def project(self, caps: dict) -> list[dict]:
+        """The posts.json view: clamp_by_caps over the store, without store-only fields."""
+        return [{k: p[k] for k in POST_FIELDS if k in p} for p in clamp_by_caps(self.by_id.values(), caps)]
+
+    def save(self):
+        write_json_atomic(self.path, list(self.by_id.values()))
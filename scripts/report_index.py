@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental index of report files for reports.json (state/reports_manifest.json).
+
+  "reports/weekly/2025-09-01-weekly.txt" -> {mtime, size, sha256, date,
+                                             title, abstract, key_items, urls}
+
+Files whose (mtime, size) are unchanged are not opened at all; files that were
+touched but have the same content hash only get their mtime refreshed. Only new
+or edited reports are handed to the parser, and deleted reports drop out.
+"""
+
+import hashlib, pathlib
+
+from state_io import load_json, write_json_atomic
+
+MANIFEST_PATH = "state/reports_manifest.json"
+
+class ReportIndex:
+    def __init__(self, root: pathlib.Path, path: pathlib.Path):
+        self.root = root
+        self.path = path
+        self.entries: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, root: pathlib.Path, rel_path: str = MANIFEST_PATH) -> "ReportIndex":
+        idx = cls(root, root / rel_path)
+        data = load_json(idx.path, {})
+        if isinstance(data, dict):
+            idx.entries = {k: v for k, v in data.items() if isinstance(v, dict)}
+        return idx
+
+    def refresh(self, files, parse):
+        """
+        Bring the manifest in line with `files`. `parse(path)` must return a dict
+        with date/title/abstract/key_items/urls; it is only called for new or
+        changed content. Returns (parsed, removed) counts.
+        """
+        parsed = 0
+        current = set()
+        for f in files:
+            rel = f.relative_to(self.root).as_posix()
+            current.add(rel)
+            try:
+                st = f.stat()
+                prev = self.entries.get(rel)
+                if prev and prev.get("mtime") == st.st_mtime and prev.get("size") == st.st_size:
+                    continue
+                digest = hashlib.sha256(f.read_bytes()).hexdigest()
+                if prev and prev.get("sha256") == digest:
+                    prev["mtime"], prev["size"] = st.st_mtime, st.st_size
+                    continue
+                meta = parse(f)
+                self.entries[rel] = {**meta, "mtime": st.st_mtime, "size": st.st_size, "sha256": digest}
+                parsed += 1
+            except Exception as ex:
+                print(f"[WARN] report parse {f}: {ex}")
+        removed = [rel for rel in self.entries if rel not in current]
+        for rel in removed:
+            del self.entries[rel]
+        return parsed, len(removed)
+
+    def items(self):
+        return sorted(self.entries.items())
+
+    def save(self):
+        write_json_atomic(self.path, self.entries)
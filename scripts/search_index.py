@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prebuilt inverted index for the site search box (docs/data/search-index.json).
+
+  {"schema": "search.v1",
+   "ids":      ["3f2a9c1e5b7d0a11", "rep-2025-09-01-...", ...],   # doc number -> item id
+   "terms":    ["ai", "audit", "auditing", ...],                   # sorted
+   "postings": [[0, 3, 1], [2], [2, 5], ...],                      # delta-encoded doc numbers
+   "min_token": 2, "stopwords": ["a", "also", ...]}                # dropped from the query too
+
+Title, summary/abstract and tags of every post and report are tokenized the
+same way app.js tokenizes the query (lowercase, accents folded, runs of
+letters/digits). Stopwords and short tokens are not indexed, so app.js drops
+them from the query before intersecting. Because `terms` is sorted, the client finds every term that
+starts with a typed prefix with one binary search and a short forward scan.
+The file carries no timestamp, so it only changes when the indexed text does.
+"""
+
+import re, time, unicodedata, pathlib
+
+import site_shards
+
+INDEX_NAME = "search-index.json"
+MIN_TOKEN = 2
+STOPWORDS = {
+    "the", "and", "for", "of", "to", "in", "on", "a", "an", "is", "are", "be", "by",
+    "with", "as", "at", "or", "it", "its", "this", "that", "from", "was", "were", "has",
+    "have", "will", "not", "but", "can", "also", "into", "than", "their", "which",
+}
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(fold(text)) if len(t) >= MIN_TOKEN and t not in STOPWORDS]
+
+def doc_text(item: dict) -> str:
+    return " ".join([
+        item.get("title") or "",
+        item.get("summary") or item.get("abstract") or "",
+        " ".join(item.get("tags") or []),
+    ])
+
+def build_index(items) -> dict:
+    ids, postings = [], {}
+    for item in items:
+        if not item.get("id"):
+            continue
+        doc = len(ids)
+        ids.append(item["id"])
+        for term in set(tokenize(doc_text(item))):
+            postings.setdefault(term, []).append(doc)
+
+    terms = sorted(postings)
+    encoded = []
+    for term in terms:
+        prev, deltas = 0, []
+        for doc in postings[term]:      # already ascending: docs are numbered in order
+            deltas.append(doc - prev)
+            prev = doc
+        encoded.append(deltas)
+    return {
+        "schema": "search.v1",
+        "ids": ids,
+        "terms": terms,
+        "postings": encoded,
+        "min_token": MIN_TOKEN,
+        "stopwords": sorted(STOPWORDS),
+    }
+
+def write_index(items, out_dir: pathlib.Path, compress=("gz", "br")) -> dict:
+    """Build and write the index next to posts.json/reports.json; returns stats."""
+    t0 = time.perf_counter()
+    index = build_index(items)
+    data = site_shards.compact(index)
+    site_shards.write_bytes(pathlib.Path(out_dir) / INDEX_NAME, data, compress)
+    return {
+        "docs": len(index["ids"]),
+        "terms": len(index["terms"]),
+        "bytes": len(data),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paginated site-data writer: compact JSON pages with content-hashed names,
+precompressed .gz/.br siblings and a small index the frontend reads first.
+
+  docs/data/posts.index.json
+    {"schema": "shards.v1", "name": "posts", "total": 412, "page_size": 100,
+     "generated_at": "...", "meta": {...},
+     "pages": [{"file": "shards/posts-0001.3f2a9c1e5b7d.json", "count": 100, "bytes": 48211}, ...]}
+  docs/data/shards/posts-0001.3f2a9c1e5b7d.json(.gz|.br)
+
+A page whose content did not change keeps its file name, so browsers (and git)
+only see the pages that actually changed. Pages no longer referenced by the
+index are removed.
+
+Settings come from `site_data:` in scripts/sources.yaml, overridable with the
+SITE_DATA_MODE / SITE_DATA_PAGE_SIZE environment variables:
+  mode: single   -> only the legacy pretty-printed file
+        sharded  -> only index + pages
+        both     -> both (default, keeps older clients working)
+"""
+
+import os, json, gzip, hashlib, pathlib, datetime as dt
+
+import yaml
+
+try:
+    import brotli  # optional: .br siblings are skipped when missing
+except Exception:
+    brotli = None
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CONFIG = ROOT / "scripts" / "sources.yaml"
+SHARD_DIR = "shards"
+
+def load_settings() -> dict:
+    cfg = {}
+    try:
+        with open(CONFIG, "r", encoding="utf-8") as f:
+            cfg = (yaml.safe_load(f) or {}).get("site_data") or {}
+    except Exception:
+        pass
+    mode = (os.getenv("SITE_DATA_MODE") or cfg.get("mode") or "both").lower()
+    page_size = int(os.getenv("SITE_DATA_PAGE_SIZE") or cfg.get("page_size") or 100)
+    compress = cfg.get("compress", ["gz", "br"])
+    return {"mode": mode, "page_size": max(1, page_size), "compress": list(compress or [])}
+
+def compact(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def write_bytes(path: pathlib.Path, data: bytes, compress=("gz", "br")):
+    """Write data plus precompressed siblings; untouched if the content is identical."""
+    siblings = [pathlib.Path(f"{path}.{ext}") for ext in compress if ext == "gz" or brotli is not None]
+    if path.exists() and all(x.exists() for x in siblings) and path.read_bytes() == data:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    if "gz" in compress:
+        # mtime=0 keeps the .gz byte-identical for identical input
+        pathlib.Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if "br" in compress and brotli is not None:
+        pathlib.Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+
+def write_sharded(items: list, out_dir: pathlib.Path, name: str, page_size: int = 100,
+                  meta: dict | None = None, compress=("gz", "br")) -> dict:
+    """Split `items` into pages under out_dir/shards/ and write out_dir/<name>.index.json."""
+    out_dir = pathlib.Path(out_dir)
+    shard_dir = out_dir / SHARD_DIR
+    pages, keep = [], set()
+    for n, start in enumerate(range(0, len(items), page_size), 1):
+        chunk = items[start:start + page_size]
+        data = compact(chunk)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        fname = f"{name}-{n:04d}.{digest}.json"
+        write_bytes(shard_dir / fname, data, compress)
+        keep.add(fname)
+        pages.append({"file": f"{SHARD_DIR}/{fname}", "count": len(chunk), "bytes": len(data)})
+
+    # drop pages of this dataset that the new index no longer references
+    if shard_dir.exists():
+        for f in shard_dir.glob(f"{name}-[0-9][0-9][0-9][0-9].*.json*"):
+            base = f.name[:-3] if f.name.endswith((".gz", ".br")) else f.name
+            if base not in keep:
+                f.unlink()
+
+    index = {
+        "schema": "shards.v1",
+        "name": name,
+        "total": len(items),
+        "page_size": page_size,
+        "generated_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "meta": meta or {},
+        "pages": pages,
+    }
+    write_bytes(out_dir / f"{name}.index.json", compact(index), compress)
+    return index
+
+def publish(items: list, legacy_path: pathlib.Path, name: str | None = None,
+            legacy_obj=None, meta: dict | None = None, settings: dict | None = None, indent=2):
+    """
+    Write one dataset according to the configured mode. `legacy_obj` is what the
+    single-file variant contains (defaults to the items list itself).
+    """
+    s = settings or load_settings()
+    legacy_path = pathlib.Path(legacy_path)
+    if s["mode"] in ("single", "both"):
+        legacy_path.parent.mkdir(parents=True, exist_ok=True)
+        obj = items if legacy_obj is None else legacy_obj
+        legacy_path.write_text(json.dumps(obj, ensure_ascii=False, indent=indent), encoding="utf-8")
+    if s["mode"] in ("sharded", "both"):
+        return write_sharded(items, legacy_path.parent, name or legacy_path.stem,
+                             s["page_size"], meta, s["compress"])
+    return None
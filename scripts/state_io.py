@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Small helpers for the JSON state files the site build keeps under state/.
+Writes go through a temp file + os.replace so a crash never leaves half a file.
+"""
+
+import os, json, pathlib
+
+def load_json(path: pathlib.Path, default):
+    try:
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as ex:
+        print(f"[WARN] unreadable state {path}: {ex}")
+    return default
+
+def write_json_atomic(path: pathlib.Path, obj, indent=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    seps = None if indent else (",", ":")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=indent, separators=seps), encoding="utf-8")
+    os.replace(tmp, path)
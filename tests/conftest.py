@@ -0,0 +1,6 @@
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+for sub in ("workers", "scripts"):
+    sys.path.insert(0, str(ROOT / sub))
@@ -0,0 +1,88 @@
+"""Framed gzip/zstd weeks (workers/ndjson_io.py rewrite) and removing lines from them."""
+
+import json
+import zlib
+
+import pytest
+
+import ndjson_io
+from doc_index import remove_lines
+from ndjson_io import FRAME_BYTES, SUFFIXES, iter_lines, iter_records, rewrite, sniff
+
+CODECS = [
+    "gzip",
+    pytest.param("zstd", marks=pytest.mark.skipif(ndjson_io.zstandard is None, reason="zstandard not installed")),
+]
+
+
+def week_lines(n, start=0):
+    return [(json.dumps({"url": f"https://example.eu/{i}", "text": f"{i} " * 200}) + "\n").encode()
+            for i in range(start, start + n)]
+
+
+def first_frame(data, codec):
+    """(content of the first gzip member / zstd frame, bytes after it)."""
+    if codec == "gzip":
+        d = zlib.decompressobj(wbits=31)
+    else:
+        d = ndjson_io.zstandard.ZstdDecompressor().decompressobj()
+    return d.decompress(data), d.unused_data
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_rewrite_week_into_frames(tmp_path, codec):
+    plain = tmp_path / "2025-37.ndjson"
+    lines = week_lines(3000)  # > 2 frames of uncompressed input
+    assert sum(map(len, lines)) > 2 * FRAME_BYTES
+    plain.write_bytes(b"".join(lines))
+    target = str(plain) + SUFFIXES[codec]
+
+    assert rewrite(target, [str(plain)], codec) == 0
+
+    assert sniff(target) == codec
+    head, rest = first_frame(open(target, "rb").read(), codec)
+    assert rest and head.endswith(b"\n") and head.count(b"\n") < len(lines)
+    got = list(iter_lines(target))
+    assert [raw for _, raw in got] == lines
+    assert [off for off, _ in got] == [off for off, _ in iter_lines(str(plain))]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_rewrite_folds_late_lines_and_applies_edit(tmp_path, codec):
+    week = tmp_path / "2025-37.ndjson"
+    old, late = week_lines(50), week_lines(5, start=50)
+    target = str(week) + SUFFIXES[codec]
+    week.write_bytes(b"".join(old))
+    rewrite(target, [str(week)], codec)
+    week.write_bytes(b"".join(late))  # appended after the week was compressed
+
+    starts = [off for off, _ in iter_lines(target)] + [sum(map(len, old)) + off for off, _ in iter_lines(str(week))]
+    drop, patch = {starts[3], starts[52]}, starts[10]
+
+    def edit(offset, raw):
+        if offset in drop:
+            return None
+        return b'{"url": "https://example.eu/patched"}' if offset == patch else raw
+
+    assert rewrite(target, [target, str(week)], codec, edit=edit) == 2
+
+    urls = [r["url"] for r in iter_records([target])]
+    expected = [f"https://example.eu/{i}" for i in range(55) if i not in (3, 52)]
+    expected[expected.index("https://example.eu/10")] = "https://example.eu/patched"
+    assert urls == expected
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["2025-37.ndjson", "2025-37.ndjson" + SUFFIXES[codec]]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_remove_lines_from_compressed_week(tmp_path, codec):
+    plain = tmp_path / "2025-37.ndjson"
+    plain.write_bytes(b"".join(week_lines(20)))
+    target = str(plain) + SUFFIXES[codec]
+    rewrite(target, [str(plain)], codec)
+    offsets = {off for off, raw in iter_lines(target) if json.loads(raw)["url"].endswith(("/0", "/7", "/19"))}
+
+    assert remove_lines(target, offsets) == 3
+
+    assert sniff(target) == codec
+    assert [r["url"] for r in iter_records([target])] == \
+        [f"https://example.eu/{i}" for i in range(20) if i not in (0, 7, 19)]
@@ -0,0 +1,69 @@
+"""DocIndex.rebuild() (--rebuild-index) over weeks holding duplicate documents."""
+
+import json
+import os
+
+from doc_index import DocIndex
+from ndjson_io import NdjsonWriter, iter_lines, iter_records, read_offsets, rewrite
+
+
+def doc(n, **kw):
+    return {"url": f"https://example.eu/{n}", "dedupe_signature": f"sig-{n}", **kw}
+
+
+def line_at(path, offset):
+    return next(json.loads(raw) for off, raw in iter_lines(path) if off == offset)
+
+
+def test_rebuild_removes_injected_duplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    docs = os.path.join("outputs", "docs")
+    os.makedirs(docs)
+    old, new = os.path.join(docs, "2025-36.ndjson"), os.path.join(docs, "2025-37.ndjson")
+    with open(old, "w") as f:
+        for rec in (doc(1), doc(2), doc(3)):
+            f.write(json.dumps(rec) + "\n")
+    rewrite(old + ".gz", [old], "gzip")
+    os.remove(old)
+    old += ".gz"
+    with NdjsonWriter(new, offsets=True) as w:
+        for rec in (doc(4),
+                    doc(2, title="re-run"),                                 # same url as last week
+                    doc(5, canonical_url="https://example.eu/3"),           # canonical_url hits an earlier url
+                    doc(6), doc(6, title="twice"),                          # duplicate within the week
+                    {"url": "https://example.eu/7", "dedupe_signature": "sig-1"},  # same content, new url
+                    doc(8)):
+            w.write(rec)
+    with open(new, "a") as f:
+        f.write("not json\n")
+
+    stats = DocIndex().rebuild()
+
+    assert stats == {"files": 2, "records": 6, "duplicates": 4, "unreadable": 1}
+    assert [r["url"] for r in iter_records([old])] == [f"https://example.eu/{n}" for n in (1, 2, 3)]
+    kept = list(iter_records([new]))
+    assert [r["url"] for r in kept] == ["https://example.eu/4", "https://example.eu/6", "https://example.eu/8"]
+    assert "title" not in kept[1]
+    assert read_offsets(new) == [off for off, _ in iter_lines(new)]
+
+
+def test_rebuilt_index_points_at_the_surviving_lines(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    docs = os.path.join("outputs", "docs")
+    os.makedirs(docs)
+    week = os.path.join(docs, "2025-37.ndjson")
+    with NdjsonWriter(week) as w:
+        for rec in (doc(1), doc(1), doc(2), doc(2), doc(3, canonical_url="https://example.eu/c3")):
+            w.write(rec)
+
+    index = DocIndex()
+    index.rebuild()
+
+    assert len(index) == 7
+    for n in (1, 2, 3):
+        path, offset = index.locate(f"https://example.eu/{n}")
+        assert path == week and line_at(path, offset)["url"] == f"https://example.eu/{n}"
+        assert index.locate(f"sig-{n}") == (path, offset)
+    assert index.locate("https://example.eu/c3") == index.locate("https://example.eu/3")
+    assert not index.claim("https://example.eu/2")
+    assert index.claim("https://example.eu/9")
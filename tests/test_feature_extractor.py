@@ -0,0 +1,75 @@
+"""FeatureExtractor (workers/process_document.py) vs. the patterns it compiles."""
+
+import itertools
+import re
+
+import pytest
+
+import bench_features
+import process_document as pd
+
+
+def split_top(pattern, sep="|"):
+    parts, depth, cur = [], 0, ""
+    for ch in pattern:
+        depth += (ch == "(") - (ch == ")")
+        if ch == sep and depth == 0:
+            parts.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    return parts + [cur]
+
+
+def expand(pattern):
+    """Every string the detector patterns (literals, \\b, groups, ?, |) can match."""
+    out = []
+    for alt in split_top(pattern):
+        items, i = [], 0
+        while i < len(alt):
+            if alt.startswith("\\b", i):
+                i += 2
+                continue
+            if alt[i] == "(":
+                depth, j = 0, i
+                while True:
+                    depth += (alt[j] == "(") - (alt[j] == ")")
+                    if depth == 0:
+                        break
+                    j += 1
+                options, i = expand(alt[i + 1:j]), j + 1
+            else:
+                options, i = [alt[i]], i + 1
+            if i < len(alt) and alt[i] == "?":
+                options, i = options + [""], i + 1
+            items.append(options)
+        out.extend("".join(p) for p in itertools.product(*items))
+    return out
+
+
+PATTERNS = list(pd.FeatureExtractor.INSTRUMENTS) + list(pd.TECH_MAP.items())
+
+
+@pytest.mark.parametrize("label,rx", PATTERNS, ids=[label for label, _ in PATTERNS])
+def test_literal_guard_never_hides_a_match(label, rx):
+    compiled, lits = re.compile(rx.lower()), pd.required_literals(rx.lower())
+    for text in expand(rx.lower()):
+        page = f"see {text} here"
+        assert compiled.search(page), (label, text)  # the expansion is a real match
+        assert lits is None or any(l in page for l in lits), (label, text, lits)
+
+
+def test_extractor_matches_reference_detectors():
+    for html in bench_features.synthetic_corpus(40):
+        soup = pd.BeautifulSoup(html, "lxml")
+        text, page_text = pd.extract_main(soup), soup.get_text(" ", strip=True)
+        url = "https://investeu.europa.eu/news/1"
+        assert pd.EXTRACTOR.extract(text, page_text, url) == bench_features.baseline(text, page_text, url)
+    samples = [f"see {t} here" for _, rx in PATTERNS for t in expand(rx)]
+    for text in samples + [s.upper() for s in samples]:
+        assert pd.EXTRACTOR.extract(text, text) == bench_features.baseline(text, text, "")
+
+
+def test_uppercase_escape_is_rejected():
+    with pytest.raises(ValueError):
+        pd.FeatureExtractor(tech_map={"Broken": r"\Sfoo"})
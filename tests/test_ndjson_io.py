@@ -0,0 +1,82 @@
+"""NdjsonWriter appends (workers/ndjson_io.py): torn tails and the offsets sidecar."""
+
+import json
+
+from ndjson_io import OFFSET, NdjsonWriter, offsets_path, read_offsets
+
+
+def line_starts(path):
+    data = path.read_bytes()
+    starts, pos = [], 0
+    for line in data.splitlines(keepends=True):
+        starts.append(pos)
+        pos += len(line)
+    return starts
+
+
+def append(path, *recs):
+    seen = []
+    with NdjsonWriter(str(path), offsets=True, on_write=lambda tag, off: seen.append((tag, off))) as w:
+        for rec in recs:
+            w.write(rec, tag=rec["n"])
+    return seen
+
+
+def test_append_cuts_torn_tail(tmp_path):
+    path = tmp_path / "2025-37.ndjson"
+    append(path, {"n": 1}, {"n": 2})
+    with open(path, "ab") as f:
+        f.write(b'{"n": 3, "title": "half-writ')  # crashed writer
+
+    seen = append(path, {"n": 4})
+
+    lines = path.read_bytes().splitlines(keepends=True)
+    assert all(line.endswith(b"\n") for line in lines)
+    assert [json.loads(line)["n"] for line in lines] == [1, 2, 4]
+    assert read_offsets(str(path)) == line_starts(path)
+    assert seen == [(4, line_starts(path)[2])]
+
+
+def test_torn_tail_without_any_newline(tmp_path):
+    path = tmp_path / "2025-37.ndjson"
+    path.write_bytes(b'{"n": 0, "tit')
+
+    append(path, {"n": 1})
+
+    assert path.read_bytes() == b'{"n": 1}\n'
+    assert read_offsets(str(path)) == [0]
+
+
+def test_lagging_sidecar_is_caught_up(tmp_path):
+    path = tmp_path / "2025-37.ndjson"
+    append(path, {"n": 1}, {"n": 2}, {"n": 3})
+    side = tmp_path / "2025-37.ndjson.offsets"
+    side.write_bytes(side.read_bytes()[: OFFSET.size])  # crash between data and sidecar write
+
+    append(path, {"n": 4})
+
+    assert read_offsets(str(path)) == line_starts(path)
+    assert len(read_offsets(str(path))) == 4
+
+
+def test_mismatched_sidecar_is_rebuilt(tmp_path):
+    path = tmp_path / "2025-37.ndjson"
+    append(path, {"n": 1}, {"n": 2})
+    side = offsets_path(str(path))
+
+    for bogus in (OFFSET.pack(0) + OFFSET.pack(3),  # not a line start
+                  OFFSET.pack(0) + OFFSET.pack(10 ** 6),  # past the end
+                  b"\x00\x01\x02"):  # partial entry
+        with open(side, "wb") as f:
+            f.write(bogus)
+        append(path, {"n": 3})
+        assert read_offsets(str(path)) == line_starts(path)
+
+
+def test_missing_sidecar_covers_existing_lines(tmp_path):
+    path = tmp_path / "2025-37.ndjson"
+    path.write_bytes(b'{"n": 1}\n{"n": 2}\n')
+
+    append(path, {"n": 3})
+
+    assert read_offsets(str(path)) == line_starts(path) == [0, 9, 18]
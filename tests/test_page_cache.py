@@ -0,0 +1,62 @@
+"""PageCache.prune() (workers/page_cache.py): old fetches go, blobs still referenced stay."""
+
+import json
+import os
+
+from page_cache import PageCache
+
+OLD = "2020-01-01T00:00:00Z"
+
+
+def backdate(cache, *urls):
+    lines = []
+    with open(cache.manifest_path, "rb") as f:
+        for raw in f:
+            e = json.loads(raw)
+            if e["url"] in urls:
+                e["fetched_at"] = OLD
+            lines.append(json.dumps(e) + "\n")
+    with open(cache.manifest_path, "w") as f:
+        f.writelines(lines)
+
+
+def blobs(root):
+    return sorted(name.split(".", 1)[0] for sub in os.listdir(root) if os.path.isdir(os.path.join(root, sub))
+                  for name in os.listdir(os.path.join(root, sub)))
+
+
+def test_prune_keeps_shared_blobs(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"))
+    shared = cache.put("https://example.eu/a", None, "<html>same page</html>")
+    assert cache.put("https://example.eu/a?utm=x", "https://example.eu/a", "<html>same page</html>") == shared
+    gone = cache.put("https://example.eu/b", None, "<html>old page</html>")
+    fresh = cache.put("https://example.eu/c", None, "<html>new page</html>")
+    cache.close()
+    backdate(cache, "https://example.eu/a", "https://example.eu/b")
+
+    stats = PageCache(cache.root).prune(30)
+
+    assert stats == {"fetches_dropped": 2, "blobs_removed": 1}
+    assert blobs(cache.root) == sorted([shared, fresh])
+    entries = PageCache(cache.root).entries()
+    assert entries["https://example.eu/a"]["sha256"] == shared  # via final_url of the recent fetch
+    assert entries["https://example.eu/c"]["sha256"] == fresh
+    assert "https://example.eu/b" not in entries
+    assert PageCache(cache.root).get(shared) == "<html>same page</html>"
+    assert PageCache(cache.root).get(gone) is None
+
+
+def test_prune_then_put_reuses_the_manifest(tmp_path):
+    cache = PageCache(str(tmp_path / "pages"))
+    cache.put("https://example.eu/a", None, "<html>a</html>")
+    cache.close()
+    backdate(cache, "https://example.eu/a")
+    assert PageCache(cache.root).prune(30) == {"fetches_dropped": 1, "blobs_removed": 1}
+
+    again = PageCache(cache.root)
+    digest = again.put("https://example.eu/a", None, "<html>a</html>")
+    again.close()
+
+    assert again.stats == {"stored": 1, "deduplicated": 0}
+    assert blobs(cache.root) == [digest]
+    assert [json.loads(line)["url"] for line in open(cache.manifest_path)] == ["https://example.eu/a"]
@@ -28,7 +28,7 @@ Env (provided by workflow):
 
 from __future__ import annotations
 
-import os, re, smtplib, pathlib, datetime as dt
+import os, re, sys, smtplib, pathlib, datetime as dt
 from typing import Any, Dict, List, Tuple
 from email.mime.text import MIMEText
 
@@ -63,6 +63,11 @@ STATE_DIR = ROOT / "state"
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 STATE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Audio manifest (state/audio_manifest.json) is shared with scripts/build_site_data.py
+sys.path.insert(0, str(ROOT / "scripts"))
+import audio_manifest
+import near_dupes
+
 # ------------------------ Config & window ------------------------
 
 def load_config() -> dict:
@@ -332,10 +337,14 @@ def build_prompts(selected: List[Dict[str, Any]], window: Tuple[dt.datetime, dt.
     start, end = window
     start_iso, end_iso = start.date().isoformat(), end.date().isoformat()
 
-    # References used both in body [n] citations and the final References list
-    numbered = [f"[{i}] {e['title']} — {e['link']}" for i, e in enumerate(selected, 1)]
+    # References used both in body [n] citations and the final References list;
+    # near-duplicate copies (near_dupes.collapse) are listed under their representative
+    def also(e: Dict[str, Any]) -> str:
+        alts = [a["link"] for a in e.get("alternates") or [] if a.get("link")]
+        return f" (also: {'; '.join(alts)})" if alts else ""
+    numbered = [f"[{i}] {e['title']} — {e['link']}{also(e)}" for i, e in enumerate(selected, 1)]
     # Corpus for LLM
-    corpus = "\n".join(f"- {e['title']} :: {e['summary']} :: {e['link']}" for e in selected)
+    corpus = "\n".join(f"- {e['title']} :: {e['summary']} :: {e['link']}{also(e)}" for e in selected)
 
     system = (
         "You are a senior EU policy analyst. Write clear professional prose in plain paragraphs "
@@ -415,6 +424,8 @@ def main() -> int:
         return (x["_score"], pub)
 
     week_entries.sort(key=sort_key, reverse=True)
+    # Syndicated copies of one story: keep the best-ranked, attach the rest as alternate links
+    week_entries = near_dupes.collapse(week_entries, near_dupes.load_settings(cfg))
     selected = week_entries[:cap]
 
     # Build prompts and generate text
@@ -464,6 +475,13 @@ def main() -> int:
             print(f"[audio] upload failed: {ex}")
             listen_url = None
 
+    # Register the MP3 so the site build can list it without scanning the repo
+    if mp3_path and mp3_path.exists():
+        try:
+            audio_manifest.register(mp3_path, ROOT, title=title, date=end_label, drive_link=listen_url or "")
+        except Exception as ex:
+            print(f"[audio] manifest update failed: {ex}")
+
     # Build references list (live links)
     ref_lines: List[str] = []
     for i, e in enumerate(selected, 1):
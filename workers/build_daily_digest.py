@@ -4,23 +4,15 @@
 # - reports/daily/YYYY-MM-DD.md (human readable)
 # - docs/digests/YYYY-MM-DD.json (API)
 # - docs/digests/latest.json (pointer for website)
+# - optionally docs/digests/<name>.index.json + shards/ (see scripts/site_shards.py)
 
-import os, json, glob, argparse
+import os, sys, json, argparse
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtparse
 
-def load_lines(paths):
-    for p in paths:
-        if not os.path.exists(p): 
-            continue
-        with open(p, "r", encoding="utf-8") as f:
-            for line in f:
-                line=line.strip()
-                if line:
-                    try:
-                        yield json.loads(line)
-                    except Exception:
-                        continue
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import site_shards
+from ndjson_io import docs_files, iter_records
 
 def parse_dt(s):
     try:
@@ -44,10 +36,9 @@ def main():
     now = datetime.now(timezone.utc)
     start = now - timedelta(hours=args.hours)
 
-    # Collect docs from all ndjson files
-    ndjson_files = sorted(glob.glob("outputs/docs/*.ndjson"))
+    # Collect docs from all ndjson files (plain or compressed)
     items = []
-    for rec in load_lines(ndjson_files):
+    for rec in iter_records(docs_files()):
         pd = parse_dt(rec.get("published_date") or rec.get("fetch_time"))
         if not pd: 
             continue
@@ -80,11 +71,10 @@ def main():
         "items": items
     }
 
-    # JSON outputs
-    with open(out_json_path, "w", encoding="utf-8") as jf:
-        json.dump(payload, jf, ensure_ascii=False, indent=2)
-    with open(out_json_latest, "w", encoding="utf-8") as jf:
-        json.dump(payload, jf, ensure_ascii=False)
+    # JSON outputs (legacy files and/or paged shards, per site_data.mode)
+    meta = {k: v for k, v in payload.items() if k != "items"}
+    site_shards.publish(items, out_json_path, legacy_obj=payload, meta=meta)
+    site_shards.publish(items, out_json_latest, legacy_obj=payload, meta=meta, indent=None)
 
     # Markdown (simple)
     with open(out_md_path, "w", encoding="utf-8") as mf:
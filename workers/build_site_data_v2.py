@@ -4,8 +4,13 @@
 import os, json, glob
 from datetime import datetime
 
+from ndjson_io import docs_files, iter_records
+
 def latest(path_glob):
-    files = sorted(glob.glob(path_glob), key=lambda p: os.path.getmtime(p), reverse=True)
+    return newest(glob.glob(path_glob))
+
+def newest(files):
+    files = sorted(files, key=lambda p: os.path.getmtime(p), reverse=True)
     return files[0] if files else None
 
 def ensure_dirs():
@@ -23,20 +28,14 @@ def main():
             json.dump(tl, out, ensure_ascii=False)
 
     # 2) aggregates over most recent ndjson
-    ndjson_file = latest("outputs/docs/*.ndjson")
+    ndjson_file = newest(docs_files())
     agg = {"schema":"site_aggregate.v1","generated_at":datetime.utcnow().isoformat()+"Z","by_source":{}, "total":0}
     if ndjson_file:
         by_source = {}
-        with open(ndjson_file, "r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip(): continue
-                try:
-                    rec = json.loads(line)
-                except Exception: 
-                    continue
-                sid = rec.get("source_id","unknown")
-                by_source[sid] = by_source.get(sid, 0) + 1
-                agg["total"] += 1
+        for rec in iter_records([ndjson_file]):
+            sid = rec.get("source_id","unknown")
+            by_source[sid] = by_source.get(sid, 0) + 1
+            agg["total"] += 1
         agg["by_source"] = by_source
 
     with open("docs/data/summary-latest.json", "w", encoding="utf-8") as out:
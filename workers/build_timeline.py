@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 # Build a weekly timeline from document.v2 NDJSON files.
-# Safe: reads outputs/docs/*.ndjson, writes outputs/timelines/YYYY-WW.json
+# Safe: reads outputs/docs/*.ndjson[.gz|.zst], writes outputs/timelines/YYYY-WW.json
 
-import argparse, os, sys, json, glob, re
+import argparse, os, sys, json, re
 from datetime import datetime, timezone, timedelta
 
+from ndjson_io import docs_files, iter_records
+
 def parse_args():
     ap = argparse.ArgumentParser()
     ap.add_argument("--window", default="7d", help="Number of days, e.g. 7d")
@@ -32,19 +34,6 @@ def iso_week_path(prefix="outputs/timelines"):
     os.makedirs(prefix, exist_ok=True)
     return f"{prefix}/{year}-{week:02d}.json"
 
-def load_ndjson(path):
-    items = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                items.append(json.loads(line))
-            except Exception:
-                continue
-    return items
-
 def main():
     args = parse_args()
     # compute window
@@ -54,9 +43,7 @@ def main():
     start_dt = end_dt - timedelta(days=days)
 
     # gather documents
-    docs = []
-    for fp in glob.glob("outputs/docs/*.ndjson"):
-        docs.extend(load_ndjson(fp))
+    docs = list(iter_records(docs_files()))
 
     # filter + map to events
     events = []
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+doc_index.py
+------------
+Index of documents already written to outputs/docs/*.ndjson (plain or
+compressed, see ndjson_io), persisted in state/processed_index.json:
+
+  {"schema": "processed_index.v1",
+   "keys": {"<url or canonical_url or dedupe_signature>": ["outputs/docs/2025-37.ndjson", <byte offset>], ...}}
+
+Offsets are positions in the decompressed stream of the file.
+
+process_document.py consults it before any work:
+- the queued URL             -> skip before fetching
+- the final (redirected) URL -> skip before parsing
+- the dedupe_signature       -> skip before the LLM call
+and records every line it appends. The NDJSON files stay the source of truth:
+rebuild() rescans them (dropping later duplicates of a key) and drop() removes
+superseded lines when a document is reprocessed with --force.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ndjson_io import codec_for, docs_files, iter_lines, locked, plain_path, rebuild_offsets, rewrite
+
+INDEX_PATH = os.path.join("state", "processed_index.json")
+
+Location = Tuple[str, int]  # (ndjson path, byte offset of the line)
+
+
+def record_keys(rec: Dict[str, Any]) -> List[str]:
+    keys = [rec.get("url"), rec.get("canonical_url"), rec.get("dedupe_signature")]
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+class DocIndex:
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self.keys: Dict[str, List[Any]] = {}
+        self._claimed: Set[str] = set()  # keys being processed in this run
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH, fallback: Optional[str] = None) -> "DocIndex":
+        """Read `path` (or `fallback` while `path` does not exist yet); saves go to `path`."""
+        index = cls(path)
+        if fallback and not os.path.exists(path):
+            path = fallback
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            keys = data.get("keys") if isinstance(data, dict) else None
+            if isinstance(keys, dict):
+                index.keys = keys
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[index] ignoring unreadable {path}: {e}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def locate(self, *keys: Optional[str]) -> Optional[Location]:
+        with self._lock:
+            for k in keys:
+                loc = self.keys.get(k) if k else None
+                if loc:
+                    return loc[0], int(loc[1])
+        return None
+
+    def claim(self, *keys: Optional[str], ignore_indexed: bool = False) -> bool:
+        """False if any key is indexed (unless ignore_indexed) or already claimed in this run; else claim them."""
+        keys = tuple(k for k in keys if k)
+        with self._lock:
+            if any(k in self._claimed or (k in self.keys and not ignore_indexed) for k in keys):
+                return False
+            self._claimed.update(keys)
+            return True
+
+    def add(self, rec: Dict[str, Any], path: str, offset: int, aliases: Iterable[str] = ()) -> None:
+        """Index a written line; aliases are extra keys such as the pre-redirect URL that was queued."""
+        with self._lock:
+            for k in record_keys(rec) + [a for a in aliases if a]:
+                self.keys[k] = [path, offset]
+
+    # ---- maintenance ----
+    def rebuild(self) -> Dict[str, int]:
+        """Re-index every NDJSON file from scratch, removing later duplicates of a key."""
+        keys, stats = scan(docs_files())
+        with self._lock:
+            self.keys = keys
+        return stats
+
+    def drop(self, locations: Iterable[Location]) -> int:
+        """Remove the lines at these locations (superseded by --force) and re-index the touched files."""
+        by_file: Dict[str, Set[int]] = {}
+        for path, offset in locations:
+            by_file.setdefault(path, set()).add(int(offset))
+        removed = sum(remove_lines(p, offs) for p, offs in by_file.items() if os.path.exists(p))
+        if by_file:
+            self.reindex(by_file)  # offsets in the touched files moved
+        return removed
+
+    def reindex(self, paths: Iterable[str]) -> None:
+        """Forget the entries of `paths` and re-read those that still exist (rewritten, renamed or removed files)."""
+        paths = set(paths)
+        keys, _ = scan([p for p in paths if os.path.exists(p)])
+        with self._lock:
+            self.keys = {k: v for k, v in self.keys.items() if v[0] not in paths}
+            self.keys.update(keys)
+
+    def save(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"schema": "processed_index.v1", "keys": self.keys}, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+
+def scan(files: Iterable[str]) -> Tuple[Dict[str, List[Any]], Dict[str, int]]:
+    """Index NDJSON files in name order; lines repeating an earlier key are removed from disk."""
+    keys: Dict[str, List[Any]] = {}
+    stats = {"files": 0, "records": 0, "duplicates": 0, "unreadable": 0}
+    for path in sorted(files):
+        stats["files"] += 1
+        lines = _read_keys(path)
+        mine: Dict[str, int] = {}  # keys first seen in this file -> offset
+        dupes: Set[int] = set()
+        for here, ks in lines:
+            if ks is None:
+                stats["unreadable"] += 1
+            elif any(k in keys or k in mine for k in ks):
+                dupes.add(here)
+            else:
+                stats["records"] += 1
+                mine.update((k, here) for k in ks)
+        if dupes:
+            stats["duplicates"] += remove_lines(path, dupes)
+            mine = {}  # offsets after a removed line shifted
+            for here, ks in _read_keys(path):
+                for k in ks or ():
+                    mine.setdefault(k, here)
+        keys.update((k, [path, here]) for k, here in mine.items())
+    return keys, stats
+
+
+def _read_keys(path: str) -> List[Tuple[int, Optional[List[str]]]]:
+    """(byte offset, keys) per non-empty line; keys is None for lines that are not JSON."""
+    out: List[Tuple[int, Optional[List[str]]]] = []
+    for here, raw in iter_lines(path):
+        if not raw.strip():
+            continue
+        try:
+            out.append((here, record_keys(json.loads(raw))))
+        except Exception:
+            out.append((here, None))
+    return out
+
+
+def remove_lines(path: str, offsets: Set[int]) -> int:
+    """Rewrite `path` without the lines starting at `offsets` (atomic replace, under the writers' lock)."""
+    with locked(plain_path(path)):
+        removed = rewrite(path, [path], codec_for(path), edit=lambda offset, raw: None if offset in offsets else raw)
+        rebuild_offsets(path)
+    return removed
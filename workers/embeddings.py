@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+embeddings.py
+-------------
+Offline document.v2 embeddings: hashed TF-IDF over word uni/bigrams, reduced
+with a sparse random projection (each hashed feature adds +-1 to a few fixed,
+seeded output dimensions), L2-normalised. CPU and NumPy only, no network, and
+deterministic for a given corpus.
+
+Stored next to the NDJSON instead of inline (`"embeddings"` stays null):
+
+  outputs/embeddings/
+    meta.json      {"schema": "embeddings.v1", "dim", "features", "nnz", "seed", "docs", ...}
+    df.npy         int32 document frequency per hashed feature (the IDF of the build)
+    vectors.f16    float16 rows, one per line of ids.txt (np.memmap, shape from the file size)
+    ids.txt        canonical URL of each row
+
+  python workers/embeddings.py                      # full rebuild from outputs/docs
+  python workers/embeddings.py --incremental        # only embed records not in ids.txt yet (IDF kept,
+                                                    # unless stale: then a full rebuild)
+  python workers/embeddings.py --similar <url> -k 10
+  python workers/embeddings.py --query "EIB venture debt for quantum start-ups"
+  python workers/embeddings.py --dupes --threshold 0.9
+
+An incremental run keeps the IDF of the last full build, so it turns into a
+full rebuild once the store has grown to REBUILD_GROWTH x the documents that
+IDF was computed on, or the IDF is older than REBUILD_DAYS.
+
+Incremental runs append rows and then ids. A crash in between leaves rows (or
+a torn id line) that load() ignores, and the next incremental run truncates
+both files back to the last complete pair before appending.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ndjson_io import docs_files, iter_records
+
+EMBED_DIR = os.path.join("outputs", "embeddings")
+DIM = 256
+FEATURES = 1 << 18
+NNZ = 4      # output dimensions touched per hashed feature
+SEED = 13
+CHUNK_ROWS = 1 << 15  # rows scored per matrix product
+PAIR_BLOCK = 2048     # --dupes compares PAIR_BLOCK x PAIR_BLOCK tiles
+REBUILD_GROWTH = 2.0  # --incremental rebuilds once rows >= this x the IDF's docs
+REBUILD_DAYS = 7      # ... or once the IDF is this old
+
+TOKEN_RE = re.compile(r"[a-z0-9€]+(?:[-'][a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have in into is it its of on or that the their this to was were
+will with which who whose than then there these those also more most such not no can could would should may
+""".split())
+
+
+def record_id(rec: Dict[str, Any]) -> Optional[str]:
+    return rec.get("canonical_url") or rec.get("url")
+
+
+def record_text(rec: Dict[str, Any]) -> str:
+    """Title (counted twice) and summary, without the fallback summariser's References block."""
+    title = rec.get("title") or ""
+    summary = (rec.get("summary_150w") or "").split("\n\nReferences", 1)[0]
+    return f"{title}\n{title}\n{summary}"
+
+
+def tokens(text: str) -> List[str]:
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class Projector:
+    """Hashing, IDF weighting and the sparse random projection (shared by build and query)."""
+
+    def __init__(self, dim: int = DIM, features: int = FEATURES, nnz: int = NNZ, seed: int = SEED):
+        self.dim, self.features, self.nnz, self.seed = dim, features, nnz, seed
+        rng = np.random.default_rng(seed)
+        self.dims = rng.integers(0, dim, size=(features, nnz), dtype=np.int32)
+        self.signs = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(features, nnz))
+
+    def hashed(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(feature ids, term counts) of a text."""
+        grams = tokens(text)
+        h = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams))
+        return np.unique(h & np.uint32(self.features - 1), return_counts=True)
+
+    def embed(self, feats: np.ndarray, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if len(feats):
+            w = (1.0 + np.log(counts)).astype(np.float32) * idf[feats]  # sublinear tf * idf
+            vec = np.bincount(self.dims[feats].ravel(), weights=(self.signs[feats] * w[:, None]).ravel(),
+                              minlength=self.dim).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def meta(self) -> Dict[str, Any]:
+        return {"dim": self.dim, "features": self.features, "nnz": self.nnz, "seed": self.seed}
+
+
+def idf_of(df: np.ndarray, docs: int) -> np.ndarray:
+    return (np.log((1.0 + docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+class EmbeddingStore:
+    def __init__(self, directory: str = EMBED_DIR):
+        self.dir = directory
+        self.meta: Dict[str, Any] = {}
+        self.ids: List[str] = []
+        self.vectors = np.zeros((0, DIM), dtype=np.float16)
+        self.df = np.zeros(FEATURES, dtype=np.int32)
+        self._row: Dict[str, int] = {}
+        self._projector: Optional[Projector] = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    @classmethod
+    def load(cls, directory: str = EMBED_DIR) -> "EmbeddingStore":
+        """Open an existing store (vectors are memory-mapped read-only); empty if there is none."""
+        store = cls(directory)
+        try:
+            with open(store.path("meta.json"), "r", encoding="utf-8") as f:
+                store.meta = json.load(f)
+            with open(store.path("ids.txt"), "r", encoding="utf-8") as f:
+                ids = f.read().split("\n")[:-1]  # a last line without its newline is torn
+            store.df = np.load(store.path("df.npy"))
+        except FileNotFoundError:
+            return store
+        dim = int(store.meta["dim"])
+        rows = os.path.getsize(store.path("vectors.f16")) // (2 * dim)
+        n = min(rows, len(ids))  # rows appended without their ids (interrupted run) are ignored
+        store.ids = ids[:n]
+        store.vectors = np.memmap(store.path("vectors.f16"), dtype=np.float16, mode="r", shape=(n, dim)) \
+            if n else np.zeros((0, dim), dtype=np.float16)
+        store._row = {u: i for i, u in enumerate(store.ids)}
+        return store
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def projector(self) -> Projector:
+        if self._projector is None:
+            m = self.meta
+            self._projector = Projector(m.get("dim", DIM), m.get("features", FEATURES), m.get("nnz", NNZ),
+                                        m.get("seed", SEED))
+        return self._projector
+
+    # ---- building ----
+    def build(self, records: Iterable[Dict[str, Any]], incremental: bool = False) -> Dict[str, Any]:
+        """Embed `records`; a full build recomputes the IDF and rewrites the store."""
+        t0 = time.monotonic()
+        if incremental and self.idf_stale():
+            incremental = False
+        proj = self.projector if incremental and self.meta else Projector()
+        seen = set(self.ids) if incremental else set()
+        todo = []
+        for rec in records:
+            rid = record_id(rec)
+            if rid and rid not in seen:
+                seen.add(rid)
+                todo.append((rid, *proj.hashed(record_text(rec))))
+
+        if incremental and self.meta:
+            df, docs = self.df, int(self.meta.get("docs", len(self.ids)))
+        else:
+            df, docs = np.zeros(proj.features, dtype=np.int32), len(todo)
+            for _, feats, _ in todo:
+                df[feats] += 1
+        idf = idf_of(df, docs)
+        rows = np.empty((len(todo), proj.dim), dtype=np.float16)
+        for i, (_, feats, counts) in enumerate(todo):
+            rows[i] = proj.embed(feats, counts, idf)
+
+        os.makedirs(self.dir, exist_ok=True)
+        new_ids = [rid for rid, _, _ in todo]
+        if incremental and self.meta:
+            # drop what an interrupted run left past the last complete (row, id) pair
+            os.truncate(self.path("vectors.f16"), len(self.ids) * proj.dim * 2)
+            os.truncate(self.path("ids.txt"), sum(len(u.encode("utf-8")) + 1 for u in self.ids))
+            with open(self.path("vectors.f16"), "ab") as f:
+                f.write(rows.tobytes())
+            with open(self.path("ids.txt"), "a", encoding="utf-8") as f:
+                f.writelines(u + "\n" for u in new_ids)
+        else:
+            self._replace("vectors.f16", rows.tobytes())
+            self._replace("ids.txt", "".join(u + "\n" for u in new_ids).encode("utf-8"))
+            tmp = self.path("df.npy.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, df)
+            os.replace(tmp, self.path("df.npy"))
+            self.meta = {"schema": "embeddings.v1", **proj.meta(), "docs": docs,
+                         "idf_built_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        self.meta["rows"] = len(self.ids) + len(new_ids) if incremental else len(new_ids)
+        self.meta["built_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._replace("meta.json", json.dumps(self.meta, indent=2).encode("utf-8"))
+        fresh = EmbeddingStore.load(self.dir)
+        self.__dict__.update(fresh.__dict__)
+        return {"embedded": len(new_ids), "rows": len(self), "full": not incremental,
+                "seconds": round(time.monotonic() - t0, 1)}
+
+    def idf_stale(self, now: Optional[datetime] = None) -> bool:
+        """True when the stored IDF no longer describes the corpus (see REBUILD_GROWTH / REBUILD_DAYS)."""
+        if not self.meta:
+            return False  # nothing stored: the build is a full one anyway
+        if len(self.ids) >= REBUILD_GROWTH * max(1, int(self.meta.get("docs", 0))):
+            return True
+        try:
+            built = datetime.strptime(self.meta["idf_built_at"], "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        except (KeyError, ValueError):
+            return True
+        return (now or datetime.now(timezone.utc)) - built > timedelta(days=REBUILD_DAYS)
+
+    def _replace(self, name: str, data: bytes) -> None:
+        tmp = self.path(name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path(name))
+
+    # ---- queries ----
+    def embed_text(self, text: str) -> np.ndarray:
+        proj = self.projector
+        return proj.embed(*proj.hashed(text), idf_of(self.df, int(self.meta.get("docs", len(self)))))
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of `query` (unit length) with every row."""
+        q = query.astype(np.float32)
+        out = np.empty(len(self), dtype=np.float32)
+        for s in range(0, len(self), CHUNK_ROWS):
+            out[s:s + CHUNK_ROWS] = self.vectors[s:s + CHUNK_ROWS].astype(np.float32) @ q
+        return out
+
+    def topk(self, query: np.ndarray, k: int = 10, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        scores = self.scores(query)
+        for rid in exclude:
+            if rid in self._row:
+                scores[self._row[rid]] = -np.inf
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[i], round(float(scores[i]), 4)) for i in best if np.isfinite(scores[i])]
+
+    def similar(self, rid: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k related items of an embedded record (itself excluded)."""
+        i = self._row.get(rid)
+        if i is None:
+            raise KeyError(rid)
+        return self.topk(self.vectors[i].astype(np.float32), k, exclude=[rid])
+
+    def duplicates(self, threshold: float = 0.9) -> List[List[str]]:
+        """Groups of rows whose cosine similarity chains above `threshold` (blocked all-pairs)."""
+        n = len(self)
+        parent = list(range(n))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for s in range(0, n, PAIR_BLOCK):
+            block = self.vectors[s:s + PAIR_BLOCK].astype(np.float32)
+            for t in range(s, n, PAIR_BLOCK):
+                sims = block @ self.vectors[t:t + PAIR_BLOCK].astype(np.float32).T
+                rows, cols = np.nonzero(sims >= threshold)
+                for r, c in zip(rows + s, cols + t):
+                    if r < c:
+                        a, b = find(r), find(c)
+                        if a != b:
+                            parent[b] = a
+        groups: Dict[int, List[str]] = {}
+        for i in range(n):
+            groups.setdefault(find(i), []).append(self.ids[i])
+        return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline embeddings and similarity search for document.v2 records")
+    ap.add_argument("--dir", default=EMBED_DIR)
+    ap.add_argument("--incremental", action="store_true", help="embed only new records, keeping the stored IDF (full rebuild when it is stale)")
+    ap.add_argument("--similar", metavar="URL", help="related items of an embedded record")
+    ap.add_argument("--query", metavar="TEXT", help="records closest to a free-text query")
+    ap.add_argument("--dupes", action="store_true", help="list near-duplicate groups")
+    ap.add_argument("-k", "--top", type=int, default=10)
+    ap.add_argument("--threshold", type=float, default=0.9, help="cosine threshold for --dupes")
+    args = ap.parse_args()
+
+    store = EmbeddingStore.load(args.dir)
+    if args.similar or args.query or args.dupes:
+        if not len(store):
+            print(json.dumps({"error": f"no embeddings in {args.dir}; run without arguments first"}))
+            return 1
+        if args.similar:
+            try:
+                out = {"similar": args.similar, "results": store.similar(args.similar, args.top)}
+            except KeyError:
+                print(json.dumps({"error": f"not embedded: {args.similar}"}))
+                return 1
+        elif args.query:
+            out = {"query": args.query, "results": store.topk(store.embed_text(args.query), args.top)}
+        else:
+            groups = store.duplicates(args.threshold)
+            out = {"threshold": args.threshold, "groups": len(groups), "duplicates": groups}
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return 0
+
+    stats = store.build(iter_records(docs_files(), schema="document.v2"), incremental=args.incremental)
+    print(json.dumps({**stats, "dir": args.dir, "dim": store.meta.get("dim")}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+host_health.py
+--------------
+Per-host health ledger shared by weekly_discover.py and process_document.py,
+persisted in state/host_health.json:
+
+  "www.eib.org": {
+    "requests": 412, "failures": 0, "total_failures": 7,
+    "statuses": {"200": 398, "429": 6, "timeout": 1, ...},
+    "latency_ms": 840.2,          # EWMA over successful responses
+    "throttle": 1.0,              # >1 slows the per-domain token bucket down
+    "next_allowed": "<ISO>",      # backoff / Retry-After: no requests before this
+    "quarantined_until": "<ISO>", # chronically failing: skipped entirely until then
+    "last_error": "...", "last_ok": "<ISO>", "updated_at": "<ISO>"
+  }
+
+- 429/503 double the host's throttle factor (up to 16x) and honour Retry-After;
+  short waits are retried inline, longer ones are deferred to a later run.
+- Timeouts, connection errors and 5xx count as consecutive failures and push
+  `next_allowed` out exponentially (1 min, 2 min, 4 min ... capped at 6 h).
+- After QUARANTINE_AFTER consecutive failures the host is quarantined for a day,
+  so a dead source no longer costs a full timeout on every run.
+- Any success clears the failure streak and slowly relaxes the throttle.
+Other 4xx (404, 410, ...) are about the document, not the host, and only count
+towards `statuses`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from sharding import shard_parts
+
+STATE_PATH = os.path.join("state", "host_health.json")
+
+BACKOFF_BASE_S = 60
+BACKOFF_MAX_S = 6 * 3600
+QUARANTINE_AFTER = 5           # consecutive failures
+QUARANTINE_FOR = timedelta(hours=24)
+MAX_THROTTLE = 16.0
+MAX_INLINE_WAIT_S = 30         # Retry-After up to this is waited out within the run
+THROTTLING_STATUSES = (429, 503)
+EWMA_ALPHA = 0.3
+
+
+class HostUnavailable(Exception):
+    """The host is backing off or quarantined; try again on a later run."""
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP-date); None if absent/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - (now or utcnow())).total_seconds())
+    except Exception:
+        return None
+
+
+def backoff_seconds(failures: int) -> float:
+    base = min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** max(0, failures - 1)))
+    return base * random.uniform(0.8, 1.2)
+
+
+def _parse_iso(s: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(s) if s else None
+    except Exception:
+        return None
+
+
+class HostHealth:
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self.hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH, fallback: Optional[str] = None) -> "HostHealth":
+        """Read `path` (or `fallback` while `path` does not exist yet); saves go to `path`."""
+        ledger = cls(path)
+        if fallback and not os.path.exists(path):
+            path = fallback
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                ledger.hosts = {h: v for h, v in data.items() if isinstance(v, dict)}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[health] ignoring unreadable {path}: {e}")
+        return ledger
+
+    def absorb(self, path: str) -> int:
+        """Fold another ledger file in (a shard's), keeping the most recently updated entry per host."""
+        other = HostHealth.load(path)
+        taken = 0
+        with self._lock:
+            for host, e in other.hosts.items():
+                mine = self.hosts.get(host)
+                if mine is None or (e.get("updated_at") or "") > (mine.get("updated_at") or ""):
+                    self.hosts[host] = e
+                    taken += 1
+        return taken
+
+    def _entry(self, host: str) -> Dict[str, Any]:
+        return self.hosts.setdefault(host, {
+            "requests": 0, "failures": 0, "total_failures": 0, "statuses": {},
+            "latency_ms": None, "throttle": 1.0, "next_allowed": "", "quarantined_until": "",
+            "last_error": "", "last_ok": "", "updated_at": "",
+        })
+
+    # ---- scheduling ----
+    def allow(self, url: str, now: Optional[datetime] = None) -> Tuple[bool, str]:
+        now = now or utcnow()
+        with self._lock:
+            e = self.hosts.get(host_of(url))
+            if not e:
+                return True, ""
+            q = _parse_iso(e.get("quarantined_until"))
+            if q and q > now:
+                return False, f"quarantined until {e['quarantined_until']} ({e.get('last_error') or 'failing'})"
+            nxt = _parse_iso(e.get("next_allowed"))
+            if nxt and nxt > now:
+                return False, f"backing off until {e['next_allowed']}"
+            return True, ""
+
+    def throttle(self, url_or_host: str) -> float:
+        host = host_of(url_or_host) if "/" in url_or_host else url_or_host.lower()
+        with self._lock:
+            e = self.hosts.get(host)
+            return float(e.get("throttle") or 1.0) if e else 1.0
+
+    # ---- bookkeeping ----
+    def record(self, url: str, status: Optional[int], latency_s: float,
+               error: Optional[BaseException] = None, retry_after: Optional[float] = None) -> None:
+        now = utcnow()
+        with self._lock:
+            e = self._entry(host_of(url))
+            e["requests"] += 1
+            key = str(status) if status is not None else _error_kind(error)
+            e["statuses"][key] = e["statuses"].get(key, 0) + 1
+            e["updated_at"] = now.isoformat()
+
+            if status in THROTTLING_STATUSES:
+                e["throttle"] = min(MAX_THROTTLE, float(e.get("throttle") or 1.0) * 2)
+                wait = retry_after if retry_after is not None else backoff_seconds(e["failures"] + 1)
+                e["next_allowed"] = (now + timedelta(seconds=wait)).isoformat()
+                e["last_error"] = f"HTTP {status}"
+                return
+
+            host_failure = error is not None or (status is not None and status >= 500)
+            if host_failure:
+                e["failures"] += 1
+                e["total_failures"] += 1
+                e["last_error"] = f"HTTP {status}" if status is not None else f"{type(error).__name__}: {error}"[:200]
+                e["next_allowed"] = (now + timedelta(seconds=backoff_seconds(e["failures"]))).isoformat()
+                if e["failures"] >= QUARANTINE_AFTER:
+                    e["quarantined_until"] = (now + QUARANTINE_FOR).isoformat()
+                return
+
+            # the host answered (2xx/3xx, or a 4xx about this particular document)
+            e["failures"] = 0
+            e["next_allowed"] = ""
+            e["quarantined_until"] = ""
+            e["last_ok"] = now.isoformat()
+            e["throttle"] = max(1.0, float(e.get("throttle") or 1.0) * 0.9)
+            ms = latency_s * 1000
+            prev = e.get("latency_ms")
+            e["latency_ms"] = round(ms if prev is None else (1 - EWMA_ALPHA) * prev + EWMA_ALPHA * ms, 1)
+
+    def request(self, get: Callable[..., Any], url: str, retries: int = 2, **kwargs) -> Any:
+        """
+        Call get(url, **kwargs) (requests.get / Session.get) under the ledger:
+        refuses hosts in backoff/quarantine, records the outcome, and retries
+        429/503 inline when the wait is short. Returns the last response; the
+        caller still decides what a non-2xx means.
+        """
+        ok, why = self.allow(url)
+        if not ok:
+            raise HostUnavailable(f"{host_of(url)}: {why}")
+        for attempt in range(retries + 1):
+            t0 = time.monotonic()
+            try:
+                r = get(url, **kwargs)
+            except Exception as e:
+                self.record(url, None, time.monotonic() - t0, error=e)
+                raise
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            self.record(url, r.status_code, time.monotonic() - t0, retry_after=retry_after)
+            if r.status_code not in THROTTLING_STATUSES or attempt == retries:
+                return r
+            wait = retry_after if retry_after is not None else backoff_seconds(attempt + 1) / 20
+            if wait > MAX_INLINE_WAIT_S:
+                return r
+            r.close()
+            print(f"[health] {host_of(url)}: HTTP {r.status_code}, retrying in {wait:.0f}s")
+            time.sleep(wait)
+        return r
+
+    def summary(self) -> str:
+        now = utcnow()
+        quarantined = [h for h, e in self.hosts.items() if (_parse_iso(e.get("quarantined_until")) or now) > now]
+        slowed = [h for h, e in self.hosts.items() if float(e.get("throttle") or 1.0) > 1.0]
+        return f"{len(self.hosts)} host(s), {len(quarantined)} quarantined, {len(slowed)} throttled"
+
+    def save(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.hosts, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+def merge_shard_ledgers(path: str = STATE_PATH) -> int:
+    """Fold the ledgers written by --shard runs into `path` and remove them; returns how many."""
+    parts = shard_parts(path)
+    if not parts:
+        return 0
+    ledger = HostHealth.load(path)
+    for _, _, f in parts:
+        ledger.absorb(f)
+    ledger.save()
+    for _, _, f in parts:
+        os.remove(f)
+    return len(parts)
+
+
+def _error_kind(error: Optional[BaseException]) -> str:
+    name = type(error).__name__.lower() if error is not None else "error"
+    if "timeout" in name:
+        return "timeout"
+    if "connection" in name:
+        return "connection"
+    return "error"
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+ndjson_io.py
+------------
+Safe appends to shared NDJSON partitions (outputs/docs/<week>.ndjson).
+
+NdjsonWriter buffers records and flushes them in batches. Each flush:
+- takes an exclusive advisory lock (flock on "<file>.lock", a separate file so
+  maintenance that rewrites the data file with os.replace keeps working),
+- repairs a torn tail left by a crashed writer (a final line without "\\n" is
+  cut off rather than glued to the next record),
+- appends the whole batch with O_APPEND writes of complete lines,
+- fsyncs, then
+- optionally extends the offsets sidecar "<file>.offsets": one little-endian
+  uint64 byte offset per line, so readers can seek to record N or split a
+  partition into byte ranges without scanning it.
+A sidecar that lags behind the data (crash between the two writes) is caught
+up from the tail; one that does not match is rebuilt.
+
+Several threads may share one writer; several processes may each open their
+own writer on the same file.
+
+Closed weeks can be stored compressed as "<week>.ndjson.gz" or
+"<week>.ndjson.zst" (scripts/compress_docs.py). Those files are a sequence of
+independent gzip members / zstd frames, each holding whole lines, and are
+rewritten atomically rather than appended to. Readers go through
+iter_records()/open_stream(), which detect the format from the magic bytes, so
+plain and compressed files can sit side by side; byte offsets (processed index,
+remove_lines) always refer to the decompressed stream.
+"""
+
+from __future__ import annotations
+
+import glob
+import gzip
+import io
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:  # advisory locks are POSIX-only; elsewhere writers are only safe within one process
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:  # optional: zstd-compressed partitions (gzip needs nothing extra)
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:  # optional: faster line parsing for the readers
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+OFFSET = struct.Struct("<Q")
+CHUNK = 1 << 16
+DOCS_DIR = os.path.join("outputs", "docs")
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+FRAME_BYTES = 1 << 20  # uncompressed bytes per gzip member / zstd frame
+
+
+def lock_path(path: str) -> str:
+    return path + ".lock"
+
+
+def offsets_path(path: str) -> str:
+    return path + ".offsets"
+
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Exclusive advisory lock for the NDJSON file at `path` (blocks until acquired)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        n = os.write(fd, view)
+        view = view[n:]
+
+
+def _line_starts(fd: int, start: int, end: int) -> List[int]:
+    """Byte offsets of the lines that begin in [start, end), given that `start` begins one."""
+    starts, pos = [start], start
+    while pos < end:
+        chunk = os.pread(fd, min(CHUNK, end - pos), pos)
+        if not chunk:
+            break
+        i = chunk.find(b"\n")
+        while i != -1:
+            if pos + i + 1 < end:
+                starts.append(pos + i + 1)
+            i = chunk.find(b"\n", i + 1)
+        pos += len(chunk)
+    return starts if start < end else []
+
+
+def repair_tail(fd: int) -> int:
+    """Cut an unterminated final line (torn write); returns the resulting file size."""
+    size = os.fstat(fd).st_size
+    if size == 0 or os.pread(fd, 1, size - 1) == b"\n":
+        return size
+    pos = size
+    while pos > 0:
+        lo = max(0, pos - CHUNK)
+        i = os.pread(fd, pos - lo, lo).rfind(b"\n")
+        if i != -1:
+            pos = lo + i + 1
+            break
+        pos = lo
+    print(f"[ndjson] dropping {size - pos} byte(s) of a torn final line", file=sys.stderr)
+    os.ftruncate(fd, pos)
+    return pos
+
+
+def sync_offsets(path: str, fd: int, size: int) -> None:
+    """Bring the sidecar in line with the first `size` bytes of the data file (caller holds the lock)."""
+    side = os.open(offsets_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        n = os.fstat(side).st_size // OFFSET.size
+        last = OFFSET.unpack(os.pread(side, OFFSET.size, (n - 1) * OFFSET.size))[0] if n else None
+        sane = last is not None and last < size and (last == 0 or os.pread(fd, 1, last - 1) == b"\n")
+        if sane:
+            missing = _line_starts(fd, last, size)[1:]
+            keep = n
+        else:
+            missing = _line_starts(fd, 0, size)
+            keep = 0
+        os.ftruncate(side, keep * OFFSET.size)
+        if missing:
+            os.pwrite(side, b"".join(OFFSET.pack(o) for o in missing), keep * OFFSET.size)
+    finally:
+        os.close(side)
+
+
+def rebuild_offsets(path: str) -> None:
+    """Regenerate the sidecar of `path` if it has one (after the data file was rewritten)."""
+    if not os.path.exists(offsets_path(path)):
+        return
+    os.remove(offsets_path(path))
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        sync_offsets(path, fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+
+
+def read_offsets(path: str) -> List[int]:
+    try:
+        with open(offsets_path(path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    return [o for (o,) in OFFSET.iter_unpack(data[: len(data) - len(data) % OFFSET.size])]
+
+
+class NdjsonWriter:
+    """
+    Batched, locked, fsynced appends to one NDJSON file.
+
+    write() buffers; the batch is flushed when it reaches `batch_size` records,
+    when the oldest buffered record is `max_delay` seconds old, and on flush()/close().
+    on_write(tag, offset) is called for each record once it is on disk.
+    """
+
+    def __init__(self, path: str, batch_size: int = 32, max_delay: float = 5.0, fsync: bool = True,
+                 offsets: bool = False, on_write: Optional[Callable[[Any, int], None]] = None):
+        if codec_for(path):
+            raise ValueError(f"{path}: compressed partitions are rewritten, not appended to")
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.offsets = offsets
+        self.on_write = on_write
+        self.written = 0
+        self._buf: List[Tuple[bytes, Any]] = []
+        self._since = 0.0
+        self._lock = threading.Lock()
+
+    def write(self, rec: Any, tag: Any = None) -> None:
+        self.write_line((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"), tag)
+
+    def write_line(self, line: bytes, tag: Any = None) -> None:
+        """Queue one already-serialised line (a trailing newline is added if missing)."""
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        with self._lock:
+            if not self._buf:
+                self._since = time.monotonic()
+            self._buf.append((line, tag))
+            due = len(self._buf) >= self.batch_size or time.monotonic() - self._since >= self.max_delay
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._buf = self._buf, []
+            if not batch:
+                return 0
+            with locked(self.path):
+                fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    start = repair_tail(fd)
+                    _write_all(fd, b"".join(line for line, _ in batch))
+                    if self.fsync:
+                        os.fsync(fd)
+                    if self.offsets:
+                        sync_offsets(self.path, fd, os.fstat(fd).st_size)
+                finally:
+                    os.close(fd)
+            self.written += len(batch)
+        if self.on_write is not None:
+            offset = start
+            for line, tag in batch:
+                self.on_write(tag, offset)
+                offset += len(line)
+        return len(batch)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ---- reading and compressed storage ----
+def codec_for(path: str) -> Optional[str]:
+    """Codec implied by the file name ("gzip", "zstd" or None for plain NDJSON)."""
+    for codec, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return None
+
+
+def sniff(path: str) -> Optional[str]:
+    """Codec detected from the first bytes of the file (None for plain or empty files)."""
+    with open(path, "rb") as f:
+        head = f.read(4)
+    for magic, codec in MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def plain_path(path: str) -> str:
+    """"2025-37.ndjson.zst" -> "2025-37.ndjson"."""
+    codec = codec_for(path)
+    return path[: -len(SUFFIXES[codec])] if codec else path
+
+
+def _need_zstd() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstd-compressed NDJSON needs the 'zstandard' package (pip install zstandard)")
+
+
+@contextmanager
+def open_stream(path: str) -> Iterator[io.BufferedIOBase]:
+    """Binary stream of the decompressed content of a plain, gzip or zstd NDJSON file."""
+    codec = sniff(path)
+    raw = open(path, "rb")
+    try:
+        if codec == "gzip":
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")  # reads concatenated members
+        elif codec == "zstd":
+            _need_zstd()
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+            stream = io.BufferedReader(reader, CHUNK)
+        else:
+            stream = raw
+        yield stream
+    finally:
+        raw.close()
+
+
+def iter_lines(path: str) -> Iterator[Tuple[int, bytes]]:
+    """(decompressed byte offset, raw line) for every line of the file."""
+    offset = 0
+    with open_stream(path) as f:
+        for raw in f:
+            yield offset, raw
+            offset += len(raw)
+
+
+def iter_records(paths: Iterable[str], schema: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Parsed records of the given files in order; blank and malformed lines are skipped."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open_stream(path) as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                try:
+                    rec = _loads(raw)
+                except Exception:
+                    continue
+                if isinstance(rec, dict) and (schema is None or rec.get("schema") == schema):
+                    yield rec
+
+
+def docs_files(directory: str = DOCS_DIR) -> List[str]:
+    """Every NDJSON partition under `directory`, plain or compressed, in name order."""
+    files = [p for pattern in ("*.ndjson", "*.ndjson.gz", "*.ndjson.zst")
+             for p in glob.glob(os.path.join(directory, pattern))]
+    return sorted(files)
+
+
+class FrameWriter:
+    """
+    Write-only file object that stores whole lines as independent compressed
+    frames of about `frame_bytes` uncompressed bytes (codec None writes plain).
+    """
+
+    def __init__(self, fileobj, codec: Optional[str], level: Optional[int] = None, frame_bytes: int = FRAME_BYTES):
+        if codec not in (None, *SUFFIXES):
+            raise ValueError(f"unknown codec {codec!r}")
+        if codec == "zstd":
+            _need_zstd()
+            self._zstd = zstandard.ZstdCompressor(level=3 if level is None else level)
+        self.fileobj = fileobj
+        self.codec = codec
+        self.level = level
+        self.frame_bytes = frame_bytes
+        self._buf: List[bytes] = []
+        self._size = 0
+
+    def write(self, line: bytes) -> None:
+        if not self.codec:
+            self.fileobj.write(line)
+            return
+        self._buf.append(line)
+        self._size += len(line)
+        if self._size >= self.frame_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        data = b"".join(self._buf)
+        self._buf, self._size = [], 0
+        if self.codec == "gzip":
+            frame = gzip.compress(data, compresslevel=6 if self.level is None else self.level, mtime=0)
+        else:
+            frame = self._zstd.compress(data)
+        self.fileobj.write(frame)
+
+    def close(self) -> None:
+        self.flush()
+
+
+def rewrite(path: str, sources: Iterable[str], codec: Optional[str], level: Optional[int] = None,
+            edit: Optional[Callable[[int, bytes], Optional[bytes]]] = None) -> int:
+    """
+    Atomically replace `path` with the lines of `sources` (in order, any format)
+    stored as `codec`. edit(offset, line) may return a replacement line or None to
+    drop it, offsets being those of the concatenated decompressed input. Returns
+    the number of lines dropped.
+    """
+    dropped, base = 0, 0
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        out = FrameWriter(f, codec, level)
+        for src in sources:
+            end = base
+            for offset, raw in iter_lines(src):
+                end = base + offset + len(raw)
+                if edit is not None:
+                    raw = edit(base + offset, raw)
+                    if raw is None:
+                        dropped += 1
+                        continue
+                out.write(raw if raw.endswith(b"\n") else raw + b"\n")
+            base = end
+        out.close()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return dropped
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+page_cache.py
+-------------
+Content-addressed cache of the pages process_document.py fetched, so records
+can be re-derived after a change to extract_main/extract_date/the detectors
+without fetching anything again (process_document.py --reprocess).
+
+  cache/pages/
+    ab/abcdef....html.zst    page text (UTF-8, exactly as it was analysed), named by
+                             its sha256 and stored once however many URLs served it
+    manifest.ndjson          one line per fetch:
+      {"url", "final_url", "sha256", "bytes", "status", "headers",
+       "fetched_at", "item": {source, title_hint, published_date_hint}}
+
+Blobs are compressed with zstd when the zstandard package is installed, gzip
+otherwise; either is read back. The manifest is appended through
+ndjson_io.NdjsonWriter, so several processes can fill the same cache. The
+latest fetch of a URL wins. prune() forgets fetches older than a given age
+and deletes the blobs nothing refers to any more, keeping the cache bounded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+from ndjson_io import (SUFFIXES, FrameWriter, NdjsonWriter, iter_records, locked, open_stream, rebuild_offsets,
+                       rewrite, zstandard)
+
+CACHE_DIR = os.path.join("cache", "pages")
+ITEM_KEYS = ("source", "title_hint", "title", "published_date_hint", "published_at")
+
+
+class PageCache:
+    def __init__(self, root: str = CACHE_DIR, codec: Optional[str] = None):
+        self.root = root
+        self.codec = codec or ("zstd" if zstandard is not None else "gzip")
+        self.manifest_path = os.path.join(root, "manifest.ndjson")
+        self._manifest: Optional[NdjsonWriter] = None
+        self.stats = {"stored": 0, "deduplicated": 0}
+        self._lock = threading.Lock()  # fetch threads share one cache
+
+    def blob_path(self, digest: str, codec: Optional[str] = None) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.html{SUFFIXES[codec or self.codec]}")
+
+    def _find(self, digest: str) -> Optional[str]:
+        for codec in SUFFIXES:
+            path = self.blob_path(digest, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    # ---- writing ----
+    def put(self, url: str, final_url: Optional[str], text: str, headers: Optional[Dict[str, str]] = None,
+            status: Optional[int] = None, item: Optional[Dict[str, Any]] = None) -> str:
+        """Store a fetched page (if new) and record the fetch; returns the page's sha256."""
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        stored = self._find(digest) is None
+        if stored:
+            path = self.blob_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                out = FrameWriter(f, self.codec, frame_bytes=len(body) + 1)
+                out.write(body)
+                out.close()
+            os.replace(tmp, path)  # concurrent writers of the same page produce the same bytes
+        with self._lock:
+            self.stats["stored" if stored else "deduplicated"] += 1
+            if self._manifest is None:
+                os.makedirs(self.root, exist_ok=True)
+                self._manifest = NdjsonWriter(self.manifest_path, fsync=False)
+        self._manifest.write({
+            "url": url,
+            "final_url": final_url or url,
+            "sha256": digest,
+            "bytes": len(body),
+            "status": status,
+            "headers": dict(headers or {}),
+            "fetched_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "item": {k: item[k] for k in ITEM_KEYS if item and item.get(k)},
+        })
+        return digest
+
+    def close(self) -> None:
+        if self._manifest is not None:
+            self._manifest.close()
+
+    def prune(self, max_age_days: int) -> Dict[str, int]:
+        """Drop manifest lines fetched more than `max_age_days` ago and every blob no remaining line refers to."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        keep: Set[str] = set()
+
+        def edit(offset: int, raw: bytes) -> Optional[bytes]:
+            try:
+                e = json.loads(raw)
+            except ValueError:
+                return None
+            if (e.get("fetched_at") or "") < cutoff:
+                return None
+            keep.add(e.get("sha256"))
+            return raw
+
+        stats = {"fetches_dropped": 0, "blobs_removed": 0}
+        if not os.path.exists(self.manifest_path):
+            return stats
+        with locked(self.manifest_path):
+            stats["fetches_dropped"] = rewrite(self.manifest_path, [self.manifest_path], None, edit=edit)
+            rebuild_offsets(self.manifest_path)
+            for sub in os.listdir(self.root):
+                folder = os.path.join(self.root, sub)
+                if len(sub) != 2 or not os.path.isdir(folder):
+                    continue
+                for name in os.listdir(folder):
+                    if name.split(".", 1)[0] not in keep:
+                        os.remove(os.path.join(folder, name))
+                        stats["blobs_removed"] += 1
+        return stats
+
+    # ---- reading ----
+    def get(self, digest: str) -> Optional[str]:
+        """Page text for a sha256, or None if the blob is missing."""
+        path = self._find(digest)
+        if path is None:
+            return None
+        with open_stream(path) as f:
+            return f.read().decode("utf-8")
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Latest manifest entry per URL, reachable by both the queued and the final URL."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for e in iter_records([self.manifest_path]):
+            if e.get("sha256"):
+                for key in {e.get("url"), e.get("final_url")} - {None}:
+                    out[key] = e
+        return out
+
+    def lookup(self, entries: Dict[str, Dict[str, Any]], *urls: Optional[str]) -> Optional[Dict[str, Any]]:
+        for url in urls:
+            e = entries.get(url) if url else None
+            if e and self._find(e["sha256"]):
+                return e
+        return None
+
@@ -1,14 +1,42 @@
 #!/usr/bin/env python3
 # Process discovered URLs into normalized document.v2 records (manual-only).
 # Safe to run repeatedly; appends NDJSON per ISO week under outputs/docs/.
-
-import argparse, os, sys, json, re, hashlib
+# --shard i/N only takes the URLs that hash to shard i and writes partial files
+# (outputs/docs/YYYY-WW.shard-i-of-N.ndjson, state/discovery_backlog.shard-i-of-N.json);
+# --merge appends them to the shared files once every shard has run.
+#
+# Items flow through three stages joined by bounded queues (run_pipeline):
+#   fetch threads (per-domain token bucket) -> parse processes (HTML + detectors)
+#   -> summariser threads (LLM calls)
+# so network waits, CPU-bound parsing and LLM latency overlap instead of adding
+# up per item. Records are still written one NDJSON line each, in queue order.
+# state/processed_index.json (doc_index.py) maps URLs and dedupe signatures to
+# their NDJSON line, so documents already ingested are skipped before any fetch
+# or LLM call; --force redoes them, --rebuild-index re-derives it from the files.
+# Lines are appended in locked, fsynced batches by ndjson_io.NdjsonWriter, which
+# also keeps a "<week>.ndjson.offsets" sidecar.
+# Closed weeks may be stored as .ndjson.zst/.ndjson.gz (scripts/compress_docs.py);
+# the current week is always appended as plain NDJSON.
+# Fetched pages are kept in cache/pages (page_cache.py); --reprocess re-derives the
+# extracted fields of every archived record from that cache, without network.
+
+import argparse, os, sys, json, re, glob, time, hashlib, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue
 from datetime import datetime, timezone
 from urllib.parse import urljoin
 import requests
 from bs4 import BeautifulSoup
 from dateutil import parser as dtparse
 
+from host_health import STATE_PATH as HEALTH_PATH, HostHealth, HostUnavailable, merge_shard_ledgers
+from sharding import base_path, in_shard, parse_shard, shard_of, shard_parts, shard_path
+from throttle import DomainThrottle, load_rate_limits
+from doc_index import INDEX_PATH, DocIndex
+from ndjson_io import (NdjsonWriter, codec_for, docs_files, iter_lines, lock_path, locked, offsets_path,
+                       plain_path, rebuild_offsets, rewrite)
+from page_cache import CACHE_DIR, PageCache
+
 # Optional: OpenAI summarisation (falls back automatically)
 USE_OPENAI = True
 try:
@@ -37,9 +65,17 @@ def safe_parse_dt(s):
     except Exception:
         return None
 
-def fetch(url):
-    r = SESSION.get(url, timeout=TIMEOUT)
+HEALTH = None  # HostHealth ledger, loaded in main()
+PAGES = None   # PageCache, opened in main() unless --no-page-cache
+
+def fetch(url, item=None):
+    if HEALTH is not None:
+        r = HEALTH.request(SESSION.get, url, timeout=TIMEOUT)
+    else:
+        r = SESSION.get(url, timeout=TIMEOUT)
     r.raise_for_status()
+    if PAGES is not None:
+        PAGES.put(url, r.url, r.text, headers=r.headers, status=r.status_code, item=item)
     return r.text, r.url
 
 def extract_main(soup):
@@ -76,52 +112,6 @@ def extract_date(soup, hint=None):
             return d
     return datetime.now(timezone.utc)
 
-def detect_doc_type(text):
-    t = text.lower()
-    if "press release" in t or "press" in t[:200]:
-        return "Press_Release"
-    if "call for proposals" in t:
-        return "Call_for_Proposals"
-    if "award" in t and "grant" in t:
-        return "Award/Grant"
-    if "guidance" in t or "guidelines" in t:
-        return "Guidance/Notice"
-    if "report" in t:
-        return "Report"
-    return "Blog/News"
-
-def detect_programme(text, base_domain):
-    labs = set()
-    t = text.lower()
-    if "investeu" in t or "invest eu" in t or "investeu" in base_domain:
-        labs.add("InvestEU")
-    if "european defence fund" in t or "edf" in t:
-        labs.add("EDF")
-    if "european investment bank" in t or "eib" in t:
-        labs.add("EIB")
-    if "european investment fund" in t or "eif" in t:
-        labs.add("EIF")
-    if "asap" in t and "support act" in t.lower():
-        labs.add("ASAP")
-    return sorted(labs) or ["Other/NA"]
-
-def detect_instrument(text):
-    t = text.lower()
-    labs = []
-    if re.search(r"\bgrant(s)?\b", t):
-        labs.append("Grant")
-    if re.search(r"\bguarantee(s)?|guarantee facility\b", t):
-        labs.append("Guarantee")
-    if re.search(r"\bequity\b|\bventure\b|\bfund of funds\b", t):
-        labs.append("Equity/Venture")
-    if re.search(r"\bloan(s)?\b|\bframework loan\b", t):
-        labs.append("Loan")
-    if re.search(r"\bprocurement\b|\btender\b", t):
-        labs.append("Procurement")
-    if re.search(r"\blisting\b|\bipo\b", t):
-        labs.append("Listing/Market")
-    return labs or (["Procurement"] if "tender" in t else [])
-
 TECH_MAP = {
     "AI/Autonomy": r"\bAI\b|\bartificial intelligence\b|\bautonom(y|ous)\b|\bC4ISR\b|\bcommand\b",
     "Advanced_Semiconductors": r"\bsemiconductor|chip|node\b|\bphotonic\b",
@@ -137,29 +127,134 @@ TECH_MAP = {
     "Positioning/Navigation/Timing": r"\bPNT|navigation|GNSS\b"
 }
 
-def detect_tech(text):
-    t = text.lower()
-    labels = []
-    for k, rx in TECH_MAP.items():
-        if re.search(rx, t, flags=re.IGNORECASE):
-            labels.append(k)
-    return labels
-
-def extract_amounts(text):
-    amounts = []
-    for m in re.finditer(r"(€|\bEUR\b)\s*([\d\.,\s]+)\s*(billion|bn|million|mn|m)?", text, flags=re.IGNORECASE):
-        raw = m.group(2).replace(" ", "")
-        unit = (m.group(3) or "").lower()
-        try:
-            val = float(raw.replace(".", "").replace(",", "."))
-        except Exception:
-            continue
-        if unit in ("billion", "bn"):
-            val *= 1_000_000_000
-        elif unit in ("million", "mn", "m"):
-            val *= 1_000_000
-        amounts.append({"amount": val, "currency": "EUR", "label": "stated_value"})
-    return amounts[:5]
+AMOUNT_RE = re.compile(r"(€|\bEUR\b)\s*([\d\.,\s]+)\s*(billion|bn|million|mn|m)?", re.IGNORECASE)
+REGEX_META = set("()[]{}?*+|.^$\\")
+
+def required_literals(pattern):
+    """
+    Literals of which at least one must occur in the text for `pattern` to match
+    (one per top-level alternative), or None if some alternative has no literal prefix.
+    """
+    alts, depth, cur = [], 0, ""
+    for ch in pattern:
+        depth += (ch == "(") - (ch == ")")
+        if ch == "|" and depth == 0:
+            alts.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    alts.append(cur)
+    out = []
+    for alt in alts:
+        alt, prefix = alt.replace(r"\b", ""), ""
+        for ch in alt:
+            if ch in REGEX_META:
+                if ch in "?*{":
+                    prefix = prefix[:-1]  # the quantified char is optional
+                break
+            prefix += ch
+        if not prefix:
+            return None
+        out.append(prefix)
+    return out
+
+class FeatureExtractor:
+    """
+    All document.v2 detectors in one object, compiled once per process.
+
+    The text is lower-cased once; each detector pattern is compiled in lower case
+    without IGNORECASE (so `re` can use its literal fast paths) and guarded by the
+    literals it cannot match without, so a regex only runs when a plain substring
+    test says it might hit. Output is identical to the per-field reference
+    detectors in scripts/bench_features.py.
+    """
+    INSTRUMENTS = [
+        ("Grant", r"\bgrant(s)?\b"),
+        ("Guarantee", r"\bguarantee(s)?|guarantee facility\b"),
+        ("Equity/Venture", r"\bequity\b|\bventure\b|\bfund of funds\b"),
+        ("Loan", r"\bloan(s)?\b|\bframework loan\b"),
+        ("Procurement", r"\bprocurement\b|\btender\b"),
+        ("Listing/Market", r"\blisting\b|\bipo\b"),
+    ]
+    PROGRAMMES = [
+        ("InvestEU", ("investeu", "invest eu")),
+        ("EDF", ("european defence fund", "edf")),
+        ("EIB", ("european investment bank", "eib")),
+        ("EIF", ("european investment fund", "eif")),
+    ]
+
+    def __init__(self, tech_map=None):
+        def compile_all(pairs):
+            out = []
+            for label, rx in pairs:
+                if re.search(r"\\[A-Z]", rx):  # \S, \B, \W ... would change meaning
+                    raise ValueError(f"cannot lower-case detector pattern {rx!r}")
+                out.append((label, re.compile(rx.lower()), required_literals(rx.lower())))
+            return out
+        self.instruments = compile_all(self.INSTRUMENTS)
+        self.tech = compile_all((tech_map or TECH_MAP).items())
+
+    @staticmethod
+    def _hits(t, detectors):
+        return [label for label, rx, lits in detectors
+                if (lits is None or any(l in t for l in lits)) and rx.search(t)]
+
+    @staticmethod
+    def doc_type(t):
+        if "press release" in t or "press" in t[:200]:
+            return "Press_Release"
+        if "call for proposals" in t:
+            return "Call_for_Proposals"
+        if "award" in t and "grant" in t:
+            return "Award/Grant"
+        if "guidance" in t or "guidelines" in t:
+            return "Guidance/Notice"
+        if "report" in t:
+            return "Report"
+        return "Blog/News"
+
+    def programme(self, t, base_domain):
+        labs = {label for label, needles in self.PROGRAMMES if any(n in t for n in needles)}
+        if "investeu" in base_domain:
+            labs.add("InvestEU")
+        if "asap" in t and "support act" in t:
+            labs.add("ASAP")
+        return sorted(labs) or ["Other/NA"]
+
+    @staticmethod
+    def amounts(page_text):
+        if "€" not in page_text and "eur" not in page_text.lower():
+            return []
+        out = []
+        for m in AMOUNT_RE.finditer(page_text):
+            raw = m.group(2).replace(" ", "")
+            unit = (m.group(3) or "").lower()
+            try:
+                val = float(raw.replace(".", "").replace(",", "."))
+            except Exception:
+                continue
+            if unit in ("billion", "bn"):
+                val *= 1_000_000_000
+            elif unit in ("million", "mn", "m"):
+                val *= 1_000_000
+            out.append({"amount": val, "currency": "EUR", "label": "stated_value"})
+            if len(out) == 5:
+                break
+        return out
+
+    def extract(self, text, page_text, base_domain=""):
+        """doc_type, programme, finance_instrument, tech_area and monetary_values in one call."""
+        t = text.lower()
+        instrument = self._hits(t, self.instruments)
+        return {
+            "doc_type": self.doc_type(t),
+            "programme": self.programme(t, base_domain or ""),
+            "instrument": instrument or (["Procurement"] if "tender" in t else []),
+            "tech": self._hits(t, self.tech),
+            "amounts": self.amounts(page_text),
+        }
+
+EXTRACTOR = FeatureExtractor()
 
 # === UPDATED: produce ~500-word newsletter-style intro with a References block ===
 def summarise_150w(title, text, url=None, pub_dt=None):
@@ -228,23 +323,424 @@ def summarise_150w(title, text, url=None, pub_dt=None):
     refs = "\n\nReferences\n• Source" + (ref_date if ref_date else "") + (f" — {src}" if src else "")
     return summary + refs
 
-def week_path():
+def analyse(html, final_url, title_hint=None, published_hint=None):
+    """CPU-bound part of a record (runs in the parse process pool)."""
+    soup = BeautifulSoup(html, "lxml")
+    text = extract_main(soup)
+    return {
+        "title": extract_title(soup) or title_hint or "(untitled)",
+        "text": text,
+        "pub_dt": extract_date(soup, hint=published_hint),
+        **EXTRACTOR.extract(text, soup.get_text(" ", strip=True), base_domain=final_url),
+    }
+
+def signature(url, final_url, f):
+    pub_dt = f["pub_dt"]
+    return sha256((final_url or url) + f["title"] + (pub_dt.isoformat() if pub_dt else ""))
+
+def build_record(it, url, final_url, f, summary):
+    pub_dt = f["pub_dt"]
+    dedupe = signature(url, final_url, f)
+    return {
+        "schema": "document.v2",
+        "source_id": it.get("source") or "investeu_news",
+        "url": final_url or url,
+        "canonical_url": final_url or url,
+        "fetch_time": iso_now(),
+        "language": "en",
+        "title": f["title"],
+        "published_date": pub_dt.isoformat() if pub_dt else iso_now(),
+        "updated_date": None,
+        "doc_type": f["doc_type"],
+        "programme": f["programme"],
+        "finance_instrument": f["instrument"],
+        "stage": None,
+        "actors": [],
+        "tech_area": f["tech"],
+        "monetary_values": f["amounts"],
+        # Field name left unchanged for backwards compatibility
+        "summary_150w": summary,
+        "key_points": [],
+        "implications": {
+            "innovation_direction": [],
+            "capital_structure": [],
+            "regulatory_change": []
+        },
+        "links": {"pdf": [], "dataset": [], "related": []},
+        "celex_id": None,
+        "call_id": None,
+        "award_id": None,
+        "tags": [],
+        "dedupe_signature": dedupe,
+        "embeddings": None,
+        "extraction_notes": None
+    }
+
+_DONE = object()  # end-of-stream marker passed down the queues
+
+def _stage(name, fn, inbox, outbox, workers):
+    """Start `workers` threads applying fn to inbox jobs; non-None results go to outbox."""
+    def work():
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                inbox.put(_DONE)  # let the sibling workers see it too
+                return
+            try:
+                out = fn(job)
+            except Exception as e:  # a dead worker would stall the queues
+                print(f"[process] {name} error: {type(e).__name__}: {e}"[:300], file=sys.stderr)
+                continue
+            if out is not None and outbox is not None:
+                outbox.put(out)  # blocks while the next stage is behind
+    threads = [threading.Thread(target=work, name=f"{name}-{i}", daemon=True) for i in range(max(1, workers))]
+    for t in threads:
+        t.start()
+    return threads
+
+def _finish(threads, outbox=None):
+    for t in threads:
+        t.join()
+    if outbox is not None:
+        outbox.put(_DONE)
+
+class OrderedWriter:
+    """Hands records to the NDJSON writer in input order as soon as their predecessors are done."""
+    def __init__(self, path, index=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ready = {}
+        self.next = 0
+        self.urls = []
+        on_write = None
+        if index is not None:
+            on_write = lambda tag, offset: index.add(tag[0], path, offset, tag[1])  # once durable
+        self.out = NdjsonWriter(path, offsets=True, on_write=on_write)
+
+    def done(self, idx, rec=None, aliases=()):
+        with self.lock:
+            self.ready[idx] = (rec, aliases) if rec is not None else None
+            recs = []
+            while self.next in self.ready:
+                recs.append(self.ready.pop(self.next))
+                self.next += 1
+            self._write(recs)
+
+    def close(self):
+        """Write whatever is still held back behind an item that never reported, then flush."""
+        with self.lock:
+            self._write([self.ready.pop(idx) for idx in sorted(self.ready)])
+        self.out.close()
+
+    def _write(self, recs):
+        for r in recs:
+            if r is not None:
+                self.out.write(r[0], tag=r)
+                self.urls.append(r[0]["url"])
+
+def run_pipeline(items, out_file, throttle, fetch_workers=8, parse_workers=2, llm_workers=4, queue_size=16,
+                 index=None, force=False):
+    """
+    Fetch/parse/summarise `items` into out_file. With an index, documents already
+    in the NDJSON files are skipped before the parse (redirect target known) or
+    the LLM call (same dedupe signature); with force=True they are redone and the
+    superseded lines are returned in "superseded" for DocIndex.drop().
+    """
+    t0 = time.monotonic()
+    writer = OrderedWriter(out_file, index)
+    deferred, superseded, lock = [], [], threading.Lock()
+    known = {"after_fetch": 0, "after_parse": 0}
+
+    def already_done(stage, url, *keys):
+        """True to skip a document the index already has (unless --force)."""
+        if index is None:
+            return False
+        if force:
+            old = index.locate(*keys)
+            if old:
+                with lock:
+                    superseded.append(old)
+            return not index.claim(*keys, ignore_indexed=True)
+        if index.claim(*keys):
+            return False
+        with lock:
+            known[stage] += 1
+        print(f"[process] already processed {url}", file=sys.stderr)
+        return True
+    busy = {"fetch": 0.0, "parse": 0.0, "summarise": 0.0}
+
+    def timed(stage, fn, *a, **kw):
+        t = time.monotonic()
+        try:
+            return fn(*a, **kw)
+        finally:
+            with lock:
+                busy[stage] += time.monotonic() - t
+
+    def do_fetch(job):
+        idx, it = job
+        url = it.get("url")
+        try:
+            if HEALTH is not None:
+                ok, why = HEALTH.allow(url)
+                if not ok:  # don't wait for a token we are not going to use
+                    raise HostUnavailable(why)
+            throttle.acquire(url)
+            html, final_url = timed("fetch", fetch, url, it)
+            if final_url and final_url != url and not force and index is not None and index.locate(final_url):
+                with lock:
+                    known["after_fetch"] += 1
+                print(f"[process] already processed {url} (as {final_url})", file=sys.stderr)
+            else:
+                return idx, it, html, final_url
+        except HostUnavailable as e:
+            with lock:
+                deferred.append((idx, it))
+            print(f"[process] deferred {url}: {e}", file=sys.stderr)
+        except Exception as e:
+            print(f"[process] skipped {url}: {type(e).__name__}: {e}"[:300], file=sys.stderr)
+        writer.done(idx)
+
+    # spawn, not fork: the pool starts workers lazily while our threads hold locks
+    pool = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) \
+        if parse_workers > 0 else None
+
+    def do_parse(job):
+        idx, it, html, final_url = job
+        hints = (it.get("title_hint") or it.get("title"), it.get("published_date_hint") or it.get("published_at"))
+        try:
+            if pool is not None:
+                f = timed("parse", lambda: pool.submit(analyse, html, final_url, *hints).result())
+            else:
+                f = timed("parse", analyse, html, final_url, *hints)
+            if not already_done("after_parse", it.get("url"), it.get("url"), final_url, signature(it.get("url"), final_url, f)):
+                return idx, it, final_url, f
+        except Exception as e:
+            print(f"[process] parse failed {it.get('url')}: {type(e).__name__}: {e}"[:300], file=sys.stderr)
+        writer.done(idx)
+
+    def do_summarise(job):
+        idx, it, final_url, f = job
+        url = it.get("url")
+        try:
+            # pass URL + date so the summary can cite them
+            summary = timed("summarise", summarise_150w, f["title"], f["text"], url=(final_url or url), pub_dt=f["pub_dt"])
+            writer.done(idx, build_record(it, url, final_url, f, summary), aliases=(url,))
+        except Exception as e:
+            print(f"[process] summary failed {url}: {type(e).__name__}: {e}"[:300], file=sys.stderr)
+            writer.done(idx)
+
+    todo, fetched, parsed = Queue(), Queue(maxsize=queue_size), Queue(maxsize=queue_size)
+    for job in enumerate(items):
+        todo.put(job)
+    todo.put(_DONE)
+    try:
+        fetchers = _stage("fetch", do_fetch, todo, fetched, fetch_workers)
+        parsers = _stage("parse", do_parse, fetched, parsed, parse_workers or fetch_workers)
+        summarisers = _stage("summarise", do_summarise, parsed, None, llm_workers)
+        _finish(fetchers, fetched)
+        _finish(parsers, parsed)
+        _finish(summarisers)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+
+    wall = time.monotonic() - t0
+    timing = (f"{len(items)} item(s) in {wall:.1f}s; busy time fetch {busy['fetch']:.1f}s, "
+              f"parse {busy['parse']:.1f}s, summarise {busy['summarise']:.1f}s "
+              f"(workers {fetch_workers}/{parse_workers}/{llm_workers})")
+    return {"processed": len(writer.urls), "already_processed": sum(known.values()), "ndjson": out_file,
+            "urls": writer.urls, "deferred": [it for _, it in sorted(deferred, key=lambda d: d[0])],
+            "superseded": superseded, "timing": timing}
+
+def week_path(shard=None):
     now = datetime.now(timezone.utc).isocalendar()
     year, week = now[0], now[1]
     os.makedirs("outputs/docs", exist_ok=True)
-    return f"outputs/docs/{year}-{week:02d}.ndjson"
+    return shard_path(f"outputs/docs/{year}-{week:02d}.ndjson", shard)
 
 def sha256(s):
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+BACKLOG_PATH = "state/discovery_backlog.json"
+BACKLOG_CAP = 1000
+
+def load_backlog(path=BACKLOG_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+def save_backlog(items, path=BACKLOG_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items[:BACKLOG_CAP], f, ensure_ascii=False)
+
+def merge_shards():
+    """Append shard NDJSON parts to their weekly files and rebuild the shared backlog from shard backlogs."""
+    merged_docs = 0
+    for part in sorted(glob.glob("outputs/docs/*.shard-*-of-*.ndjson")):
+        with open(part, "rb") as rf, NdjsonWriter(base_path(part), batch_size=1000, offsets=True) as out:
+            for line in rf:
+                if line.strip():
+                    out.write_line(line)
+                    merged_docs += 1
+        for f in (part, offsets_path(part), lock_path(part)):
+            if os.path.exists(f):
+                os.remove(f)
+
+    parts = shard_parts(BACKLOG_PATH)
+    if parts:
+        # a shard's part replaces its slice of the shared backlog; shards that
+        # did not run keep their slice as it was
+        count = max(n for _, n, _ in parts)
+        by_index = {i: f for i, n, f in parts if n == count}
+        shared = load_backlog()
+        backlog, seen_urls = [], set()
+        for k in range(count):
+            items = load_backlog(by_index[k]) if k in by_index else \
+                [it for it in shared if shard_of(it.get("url") or "", count) == k]
+            for it in items:
+                url = it.get("url")
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    backlog.append(it)
+        save_backlog(backlog)
+        for _, _, f in parts:
+            os.remove(f)
+
+    ledgers = merge_shard_ledgers()
+    # shard indexes point into the part files that were just appended: re-derive from the NDJSON
+    index = DocIndex()
+    index.rebuild()
+    index.save()
+    for _, _, f in shard_parts(INDEX_PATH):
+        os.remove(f)
+    print(json.dumps({"merged_docs": merged_docs, "backlog_shards": len(parts), "health_shards": ledgers}))
+
+# Fields --reprocess recomputes; the summary, fetch_time and anything added later are kept
+EXTRACTED_FIELDS = ("title", "published_date", "doc_type", "programme", "finance_instrument",
+                    "tech_area", "monetary_values", "dedupe_signature")
+
+def reanalyse(root, digest, final_url, title_hint=None, published_hint=None):
+    """analyse() on a cached page (runs in the reprocess pool)."""
+    html = PageCache(root).get(digest)
+    return None if html is None else analyse(html, final_url, title_hint, published_hint)
+
+def rederive(old, f, started):
+    """`old` with its extracted fields recomputed from analyse() output `f`."""
+    url = old.get("url")
+    fresh = build_record({"source": old.get("source_id")}, url, url, f, old.get("summary_150w"))
+    # no date on the page: extract_date fell back to "now", so keep the date (and signature) of the first run
+    undated = f["pub_dt"] is None or f["pub_dt"] >= started
+    rec = dict(old)
+    for k in EXTRACTED_FIELDS:
+        if not (undated and k in ("published_date", "dedupe_signature")):
+            rec[k] = fresh[k]
+    return rec
+
+def reprocess(cache, workers):
+    """Rebuild the extracted fields of every archived record whose page is cached; no network."""
+    t0, started = time.monotonic(), datetime.now(timezone.utc)
+    entries = cache.entries()
+    jobs, stats = [], {"records": 0, "not_cached": 0, "failed": 0, "changed": 0}
+    for path in docs_files():
+        for offset, raw in iter_lines(path):
+            try:
+                rec = json.loads(raw)
+            except Exception:
+                continue
+            if not isinstance(rec, dict) or rec.get("schema") != "document.v2":
+                continue
+            stats["records"] += 1
+            e = cache.lookup(entries, rec.get("url"), rec.get("canonical_url"))
+            if e is None:
+                stats["not_cached"] += 1
+                continue
+            it = e.get("item") or {}
+            hints = (it.get("title_hint") or it.get("title"), it.get("published_date_hint") or it.get("published_at"))
+            jobs.append((path, offset, raw, rec, (cache.root, e["sha256"], e.get("final_url") or rec.get("url"), *hints)))
+
+    edits = {}  # path -> {offset: (old line, new line)}
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(reanalyse, *args) for *_, args in jobs]
+        for (path, offset, raw, rec, _), fut in zip(jobs, futures):
+            try:
+                f = fut.result()
+            except Exception as e:
+                f = None
+                print(f"[reprocess] {rec.get('url')}: {type(e).__name__}: {e}"[:300], file=sys.stderr)
+            if f is None:
+                stats["failed"] += 1
+                continue
+            new = rederive(rec, f, started)
+            if new != rec:
+                line = (json.dumps(new, ensure_ascii=False) + "\n").encode("utf-8")
+                edits.setdefault(path, {})[offset] = (raw, line)
+
+    for path, changes in edits.items():
+        # a line that moved or changed since it was read is left alone
+        def edit(offset, raw, changes=changes):
+            old, new = changes.get(offset, (None, None))
+            return new if raw == old else raw
+        with locked(plain_path(path)):
+            rewrite(path, [path], codec_for(path), edit=edit)
+            rebuild_offsets(path)
+        stats["changed"] += len(changes)
+    if edits:
+        index = DocIndex.load()
+        index.reindex(edits)  # signatures and offsets may have moved
+        index.save()
+    stats["files"] = sorted(edits)
+    stats["seconds"] = round(time.monotonic() - t0, 1)
+    return stats
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--from", dest="queue", required=False, default="state/latest_discovery.json",
                     help="path to discovery aggregate json")
     ap.add_argument("--limit", type=int, default=5)
     ap.add_argument("--config", default="config_v2.yaml")  # accept & ignore to match workflow
+    ap.add_argument("--fetch-workers", type=int, default=8, help="concurrent page fetches (per-domain rate limits still apply)")
+    ap.add_argument("--parse-workers", type=int, default=os.cpu_count() or 2,
+                    help="processes for HTML parsing/feature extraction (0 = parse in the fetch threads)")
+    ap.add_argument("--llm-workers", type=int, default=4, help="concurrent summarisation calls")
+    ap.add_argument("--force", action="store_true",
+                    help="reprocess documents already in outputs/docs (their old lines are replaced)")
+    ap.add_argument("--rebuild-index", action="store_true",
+                    help="rebuild state/processed_index.json from outputs/docs/*.ndjson (drops duplicate lines)")
+    ap.add_argument("--reprocess", action="store_true",
+                    help="re-derive extracted fields of outputs/docs records from cached pages (no network)")
+    ap.add_argument("--no-page-cache", action="store_true", help=f"do not store fetched pages in {CACHE_DIR}")
+    ap.add_argument("--prune-page-cache", type=int, default=None, metavar="DAYS",
+                    help=f"forget pages in {CACHE_DIR} fetched more than DAYS ago and exit")
+    ap.add_argument("--shard", default=None, help="only process URLs of shard i of N, e.g. 0/4")
+    ap.add_argument("--merge", action="store_true", help="merge --shard outputs into the shared files")
     args = ap.parse_args()
 
+    try:
+        shard = parse_shard(args.shard)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.merge:
+        merge_shards()
+        return
+    if args.rebuild_index:
+        index = DocIndex()
+        stats = index.rebuild()
+        index.save()
+        print(json.dumps({"index_keys": len(index), **stats}))
+        return
+    if args.prune_page_cache is not None:
+        print(json.dumps(PageCache().prune(args.prune_page_cache)))
+        return
+    if args.reprocess:
+        print(json.dumps(reprocess(PageCache(), args.parse_workers)))
+        return
+
     if not os.path.exists(args.queue):
         print(json.dumps({"processed": 0, "reason": "no discovery file"}))
         return
@@ -252,80 +748,55 @@ def main():
     with open(args.queue, "r", encoding="utf-8") as f:
         agg = json.load(f)
 
-    items = []
+    # weekly_discover writes a flat top-level "items" list; older aggregates nested them per source
+    queued = list(agg.get("items") or [])
     for src in agg.get("sources", []):
-        for it in src.get("items", []):
-            items.append(it)
-    items = items[: args.limit]
-
-    out_file = week_path()
-    processed = 0
-    written_urls = []
-
-    for it in items:
+        if isinstance(src, dict):
+            queued.extend(src.get("items", []))
+
+    # Discovery emits each URL only once, so whatever doesn't fit under --limit
+    # is carried over to the next run instead of being dropped.
+    backlog_path = shard_path(BACKLOG_PATH, shard)
+    backlog = load_backlog(backlog_path if os.path.exists(backlog_path) else BACKLOG_PATH)
+    # already in outputs/docs: skipped before any network or LLM work
+    index = DocIndex.load(shard_path(INDEX_PATH, shard), fallback=INDEX_PATH)
+    if not os.path.exists(index.path) and not os.path.exists(INDEX_PATH):
+        stats = index.rebuild()  # fresh checkout: recover the index from outputs/docs
+        index.save()
+        print(f"[index] rebuilt {index.path}: {len(index)} keys from {stats['records']} records")
+    queue, seen_urls, known = [], set(), 0
+    for it in backlog + queued:
         url = it.get("url")
-        title_hint = it.get("title_hint")
-        published_hint = it.get("published_date_hint")
-        try:
-            html, final_url = fetch(url)
-            soup = BeautifulSoup(html, "lxml")
-            title = extract_title(soup) or title_hint or "(untitled)"
-            text = extract_main(soup)
-            pub_dt = extract_date(soup, hint=published_hint)
-            doc_type = detect_doc_type(text)
-            programme = detect_programme(text, base_domain=final_url)
-            instrument = detect_instrument(text)
-            tech = detect_tech(text)
-            amounts = extract_amounts(soup.get_text(" ", strip=True))
-            # === UPDATED CALL: pass URL + date so the summary can cite them ===
-            summary = summarise_150w(title, text, url=(final_url or url), pub_dt=pub_dt)
-            dedupe = sha256((final_url or url) + title + (pub_dt.isoformat() if pub_dt else ""))
-
-            rec = {
-                "schema": "document.v2",
-                "source_id": "investeu_news",
-                "url": final_url or url,
-                "canonical_url": final_url or url,
-                "fetch_time": iso_now(),
-                "language": "en",
-                "title": title,
-                "published_date": pub_dt.isoformat() if pub_dt else iso_now(),
-                "updated_date": None,
-                "doc_type": doc_type,
-                "programme": programme,
-                "finance_instrument": instrument,
-                "stage": None,
-                "actors": [],
-                "tech_area": tech,
-                "monetary_values": amounts,
-                # Field name left unchanged for backwards compatibility
-                "summary_150w": summary,
-                "key_points": [],
-                "implications": {
-                    "innovation_direction": [],
-                    "capital_structure": [],
-                    "regulatory_change": []
-                },
-                "links": {"pdf": [], "dataset": [], "related": []},
-                "celex_id": None,
-                "call_id": None,
-                "award_id": None,
-                "tags": [],
-                "dedupe_signature": dedupe,
-                "embeddings": None,
-                "extraction_notes": None
-            }
-
-            with open(out_file, "a", encoding="utf-8") as wf:
-                wf.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-            processed += 1
-            written_urls.append(final_url or url)
-
-        except Exception:
-            continue
-
-    print(json.dumps({"processed": processed, "ndjson": out_file, "urls": written_urls}, ensure_ascii=False))
+        if url and url not in seen_urls and in_shard(url, shard):
+            seen_urls.add(url)
+            if not args.force and index.locate(url):
+                known += 1
+                continue
+            queue.append(it)
+    items, rest = queue[: args.limit], queue[args.limit:]
+
+    global HEALTH, PAGES
+    HEALTH = HostHealth.load(shard_path(HEALTH_PATH, shard), fallback=HEALTH_PATH)
+    PAGES = None if args.no_page_cache else PageCache()
+
+    rps, _ = load_rate_limits(args.config)
+    stats = run_pipeline(items, week_path(shard), DomainThrottle(rps, health=HEALTH),
+                         fetch_workers=args.fetch_workers, parse_workers=args.parse_workers,
+                         llm_workers=args.llm_workers, index=index, force=args.force)
+    deferred = stats.pop("deferred")
+    superseded = stats.pop("superseded")
+    if superseded:
+        stats["replaced"] = index.drop(superseded)
+    index.save()
+    stats["already_processed"] += known
+
+    save_backlog(deferred + rest, backlog_path)
+    HEALTH.save()
+    if PAGES is not None:
+        PAGES.close()
+        stats["pages_cached"] = PAGES.stats["stored"]
+    print(f"[process] {stats.pop('timing')}", file=sys.stderr)
+    print(json.dumps({**stats, "deferred": len(deferred)}, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 # Bridge: v2 -> legacy site payloads (root én /site), met taxonomy uit config.yml.
 
-import os, json, glob, re, yaml
+import os, sys, json, glob, re, yaml
 from datetime import datetime, timedelta, timezone
 from dateutil import parser as dtparse
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+import site_shards
+from ndjson_io import docs_files, iter_records
+
 ROOT_DIR = "docs"
 SITE_DIR = "docs/site"
 DATA_DIR = "docs/data"
 CONFIG_YAML = "config.yml"
 
-NDJSON_GLOB = "outputs/docs/*.ndjson"
+DOCS_DIR = "outputs/docs"  # *.ndjson, *.ndjson.gz, *.ndjson.zst
 TIMELINE_GLOB = "outputs/timelines/*.json"
 DAILY_LATEST = "docs/digests/latest.json"
 
@@ -39,20 +43,8 @@ def parse_dt(s):
     except Exception:
         return None
 
-def load_ndjson(glob_pat):
-    recs = []
-    for path in sorted(glob.glob(glob_pat)):
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line=line.strip()
-                if not line: continue
-                try:
-                    obj = json.loads(line)
-                    if obj.get("schema") == "document.v2":
-                        recs.append(obj)
-                except Exception:
-                    continue
-    return recs
+def load_ndjson(directory):
+    return list(iter_records(docs_files(directory), schema="document.v2"))
 
 def latest_file(glob_pat):
     files = sorted(glob.glob(glob_pat), key=lambda p: os.path.getmtime(p), reverse=True)
@@ -134,7 +126,7 @@ def main():
     taxonomy = load_taxonomy()
 
     # Live feed: laatste 30 dagen
-    records = load_ndjson(NDJSON_GLOB)
+    records = load_ndjson(DOCS_DIR)
     cutoff = now - timedelta(days=30)
     recent = []
     for r in records:
@@ -160,8 +152,10 @@ def main():
             digest_latest = json.load(f)
 
     # Schrijf site + root (legacy)
-    write_json({"generated_at": now.isoformat(), "items": live_items},
-               f"{SITE_DIR}/live.json", f"{ROOT_DIR}/live.json")
+    live = {"generated_at": now.isoformat(), "items": live_items}
+    write_json(live, f"{SITE_DIR}/live.json")
+    site_shards.publish(live_items, f"{ROOT_DIR}/live.json", legacy_obj=live,
+                        meta={"generated_at": live["generated_at"]}, indent=None)
     write_json({"generated_at": now.isoformat(), "items": key_items},
                f"{SITE_DIR}/key-items.json", f"{ROOT_DIR}/key-items.json")
     write_json(reports_timeline,
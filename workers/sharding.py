@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+sharding.py
+-----------
+Split discovery/processing work across N parallel workers (a workflow matrix or
+several local processes) with `--shard i/N`, i in 0..N-1.
+
+Keys (source names in weekly_discover.py, URLs in process_document.py) are
+assigned with jump consistent hashing, so the assignment is stable across runs
+and machines, and growing N from 4 to 5 only moves ~1/5 of the keys instead of
+reshuffling almost all of them like `hash % N` would.
+
+Each shard writes partial files next to the shared ones:
+
+  state/latest_discovery.json  ->  state/latest_discovery.shard-0-of-4.json
+
+and a merge step (`--merge`) folds the parts back into the shared file and
+removes them.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import re
+from typing import List, Optional, Tuple
+
+Shard = Tuple[int, int]  # (index, count)
+
+PART_RE = re.compile(r"\.shard-(\d+)-of-(\d+)(\.[^.]+)$")
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Shard]:
+    """'2/4' -> (2, 4); None/'' -> None (no sharding)."""
+    if not spec:
+        return None
+    m = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec)
+    if not m:
+        raise ValueError(f"--shard expects i/N (e.g. 0/4), got {spec!r}")
+    i, n = int(m.group(1)), int(m.group(2))
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"--shard {spec}: index must be in 0..N-1")
+    return i, n
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping & Veach jump consistent hash: 64-bit key -> bucket in [0, buckets)."""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def shard_of(key: str, count: int) -> int:
+    digest = hashlib.sha1((key or "").encode("utf-8", "ignore")).digest()
+    return jump_hash(int.from_bytes(digest[:8], "big"), count)
+
+
+def in_shard(key: str, shard: Optional[Shard]) -> bool:
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+
+def shard_path(path: str, shard: Optional[Shard]) -> str:
+    """Partial-file path for a shard ('x/name.json' -> 'x/name.shard-i-of-N.json')."""
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard[0]}-of-{shard[1]}{ext}"
+
+
+def shard_parts(path: str) -> List[Tuple[int, int, str]]:
+    """Existing partial files for `path` as (index, count, file), in shard order."""
+    root, ext = os.path.splitext(path)
+    parts = []
+    for f in glob.glob(f"{glob.escape(root)}.shard-*-of-*{ext}"):
+        m = PART_RE.search(f)
+        if m and m.group(3) == ext:
+            parts.append((int(m.group(1)), int(m.group(2)), f))
+    return sorted(parts)
+
+
+def base_path(part: str) -> str:
+    """Inverse of shard_path: 'x/name.shard-i-of-N.json' -> 'x/name.json'."""
+    return PART_RE.sub(r"\3", part)
+
+
+def missing_shards(parts: List[Tuple[int, int, str]]) -> List[str]:
+    """Human-readable list of shards absent from a set of parts (by the largest N seen)."""
+    if not parts:
+        return []
+    count = max(n for _, n, _ in parts)
+    have = {i for i, n, _ in parts if n == count}
+    return [f"{i}/{count}" for i in range(count) if i not in have]
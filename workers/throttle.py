@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+throttle.py
+-----------
+Per-domain politeness shared by weekly_discover.py and process_document.py:
+a token bucket per host (DomainThrottle) and the `rate_limits:` config block
+
+  rate_limits:
+    per_domain_rps: 0.7     # requests per second per host
+    max_concurrency: 4      # worker threads
+
+HostHealth (host_health.py) can slow individual hosts down further.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import yaml
+
+from host_health import HostHealth
+
+DEFAULT_PER_DOMAIN_RPS = 0.7
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def load_rate_limits(config_path: Optional[str]) -> Tuple[float, int]:
+    """(per_domain_rps, max_concurrency) from config `rate_limits`, with defaults."""
+    rl: Dict[str, Any] = {}
+    if config_path and os.path.exists(config_path):
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                rl = (yaml.safe_load(f) or {}).get("rate_limits") or {}
+        except Exception as e:
+            print(f"[throttle] could not read rate_limits from {config_path}: {e}", file=sys.stderr)
+    rps = float(rl.get("per_domain_rps") or DEFAULT_PER_DOMAIN_RPS)
+    workers = int(rl.get("max_concurrency") or DEFAULT_MAX_CONCURRENCY)
+    return max(rps, 0.01), max(workers, 1)
+
+
+class DomainThrottle:
+    """
+    Per-domain token bucket shared by all worker threads. Each host refills at
+    `rps` tokens per second up to `burst`; acquire() blocks only the caller,
+    so requests to other domains keep flowing. Hosts that have been answering
+    429/503 refill proportionally slower (HostHealth.throttle).
+    """
+
+    def __init__(self, rps: float = DEFAULT_PER_DOMAIN_RPS, burst: float = 1.0,
+                 health: Optional[HostHealth] = None):
+        self.rps = rps
+        self.burst = burst
+        self.health = health
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, last refill)
+
+    def acquire(self, url: str) -> None:
+        host = (urlparse(url).hostname or "").lower()
+        rps = self.rps / (self.health.throttle(host) if self.health is not None else 1.0)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * rps)
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1.0 - tokens) / rps
+            time.sleep(wait)
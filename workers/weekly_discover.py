@@ -34,22 +34,43 @@ USAGE (as in your workflow):
 Notes:
 - Uses `feedparser` first for feeds (robust), and falls back to tolerant BeautifulSoup.
 - Never lets a single broken source crash the run; errors are logged and the loop continues.
+- Sources are fetched concurrently (rate_limits.max_concurrency threads) while a per-domain
+  token bucket (rate_limits.per_domain_rps) keeps each host at a polite request rate.
+  Results are merged in source order, so the output does not depend on timing.
+- Listing pages are parsed once with lxml; each source's selectors are compiled to XPath
+  once (ExtractionPlan) and titles/dates are resolved relative to each item node.
+- `type: sitemap` sources stream sitemap.xml / sitemap indexes (optionally gzipped) with an
+  incremental parser and keep only URLs whose <lastmod> falls inside the window.
+- A per-host health ledger (state/host_health.json, see host_health.py) backs off on
+  failures, honours Retry-After, slows throttling hosts down and quarantines dead ones.
+- Per-source high-water marks (state/discovery/<source>.json) remember which URLs were
+  already emitted, so each run only queues genuinely new items (--full ignores them).
+- `--shard i/N` processes only the sources that hash to shard i (see sharding.py) and
+  writes state/latest_discovery.shard-i-of-N.json plus a shard host-health ledger;
+  `--merge` then folds all shard files into state/latest_discovery.json with the same
+  URL dedupe as a single run:
+    python workers/weekly_discover.py --window 1d --config config_v2.yaml --shard 0/4   # ... 3/4
+    python workers/weekly_discover.py --merge
 - If everything fails, it still writes a valid (empty) state file so the pipeline continues.
 """
 
 from __future__ import annotations
 
 import argparse
+import gzip
 import hashlib
+import io
 import json
 import os
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse, urlunparse
+import xml.etree.ElementTree as ET
 
 import requests
 import feedparser  # tolerant feed parser
@@ -57,9 +78,21 @@ from bs4 import BeautifulSoup  # tolerant HTML/XML via helper below
 from dateutil import parser as dateparse
 import yaml
 
+from host_health import STATE_PATH as HEALTH_PATH, HostHealth, HostUnavailable, merge_shard_ledgers
+from sharding import in_shard, missing_shards, parse_shard, shard_parts, shard_path
+from throttle import DomainThrottle, load_rate_limits
+
+try:  # compiled per-source extraction; falls back to BeautifulSoup when missing
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except Exception:
+    CSSSelector = None
+
 USER_AGENT = "Mozilla/5.0 (compatible; PipelineV2/1.0; +https://example.com)"
 REQ_TIMEOUT = 20
 MAX_HTML_LINKS = 200  # soft cap per page
+MAX_SITEMAP_URLS = 2000  # cap on in-window URLs taken from one sitemap source
+OUT_PATH = os.path.join("state", "latest_discovery.json")
 
 
 # -------------------------- helpers: parsing & robustness --------------------------
@@ -150,7 +183,7 @@ def within_window(iso_str: str, cutoff_utc: datetime) -> bool:
 class Source:
     name: str
     url: str
-    type: Optional[str] = None  # "feed" | "html" | None=auto
+    type: Optional[str] = None  # "feed" | "html" | "html_list" | "sitemap" | None=auto
     selector: Optional[str] = None  # CSS selector for links/items (HTML)
     link_attr: Optional[str] = None  # e.g. "href"
     title_selector: Optional[str] = None
@@ -160,16 +193,37 @@ class Source:
     tags: Optional[List[str]] = None
     enabled: bool = True
     base: Optional[str] = None  # override base for relative URLs
+    # sources_v2 schema (see docs/adding_sources)
+    list_selectors: Optional[List[str]] = None  # tried in order; first one with matches wins
+    date_selectors: Optional[List[str]] = None  # resolved per item; "css::attr(name)" reads an attribute
+    next_selector: Optional[str] = None
+    max_pages: int = 1
+    include_patterns: Optional[List[str]] = None  # substrings; a link must contain one of them
+    exclude_patterns: Optional[List[str]] = None  # substrings; a link containing any is dropped
+    max_sitemaps: int = 20  # sitemap mode: sitemap files fetched per run (index + children)
+    keep_undated: bool = False  # sitemap mode: also take <url> entries without <lastmod>
 
     @staticmethod
     def from_any(x: Any) -> Optional["Source"]:
         if isinstance(x, str):
             return Source(name=urlparse(x).netloc or x, url=x)
         if isinstance(x, dict):
-            url = (x.get("url") or "").strip()
+            url = (x.get("url") or x.get("base_url") or "").strip()
             if not url:
                 return None
-            name = (x.get("name") or urlparse(url).netloc or url).strip()
+            name = (x.get("name") or x.get("source_id") or urlparse(url).netloc or url).strip()
+            disc = x.get("discover") or {}
+            pages = disc.get("pagination") or {}
+            smap = disc.get("sitemap") or {}
+
+            list_selectors = list(disc.get("list_selectors") or [])
+            if x.get("selector"):
+                list_selectors.insert(0, x["selector"])
+            date_selectors = list(disc.get("date_selectors") or [])
+            if x.get("time_selector"):
+                legacy = x["time_selector"] + (f"::attr({x['time_attr']})" if x.get("time_attr") else "")
+                date_selectors.insert(0, legacy)
+
             return Source(
                 name=name,
                 url=url,
@@ -183,6 +237,14 @@ class Source:
                 tags=x.get("tags") or None,
                 enabled=bool(x.get("enabled", True)),
                 base=x.get("base") or None,
+                list_selectors=list_selectors or None,
+                date_selectors=date_selectors or None,
+                next_selector=pages.get("next_selector") or None,
+                max_pages=max(1, int(pages.get("max_pages") or 1)),
+                include_patterns=list(disc.get("include_url_patterns") or x.get("include_url_patterns") or []) or None,
+                exclude_patterns=list(disc.get("exclude_url_patterns") or x.get("exclude_url_patterns") or []) or None,
+                max_sitemaps=max(1, int(smap.get("max_sitemaps") or 20)),
+                keep_undated=bool(smap.get("keep_undated", False)),
             )
         return None
 
@@ -221,10 +283,132 @@ def pick_sources(sources_path: Optional[str], config_path: Optional[str]) -> Lis
     return list(uniq.values())
 
 
+# ------------------------------ per-source discovery state ------------------------------
+
+STATE_DIR = os.path.join("state", "discovery")
+SEEN_CAP = 5000  # fingerprints kept per source (most recent first_seen wins)
+
+
+class SourceState:
+    """
+    state/discovery/<source>.json:
+      {"source", "updated_at",
+       "windows": {<window>: {"latest_published", "page_hash", "checked_at"}},
+       "seen": {<url fingerprint>: <first emitted ISO>}}
+
+    `page_hash` covers the links found on the first listing page; when it is
+    unchanged the source has nothing new and no further work is done. It is
+    only recorded once the whole listing was crawled. The high-water marks are
+    kept per window: a 1d run has only emitted the last day, so its marks must
+    not cut short a 7d run sharing the same state. `seen` is shared, but only
+    URLs emitted before this window's previous run (`checked_at`) stop paging.
+    """
+
+    def __init__(self, name: str, path: str, window: str = ""):
+        self.name = name
+        self.path = path
+        self.window = window
+        self.seen: Dict[str, str] = {}
+        self.windows: Dict[str, Dict[str, str]] = {}
+        self.latest_published = ""
+        self.page_hash = ""
+        self.checked_at = ""
+        self.failed = False  # processing raised: leave the state file as it was
+
+    @classmethod
+    def load(cls, name: str, window: str = "") -> "SourceState":
+        st = cls(name, os.path.join(STATE_DIR, re.sub(r"[^\w.-]+", "_", name) + ".json"), window)
+        try:
+            with open(st.path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+            st.seen = dict(data.get("seen") or {})
+            st.windows = dict(data.get("windows") or {})
+            marks = st.windows.get(window) or {}
+            st.latest_published = marks.get("latest_published") or ""
+            st.page_hash = marks.get("page_hash") or ""
+            st.checked_at = marks.get("checked_at") or ""
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[discover] ignoring unreadable state {st.path}: {e}", file=sys.stderr)
+        return st
+
+    @staticmethod
+    def fingerprint(url: str) -> str:
+        return stable_id(normalize_url("", url))[:16]
+
+    def is_seen(self, url: str) -> bool:
+        return self.fingerprint(url) in self.seen
+
+    def is_covered(self, url: str) -> bool:
+        """Emitted before this window last ran, so that run already paged past it."""
+        first = self.seen.get(self.fingerprint(url))
+        return bool(first and self.checked_at and first <= self.checked_at)
+
+    def latest_dt(self) -> Optional[datetime]:
+        if not self.latest_published:
+            return None
+        try:
+            return datetime.fromisoformat(self.latest_published)
+        except Exception:
+            return None
+
+    def record(self, items: List[Dict[str, Any]], now: datetime) -> None:
+        stamp = now.isoformat()
+        for it in items:
+            self.seen.setdefault(self.fingerprint(it["url"]), stamp)
+            pub = it.get("published_at") or ""
+            if pub > self.latest_published:  # both UTC ISO strings from parse_date_to_iso
+                self.latest_published = pub
+        if len(self.seen) > SEEN_CAP:
+            keep = sorted(self.seen.items(), key=lambda kv: kv[1], reverse=True)[:SEEN_CAP]
+            self.seen = dict(keep)
+
+    def save(self, now: datetime) -> None:
+        os.makedirs(STATE_DIR, exist_ok=True)
+        self.windows[self.window] = {"latest_published": self.latest_published, "page_hash": self.page_hash,
+                                     "checked_at": now.isoformat()}
+        payload = {
+            "source": self.name,
+            "updated_at": now.isoformat(),
+            "windows": self.windows,
+            "seen": self.seen,
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def links_hash(items: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1("\n".join(it["url"] for it in items).encode("utf-8")).hexdigest()
+
+
+# -------------------------------- politeness / scheduling --------------------------------
+
+# DomainThrottle and load_rate_limits live in throttle.py (shared with process_document.py)
+HEALTH: Optional[HostHealth] = None  # set in main(); None keeps plain requests (bench, imports)
+
+
 # ---------------------------------- discovery core ---------------------------------
 
-def fetch(url: str) -> Tuple[str, bytes, Dict[str, str]]:
-    r = requests.get(url, timeout=REQ_TIMEOUT, headers={"User-Agent": USER_AGENT})
+def http_get(url: str, throttle: Optional[DomainThrottle] = None, **kwargs) -> requests.Response:
+    """GET through the host ledger (when loaded) and the per-domain token bucket."""
+    kwargs = {"timeout": REQ_TIMEOUT, "headers": {"User-Agent": USER_AGENT}, **kwargs}
+    if HEALTH is not None:
+        ok, why = HEALTH.allow(url)
+        if not ok:  # don't wait for a token we are not going to use
+            raise HostUnavailable(f"{urlparse(url).hostname}: {why}")
+    if throttle is not None:
+        throttle.acquire(url)
+    if HEALTH is None:
+        return requests.get(url, **kwargs)
+    return HEALTH.request(requests.get, url, **kwargs)
+
+
+def fetch(url: str, throttle: Optional[DomainThrottle] = None) -> Tuple[str, bytes, Dict[str, str]]:
+    r = http_get(url, throttle)
+    r.raise_for_status()
     return r.text, r.content, {k: v for k, v in r.headers.items()}
 
 
@@ -252,28 +436,224 @@ def discover_from_feed_bytes(content: bytes) -> List[Dict[str, Any]]:
     return out
 
 
-def discover_from_html(text: str, base_url: str, s: Source) -> List[Dict[str, Any]]:
+ATTR_SEL_RE = re.compile(r"^(.*?)::attr\(([\w:-]+)\)\s*$")
+ITEM_TAGS = {"li", "article", "tr", "dd", "dt"}  # elements that usually wrap exactly one listed item
+ITEM_SCOPE_DEPTH = 4
+
+
+def split_selector(sel: str) -> Tuple[str, Optional[str]]:
+    """'meta[name=date]::attr(content)' -> ('meta[name=date]', 'content')."""
+    m = ATTR_SEL_RE.match(sel or "")
+    return (m.group(1).strip(), m.group(2)) if m else ((sel or "").strip(), None)
+
+
+def url_allowed(href: str, s: Source) -> bool:
+    if s.exclude_patterns and any(p in href for p in s.exclude_patterns):
+        return False
+    if s.include_patterns and not any(p in href for p in s.include_patterns):
+        return False
+    return True
+
+
+def parse_item_date(value: str, s: Source) -> str:
+    if s.time_format:
+        try:
+            return datetime.strptime(value, s.time_format).replace(tzinfo=timezone.utc).isoformat()
+        except Exception:
+            pass
+    return parse_date_to_iso(value)
+
+
+def item_scopes(node: Any) -> List[Any]:
+    """
+    The link itself plus its ancestors up to the nearest item-like wrapper, so a
+    date is looked up next to its own link rather than anywhere on the page.
+    """
+    scopes = [node]
+    for depth, anc in enumerate(node.parents):
+        if depth >= ITEM_SCOPE_DEPTH or anc.name in (None, "[document]", "body"):
+            break
+        scopes.append(anc)
+        if anc.name in ITEM_TAGS:
+            return scopes
+    return scopes[:2]
+
+
+def item_date(node: Any, s: Source) -> str:
+    for scope in item_scopes(node):
+        for sel in s.date_selectors or []:
+            css, attr = split_selector(sel)
+            try:
+                tnode = scope.select_one(css) if css else None
+            except Exception:
+                continue
+            if tnode is None:
+                continue
+            tval = tnode.get(attr) if attr else (tnode.get("datetime") or tnode.get_text(" ", strip=True))
+            iso = parse_item_date(tval, s) if tval else ""
+            if iso:
+                return iso
+    return ""
+
+
+def select_links(soup: BeautifulSoup, s: Source) -> List[Any]:
+    """First list selector that yields links passing the URL filters (catch-all otherwise)."""
+    attr = s.link_attr or "href"
+    for sel in s.list_selectors or ["article a[href], .article a[href], a[href]"]:
+        try:
+            nodes = soup.select(sel)
+        except Exception as e:
+            print(f"[discover] bad selector {sel!r} for '{s.name}': {e}", file=sys.stderr)
+            continue
+        nodes = [n for n in nodes if n.get(attr) and url_allowed(n.get(attr), s)]
+        if nodes:
+            return nodes
+    return []
+
+
+def next_page_url(soup: BeautifulSoup, page_url: str, s: Source) -> str:
+    if not s.next_selector:
+        return ""
+    try:
+        node = soup.select_one(s.next_selector)
+    except Exception:
+        return ""
+    href = node.get("href") if node is not None else ""  # "load more" buttons have no href
+    return normalize_url(s.base or page_url, href) if href else ""
+
+
+class ExtractionPlan:
+    """
+    A source's selectors compiled once to lxml XPath. The page is parsed once,
+    the list selector is evaluated once, and title/date lookups only walk the
+    item's own subtree (see item_scopes) instead of the whole document.
+    """
+
+    def __init__(self, s: Source):
+        self.source = s
+        self.link_attr = s.link_attr or "href"
+        self.lists = [c for c in (self._compile(sel) for sel in s.list_selectors or []) if c]
+        if not s.list_selectors:
+            self.lists = [self._compile("article a[href], .article a[href], a[href]")]
+        self.dates = []
+        for sel in s.date_selectors or []:
+            css, attr = split_selector(sel)
+            compiled = self._compile(css)
+            if compiled:
+                self.dates.append((compiled, attr))
+        self.title = self._compile(s.title_selector) if s.title_selector else None
+        self.next = self._compile(s.next_selector) if s.next_selector else None
+
+    def _compile(self, css: str):
+        try:
+            return CSSSelector(css, translator="html")
+        except Exception as e:
+            print(f"[discover] bad selector {css!r} for '{self.source.name}': {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def text(node: Any) -> str:
+        return " ".join(node.text_content().split())
+
+    def parse(self, text: str):
+        try:
+            return lxml.html.document_fromstring(text)
+        except ValueError:  # str with an XML encoding declaration
+            return lxml.html.document_fromstring(text.encode("utf-8"))
+
+    def links(self, root: Any) -> List[Any]:
+        for sel in self.lists:
+            nodes = [n for n in sel(root) if n.get(self.link_attr) and url_allowed(n.get(self.link_attr), self.source)]
+            if nodes:
+                return nodes
+        return []
+
+    def scopes(self, node: Any) -> List[Any]:
+        scopes = [node]
+        anc = node.getparent()
+        depth = 0
+        while anc is not None and depth < ITEM_SCOPE_DEPTH and anc.tag not in ("body", "html"):
+            scopes.append(anc)
+            if anc.tag in ITEM_TAGS:
+                return scopes
+            anc = anc.getparent()
+            depth += 1
+        return scopes[:2]
+
+    def date(self, node: Any) -> str:
+        for scope in self.scopes(node):
+            for sel, attr in self.dates:
+                found = sel(scope)
+                if not found:
+                    continue
+                tnode = found[0]
+                tval = tnode.get(attr) if attr else (tnode.get("datetime") or self.text(tnode))
+                iso = parse_item_date(tval, self.source) if tval else ""
+                if iso:
+                    return iso
+        return ""
+
+    def extract(self, text: str, page_url: str) -> Tuple[List[Dict[str, Any]], str]:
+        s = self.source
+        root = self.parse(text)
+        out: List[Dict[str, Any]] = []
+        seen = set()
+        for node in self.links(root):
+            if len(out) >= MAX_HTML_LINKS:
+                break
+            url = normalize_url(s.base or page_url, node.get(self.link_attr))
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            title = ""
+            if self.title is not None:
+                tnodes = self.title(node)
+                title = self.text(tnodes[0]) if tnodes else ""
+            if not title:
+                title = self.text(node)[:300]
+            out.append({
+                "title": title,
+                "url": url,
+                "published_at": self.date(node) if self.dates else "",
+                "summary": "",
+            })
+
+        next_url = ""
+        if self.next is not None:
+            nodes = self.next(root)
+            href = nodes[0].get("href") if nodes else ""
+            next_url = normalize_url(s.base or page_url, href) if href else ""
+        return out, next_url
+
+
+def compile_plan(s: Source) -> Optional[ExtractionPlan]:
+    return ExtractionPlan(s) if CSSSelector is not None else None
+
+
+def discover_listing(text: str, page_url: str, s: Source,
+                     plan: Optional[ExtractionPlan] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """Items on one listing page plus the next page URL ('' if none)."""
+    if plan is not None:
+        try:
+            return plan.extract(text, page_url)
+        except Exception as e:
+            print(f"[discover] lxml extraction failed for '{s.name}', using BeautifulSoup: {e}", file=sys.stderr)
+    return discover_listing_soup(text, page_url, s)
+
+
+def discover_listing_soup(text: str, page_url: str, s: Source) -> Tuple[List[Dict[str, Any]], str]:
+    """BeautifulSoup variant of ExtractionPlan.extract (no lxml/cssselect, or lxml choked)."""
     out: List[Dict[str, Any]] = []
     soup = safe_soup(text, prefer_xml=False)
+    seen = set()
 
-    # Use custom selector if provided
-    candidates: Iterable[Any]
-    if s.selector:
-        candidates = soup.select(s.selector)
-    else:
-        # try common article patterns first, then all links
-        candidates = soup.select("article a[href], .article a[href], a[href]")
-
-    count = 0
-    for node in candidates:
-        if count >= MAX_HTML_LINKS:
+    for node in select_links(soup, s):
+        if len(out) >= MAX_HTML_LINKS:
             break
-        href = node.get(s.link_attr or "href")
-        if not href:
-            continue
-        url = normalize_url(s.base or base_url, href)
-        if not url:
+        url = normalize_url(s.base or page_url, node.get(s.link_attr or "href"))
+        if not url or url in seen:
             continue
+        seen.add(url)
         title = ""
         if s.title_selector:
             tnode = node.select_one(s.title_selector) if hasattr(node, "select_one") else None
@@ -281,50 +661,220 @@ def discover_from_html(text: str, base_url: str, s: Source) -> List[Dict[str, An
         if not title:
             title = node.get_text(" ", strip=True)[:300]
 
-        published_iso = ""
-        if s.time_selector:
-            tnode = soup.select_one(s.time_selector)
-            if tnode is not None:
-                tval = tnode.get(s.time_attr or "datetime") or tnode.get_text(" ", strip=True)
-                if tval:
-                    if s.time_format:
-                        try:
-                            dt = datetime.strptime(tval, s.time_format).replace(tzinfo=timezone.utc)
-                            published_iso = dt.isoformat()
-                        except Exception:
-                            published_iso = parse_date_to_iso(tval)
-                    else:
-                        published_iso = parse_date_to_iso(tval)
-
         out.append({
             "title": title,
             "url": url,
-            "published_at": published_iso,
+            "published_at": item_date(node, s) if s.date_selectors else "",
             "summary": "",
         })
-        count += 1
 
+    return out, next_page_url(soup, page_url, s)
+
+
+def discover_from_html(text: str, base_url: str, s: Source,
+                       plan: Optional[ExtractionPlan] = None) -> List[Dict[str, Any]]:
+    return discover_listing(text, base_url, s, plan)[0]
+
+
+SAVE_PAGES_DIR: Optional[str] = None  # --save-pages: keep fetched listing pages for scripts/bench_discover.py
+
+
+def save_page(s: Source, page: int, text: str) -> None:
+    if not SAVE_PAGES_DIR:
+        return
+    try:
+        os.makedirs(SAVE_PAGES_DIR, exist_ok=True)
+        safe = re.sub(r"[^\w.-]+", "_", s.name)
+        with open(os.path.join(SAVE_PAGES_DIR, f"{safe}--{page}.html"), "w", encoding="utf-8") as f:
+            f.write(text)
+    except Exception as e:
+        print(f"[discover] could not save page {page} of '{s.name}': {e}", file=sys.stderr)
+
+
+def past_cutoff(items: List[Dict[str, Any]], cutoff_utc: datetime) -> bool:
+    """Listings are newest-first: once a page shows a dated item older than the cutoff, stop paging."""
+    return any(it.get("published_at") and not within_window(it["published_at"], cutoff_utc) for it in items)
+
+
+def crawl_listing(s: Source, first_text: str, cutoff_utc: datetime,
+                  throttle: Optional[DomainThrottle] = None,
+                  plan: Optional[ExtractionPlan] = None,
+                  state: Optional[SourceState] = None) -> List[Dict[str, Any]]:
+    """
+    Follow pagination.next_selector up to max_pages. Stops early at the window
+    cutoff, and (with state) at the first page that lists a URL emitted before
+    this window last ran or an item older than the window's latest published date.
+    """
+    parsed: List[Dict[str, Any]] = []
+    digest = ""
+    page_url, text, visited = s.url, first_text, {s.url}
+    stop_before = cutoff_utc
+    if state is not None and state.latest_dt() and state.latest_dt() > cutoff_utc:
+        stop_before = state.latest_dt()
+    for page in range(1, s.max_pages + 1):
+        save_page(s, page, text)
+        items, next_url = discover_listing(text, page_url, s, plan)
+        parsed.extend(items)
+        if page == 1 and state is not None:
+            digest = links_hash(items)
+            if digest == state.page_hash:
+                print(f"[discover] {s.name}: first page unchanged", file=sys.stderr)
+                return []
+        if page >= s.max_pages or not next_url or next_url in visited:
+            break
+        if past_cutoff(items, stop_before):
+            print(f"[discover] {s.name}: reached cutoff on page {page}", file=sys.stderr)
+            break
+        if state is not None and any(state.is_covered(it["url"]) for it in items):
+            print(f"[discover] {s.name}: reached already-seen items on page {page}", file=sys.stderr)
+            break
+        visited.add(next_url)
+        page_url = next_url
+        text = fetch(page_url, throttle)[0]
+    if state is not None:
+        state.page_hash = digest  # only once every page was fetched
+    return parsed
+
+
+def open_stream(url: str, throttle: Optional[DomainThrottle] = None) -> Tuple[requests.Response, Any]:
+    """Streaming GET; returns (response, binary file object), transparently un-gzipping .xml.gz."""
+    r = http_get(url, throttle, stream=True)
+    r.raise_for_status()
+    r.raw.decode_content = True  # Content-Encoding: gzip
+    r.raw.auto_close = False  # let the BufferedReader see EOF instead of a closed file
+    stream = io.BufferedReader(r.raw)
+    if stream.peek(2)[:2] == b"\x1f\x8b":  # gzipped file body (sitemap.xml.gz)
+        stream = gzip.GzipFile(fileobj=stream)
+    return r, stream
+
+
+def _local(tag: Any) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def iter_sitemap(stream: Any) -> Iterable[Tuple[str, str, str, str]]:
+    """
+    Yield ("url" | "sitemap", loc, lastmod, title) per entry while parsing
+    incrementally; finished entries are cleared from the tree so memory stays
+    flat regardless of the number of URLs. `title` comes from news:title if any.
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or _local(elem.tag) not in ("url", "sitemap"):
+            continue
+        loc = lastmod = title = ""
+        for child in elem.iter():
+            tag = _local(child.tag)
+            text = (child.text or "").strip()
+            if tag == "loc" and not loc:
+                loc = text
+            elif tag == "lastmod" or (tag == "publication_date" and not lastmod):
+                lastmod = text
+            elif tag == "title" and not title:
+                title = text
+        yield _local(elem.tag), loc, lastmod, title
+        root.clear()
+
+
+def parse_lastmod(value: str) -> Optional[datetime]:
+    """<lastmod> is W3C datetime (ISO 8601 subset): fromisoformat first, dateutil for oddities."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        iso = parse_date_to_iso(value)
+        return datetime.fromisoformat(iso) if iso else None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def title_from_url(url: str) -> str:
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    slug = re.sub(r"\.\w{2,5}$", "", slug)
+    return re.sub(r"[-_]+", " ", slug).strip() or url
+
+
+def discover_from_sitemap(s: Source, cutoff_utc: datetime,
+                          throttle: Optional[DomainThrottle] = None,
+                          state: Optional[SourceState] = None) -> List[Dict[str, Any]]:
+    """
+    Walk a sitemap or sitemap index. Child sitemaps are only followed when their
+    own lastmod is missing or inside the window; URL patterns, the window and the
+    seen-set are applied per entry as it streams past.
+    """
+    out: List[Dict[str, Any]] = []
+    queue, visited = [s.url], set()
+    while queue and len(visited) < s.max_sitemaps:
+        sm_url = queue.pop(0)
+        if sm_url in visited:
+            continue
+        visited.add(sm_url)
+        r, stream = open_stream(sm_url, throttle)
+        with r:
+            for kind, loc, lastmod, title in iter_sitemap(stream):
+                if not loc:
+                    continue
+                if kind == "sitemap":
+                    modified = parse_lastmod(lastmod)
+                    if modified is None or modified >= cutoff_utc:
+                        queue.append(normalize_url(sm_url, loc))
+                    continue
+                if not url_allowed(loc, s):
+                    continue
+                modified = parse_lastmod(lastmod)
+                if modified is None and not s.keep_undated:
+                    continue
+                if modified is not None and modified < cutoff_utc:
+                    continue
+                if state is not None and state.is_seen(loc):
+                    continue
+                out.append({
+                    "title": title or title_from_url(loc),
+                    "url": normalize_url(sm_url, loc),
+                    "published_at": modified.astimezone(timezone.utc).isoformat() if modified else "",
+                    "summary": "",
+                })
+                if len(out) >= MAX_SITEMAP_URLS:
+                    print(f"[discover] {s.name}: sitemap cap of {MAX_SITEMAP_URLS} URLs reached", file=sys.stderr)
+                    return out
+    if queue:
+        print(f"[discover] {s.name}: {len(queue)} child sitemap(s) left for max_sitemaps={s.max_sitemaps}",
+              file=sys.stderr)
     return out
 
 
-def process_source(s: Source, cutoff_utc: datetime) -> List[Dict[str, Any]]:
+def process_source(s: Source, cutoff_utc: datetime,
+                   throttle: Optional[DomainThrottle] = None,
+                   state: Optional[SourceState] = None) -> List[Dict[str, Any]]:
+    """Items of one source inside the window; with state, only those not emitted before."""
     items: List[Dict[str, Any]] = []
     try:
-        text, content, headers = fetch(s.url)
-        ctype = headers.get("Content-Type", "")
-        auto_feed = looks_like_feed(text, ctype)
         mode = (s.type or "").lower()
-        is_feed = (mode == "feed") or (mode == "" and auto_feed)
-
-        if is_feed:
-            parsed = discover_from_feed_bytes(content)
-            if not parsed:  # feedparser gave nothing; try tolerant XML/HTML
-                parsed = discover_from_html(text, s.url, s)  # will handle xml-as-html too
+        if mode == "sitemap":
+            parsed = discover_from_sitemap(s, cutoff_utc, throttle, state)
         else:
-            parsed = discover_from_html(text, s.url, s)
-
-        # augment with source name and filter by window
+            plan = compile_plan(s)
+            text, content, headers = fetch(s.url, throttle)
+            ctype = headers.get("Content-Type", "")
+            auto_feed = looks_like_feed(text, ctype)
+            is_feed = (mode == "feed") or (mode == "" and auto_feed)
+
+            if is_feed:
+                parsed = discover_from_feed_bytes(content)
+                if not parsed:  # feedparser gave nothing; try tolerant XML/HTML
+                    parsed = discover_from_html(text, s.url, s, plan)  # will handle xml-as-html too
+                parsed = [it for it in parsed if url_allowed(it["url"], s)]
+                if state is not None:
+                    state.page_hash = links_hash(parsed)
+            else:
+                parsed = crawl_listing(s, text, cutoff_utc, throttle, plan, state)
+
+        # augment with source name and filter by window (and by what was already emitted)
         for it in parsed:
+            if state is not None and state.is_seen(it["url"]):
+                continue
             it["source"] = s.name or (urlparse(s.url).netloc or s.url)
             it["tags"] = list(s.tags or [])
             it["published_at"] = it.get("published_at") or ""
@@ -333,6 +883,9 @@ def process_source(s: Source, cutoff_utc: datetime) -> List[Dict[str, Any]]:
 
     except Exception as e:
         print(f"[discover] skipping '{s.name}' ({s.url}): {e}", file=sys.stderr)
+        if state is not None:
+            state.failed = True
+        return []
 
     return items
 
@@ -377,13 +930,75 @@ def dedupe_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
+def write_discovery(path: str, payload: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def merge_shards(out_path: str = OUT_PATH) -> int:
+    """Fold the --shard partial files (discovery + host health) into the shared ones, then remove them."""
+    parts = shard_parts(out_path)
+    if not parts:
+        print(f"[discover] no shard files for {out_path}; nothing to merge", file=sys.stderr)
+        return 1
+    missing = missing_shards(parts)
+    if missing:
+        print(f"[discover] merging without shard(s): {', '.join(missing)}", file=sys.stderr)
+
+    payloads: List[Dict[str, Any]] = []
+    for _, _, f in parts:
+        try:
+            with open(f, "r", encoding="utf-8") as fh:
+                payloads.append(json.load(fh))
+        except Exception as e:  # leave every part in place so the merge can be rerun
+            print(f"[discover] cannot read {f}: {e}; nothing merged", file=sys.stderr)
+            return 1
+
+    # shard order, then source order within each shard: stable for a given N
+    items = dedupe_items([it for p in payloads for it in p.get("items") or []])
+    payload: Dict[str, Any] = {
+        "generated_at": max(p.get("generated_at") or "" for p in payloads),
+        "window": payloads[0].get("window"),
+        "cutoff_utc": min(p.get("cutoff_utc") or "" for p in payloads),
+        "items": items,
+        "documents": [],   # kept for downstream compatibility
+        "sources": [name for p in payloads for name in p.get("sources") or []],
+    }
+    write_discovery(out_path, payload)
+
+    for _, _, f in parts:
+        os.remove(f)
+    merge_shard_ledgers()
+    print(f"[discover] merged {len(parts)} shard(s) into {out_path}: {len(items)} item(s), "
+          f"{len(payload['sources'])} source(s)", file=sys.stderr)
+    return 0
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Discover new items for the last window and write state/latest_discovery.json")
     ap.add_argument("--window", default="1d", help="Time window: e.g. 12h, 1d, 3d, 2w (default: 1d)")
     ap.add_argument("--sources", default=None, help="Path to sources YAML (e.g., sources_v2.yaml)")
     ap.add_argument("--config", default=None, help="Path to config YAML (e.g., config_v2.yaml)")
+    ap.add_argument("--full", action="store_true",
+                    help="Ignore per-source state and emit everything in the window (state is still updated)")
+    ap.add_argument("--save-pages", default=None, help="Also write fetched listing pages to this directory (benchmark input)")
+    ap.add_argument("--shard", default=None, help="Only run the sources of shard i of N, e.g. 0/4 (writes partial state)")
+    ap.add_argument("--merge", action="store_true", help="Merge the --shard partial files into state/latest_discovery.json")
     args = ap.parse_args()
 
+    try:
+        shard = parse_shard(args.shard)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.merge:
+        return merge_shards()
+
+    global SAVE_PAGES_DIR
+    SAVE_PAGES_DIR = args.save_pages
+
     window_td = parse_window(args.window)
     now = datetime.now(timezone.utc)
     cutoff = now - window_td
@@ -392,20 +1007,28 @@ def main() -> int:
     if not sources:
         print("[discover] no sources found; writing empty state", file=sys.stderr)
 
-    all_items: List[Dict[str, Any]] = []
-    source_names: List[str] = []
+    global HEALTH
+    HEALTH = HostHealth.load(shard_path(HEALTH_PATH, shard), fallback=HEALTH_PATH)
+    rps, max_workers = load_rate_limits(args.config)
+    throttle = DomainThrottle(rps, health=HEALTH)
+    active = [s for s in sources if s.enabled and in_shard(s.name, shard)]
+    source_names: List[str] = [s.name for s in active]
 
-    for s in sources:
-        if not s.enabled:
-            continue
-        source_names.append(s.name)
-        items = process_source(s, cutoff)
-        all_items.extend(items)
-        print(f"[discover] {s.name}: +{len(items)} items", file=sys.stderr)
+    states: Dict[str, SourceState] = {s.name: SourceState.load(s.name, args.window) for s in active}
+
+    def run(s: Source) -> List[Dict[str, Any]]:
+        t0 = time.monotonic()
+        items = process_source(s, cutoff, throttle, None if args.full else states[s.name])
+        print(f"[discover] {s.name}: +{len(items)} items ({time.monotonic() - t0:.1f}s)", file=sys.stderr)
+        return items
 
-        # be nice to servers
-        time.sleep(0.2)
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(run, active))  # map keeps source order
+    print(f"[discover] {len(active)} source(s){f' (shard {args.shard})' if shard else ''} in {time.monotonic() - t0:.1f}s "
+          f"(concurrency={max_workers}, per_domain_rps={rps})", file=sys.stderr)
 
+    all_items: List[Dict[str, Any]] = [it for items in results for it in items]
     all_items = dedupe_items(all_items)
 
     payload: Dict[str, Any] = {
@@ -417,12 +1040,21 @@ def main() -> int:
         "sources": source_names,
     }
 
-    os.makedirs("state", exist_ok=True)
-    out_path = os.path.join("state", "latest_discovery.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False)
+    out_path = shard_path(OUT_PATH, shard)
+    write_discovery(out_path, payload)
 
     print(f"[discover] wrote {out_path} with {len(all_items)} item(s).", file=sys.stderr)
+
+    HEALTH.save()
+    print(f"[discover] host health: {HEALTH.summary()}", file=sys.stderr)
+
+    # Only now that the queue is on disk do the emitted items count as seen
+    for s, items in zip(active, results):
+        st = states[s.name]
+        if st.failed:
+            continue  # retry the whole source next run
+        st.record(items, now)
+        st.save(now)
     return 0
 
 